@@ -1,13 +1,42 @@
-from fastapi import APIRouter
-from app.presentation.baseline_presentation import get_company_baseline
+from fastapi import APIRouter, Header, Response
+from app.ingestion.ingest_company import get_company_data_version
+from app.presentation.baseline_presentation import (
+    baseline_cache_key,
+    build_company_baseline,
+    get_company_baseline,
+)
 
 
 router = APIRouter()
 
 @router.get("/company/{company_id}/baseline")
-@router.get("/company/{company_id}/baseline")
-def company_baseline(company_id: str):
-    presentation = get_company_baseline(company_id)
+def company_baseline(
+    company_id: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Baseline dashboard.
+
+    - Cached per (company_id, data_version)
+    - ETag = cache key; If-None-Match → 304 without rebuilding
+    """
+    data_version = get_company_data_version(company_id)
+    if data_version is None:
+        # Unknown company: nothing worth caching
+        return {
+            "presentation": build_company_baseline(company_id)
+        }
+
+    etag = f'"{baseline_cache_key(company_id, data_version)}"'
+
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    presentation = get_company_baseline(company_id, data_version=data_version)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return {
         "presentation": presentation
     }
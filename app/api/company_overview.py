@@ -1,115 +1,86 @@
 from fastapi import APIRouter
-from psycopg2.extras import RealDictCursor
-import psycopg2
-from dotenv import load_dotenv
-import os
+from app.db.connection import get_db_connection
+from app.metrics.metric_registry import get_metric_registry
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
 
 router = APIRouter()
 
 
+# response field → (metric_key, aggregation used when aggregation_type is NULL)
+OVERVIEW_METRICS = {
+    "total_revenue": ("revenue", "sum"),
+    "net_profit": ("net_profit", "sum"),
+    "aov": ("aov", "avg"),
+    "repeat_order_pct": ("repeat_order_rate", "avg"),
+    "cash_runway_months": ("runway_months", "last"),
+}
+
+# aggregation_type → rollup column (ratio metrics are averaged)
+ROLLUP_COLUMN = {
+    "sum": "value_sum",
+    "avg": "value_avg",
+    "ratio": "value_avg",
+    "last": "last_value",
+}
+
+
 @router.get("/company/{company_id}/overview")
 def get_company_overview(company_id: str):
     """
     Deterministic company overview.
 
     RULES:
-    - Uses ONLY stored financial_facts
+    - Uses ONLY stored financial_facts (via company_metric_rollups)
     - No recomputation of derived metrics
     - Aggregation strictly follows metric semantics
+      (metric_definitions.aggregation_type)
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
-    # --------------------------------------------------
-    # Total Revenue (SUM)
-    # --------------------------------------------------
-    cur.execute(
-        """
-        SELECT SUM(ff.value) AS total_revenue
-        FROM financial_facts ff
-        JOIN metric_definitions md ON md.id = ff.metric_id
-        WHERE ff.company_id = %s
-          AND md.metric_key = 'revenue';
-        """,
-        (company_id,),
-    )
-    total_revenue = cur.fetchone()["total_revenue"]
+    registry = get_metric_registry()
 
-    # --------------------------------------------------
-    # Net Profit (SUM — nullable)
-    # --------------------------------------------------
-    cur.execute(
-        """
-        SELECT SUM(ff.value) AS net_profit
-        FROM financial_facts ff
-        JOIN metric_definitions md ON md.id = ff.metric_id
-        WHERE ff.company_id = %s
-          AND md.metric_key = 'net_profit';
-        """,
-        (company_id,),
-    )
-    net_profit = cur.fetchone()["net_profit"]
+    metric_ids = {
+        field: registry.id_of(metric_key)
+        for field, (metric_key, _) in OVERVIEW_METRICS.items()
+    }
 
     # --------------------------------------------------
-    # AOV (AVG – derived metric)
+    # ONE primary-key read of the company's rollups
     # --------------------------------------------------
-    cur.execute(
-        """
-        SELECT AVG(ff.value) AS aov
-        FROM financial_facts ff
-        JOIN metric_definitions md ON md.id = ff.metric_id
-        WHERE ff.company_id = %s
-          AND md.metric_key = 'aov';
-        """,
-        (company_id,),
-    )
-    aov = cur.fetchone()["aov"]
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    metric_id,
+                    value_sum,
+                    value_sum / NULLIF(value_count, 0) AS value_avg,
+                    last_value
+                FROM company_metric_rollups
+                WHERE company_id = %s
+                  AND metric_id = ANY(%s::uuid[]);
+                """,
+                (company_id, [str(m) for m in metric_ids.values() if m]),
+            )
+            rollups = {
+                str(metric_id): {
+                    "value_sum": value_sum,
+                    "value_avg": value_avg,
+                    "last_value": last_value,
+                }
+                for metric_id, value_sum, value_avg, last_value in cur.fetchall()
+            }
+    finally:
+        conn.close()
 
-    # --------------------------------------------------
-    # Repeat Order Rate (AVG – derived metric)
-    # --------------------------------------------------
-    cur.execute(
-        """
-        SELECT AVG(ff.value) AS repeat_order_pct
-        FROM financial_facts ff
-        JOIN metric_definitions md ON md.id = ff.metric_id
-        WHERE ff.company_id = %s
-          AND md.metric_key = 'repeat_order_rate';
-        """,
-        (company_id,),
-    )
-    repeat_order_pct = cur.fetchone()["repeat_order_pct"]
+    overview = {}
+    for field, (metric_key, default_aggregation) in OVERVIEW_METRICS.items():
+        definition = registry.get(metric_key)
+        aggregation = (
+            definition.aggregation_type if definition else None
+        ) or default_aggregation
 
-    # --------------------------------------------------
-    # Cash Runway (LAST by period_end)
-    # --------------------------------------------------
-    cur.execute(
-        """
-        SELECT ff.value
-        FROM financial_facts ff
-        JOIN metric_definitions md ON md.id = ff.metric_id
-        JOIN financial_periods fp ON fp.id = ff.period_id
-        WHERE ff.company_id = %s
-          AND md.metric_key = 'runway_months'
-        ORDER BY fp.period_end DESC
-        LIMIT 1;
-        """,
-        (company_id,),
-    )
-    runway_row = cur.fetchone()
-    cash_runway_months = runway_row["value"] if runway_row else None
-
-    cur.close()
-    conn.close()
+        rollup = rollups.get(str(metric_ids[field]))
+        overview[field] = rollup[ROLLUP_COLUMN[aggregation]] if rollup else None
 
-    return {
-        "total_revenue": total_revenue,
-        "net_profit": net_profit,
-        "aov": aov,
-        "repeat_order_pct": repeat_order_pct,
-        "cash_runway_months": cash_runway_months,
-    }
+    return overview
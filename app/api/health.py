@@ -1,7 +1,48 @@
 from fastapi import APIRouter
 
+from app.cache.answer_cache import get_answer_cache_stats
+from app.cache.intent_cache import get_intent_cache_stats
+from app.cache.presentation_cache import get_presentation_cache_stats
+from app.db.connection import get_pool_stats
+from app.embeddings.embedding_cache import get_embedding_cache_stats
+from app.metrics.dependency_cache import get_dependency_catalog_stats
+from app.presentation.intent_planner import get_intent_planner_stats
+from app.retrieval.retrieve_financial_evidence import get_query_embedding_cache_stats
+
 router = APIRouter()
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@router.get("/health/db")
+def health_db():
+    """
+    Connection pool metrics for monitoring.
+    """
+    return {"pool": get_pool_stats()}
+
+
+@router.get("/health/cache")
+def health_cache():
+    """
+    In-process cache metrics for monitoring.
+    """
+    return {
+        "embeddings": get_embedding_cache_stats(),
+        "query_embeddings": get_query_embedding_cache_stats(),
+        "metric_dependencies": get_dependency_catalog_stats(),
+        "presentations": get_presentation_cache_stats(),
+        "answers": get_answer_cache_stats(),
+        "presentation_intents": get_intent_cache_stats(),
+    }
+
+
+@router.get("/health/planner")
+def health_planner():
+    """
+    Presentation-intent planner metrics: how often the rule-based fast
+    path answered without a planner LLM round trip.
+    """
+    return {"presentation_intent": get_intent_planner_stats()}
@@ -1,19 +1,48 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import asyncio
+import json
+import traceback
 
-from app.qa.answer_financial_question import answer_question
+from app.qa.answer_financial_question import answer_question, stream_answer
 
 router = APIRouter()
 
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds
+
 
 class QueryRequest(BaseModel):
     question: str
     company_id: str
+    debug: bool = False     # include per-stage timings
+
+
+async def run_until_disconnect(http_request: Request, coro):
+    """
+    Await coro, cancelling it if the client disconnects first.
+
+    Cancellation propagates into the stage graph and aborts in-flight
+    LLM calls. Returns None when cancelled.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                print("[DEBUG] Client disconnected, cancelling query")
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
 
 
 @router.post("/query")
-async def query_financials(request: QueryRequest):
+async def query_financials(request: QueryRequest, http_request: Request):
     """
     Executes a data-grounded financial query.
 
@@ -23,8 +52,55 @@ async def query_financials(request: QueryRequest):
     - No business logic in API layer
     - Deterministic charts
     """
-    # print(await answer_question)
-    return await answer_question(
-        question=request.question,
-        company_id=request.company_id
+    response = await run_until_disconnect(
+        http_request,
+        answer_question(
+            question=request.question,
+            company_id=request.company_id,
+            debug=request.debug,
+        ),
+    )
+    if response is None:
+        # Nobody is listening any more (nginx's "client closed request")
+        return Response(status_code=499)
+    return response
+
+
+@router.post("/query/stream")
+async def query_financials_stream(request: QueryRequest):
+    """
+    Streaming /query (NDJSON, one JSON frame per line).
+
+    presentation and evidence_sources arrive as soon as the SQL side is
+    done, then the answer streams token by token, then a final
+    confidence / limitations frame. Errors after the stream has started
+    arrive as {"type": "error", ...}.
+
+    The stream is cancelled (LLM call included) if the client disconnects.
+    """
+
+    async def frames():
+        try:
+            async for frame in stream_answer(
+                question=request.question,
+                company_id=request.company_id,
+                debug=request.debug,
+            ):
+                yield json.dumps(jsonable_encoder(frame)) + "\n"
+
+        except Exception as e:
+            traceback.print_exc()
+            yield json.dumps({
+                "type": "error",
+                "error_type": e.__class__.__name__,
+                "message": str(e) or "Unknown error",
+            }) + "\n"
+
+    return StreamingResponse(
+        frames(),
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",     # no proxy buffering (nginx)
+        },
     )
@@ -1,87 +1,272 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-import tempfile
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+import hashlib
 import os
 import traceback
-import psycopg2
-from dotenv import load_dotenv
+import uuid
 
-from app.ingestion.ingest_financial_files import ingest_financial_file
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.ingestion.ingest_financial_files import SOURCE_GRAIN_TO_PERIOD_TYPE
+from app.ingestion.ingestion_jobs import (
+    enqueue_ingestion_job,
+    find_source_document,
+    get_ingestion_job,
+    persist_upload_path,
+)
 from app.queries.fetch_recent_facts import fetch_recent_facts
 from app.queries.fetch_recent_summaries import fetch_recent_summaries
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-
 router = APIRouter()
 
+# Body bytes are buffered up to this size before one hash update + disk write
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+UPLOAD_MAX_FIELD_SIZE = 64 * 1024
+
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["company_name", "user_email", "file"],
+                    "properties": {
+                        "company_name": {"type": "string"},
+                        "user_email": {"type": "string"},
+                        "source_grain": {
+                            "type": "string",
+                            "enum": list(SOURCE_GRAIN_TO_PERIOD_TYPE),
+                            "default": "auto",
+                        },
+                        "file": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+# ------------------------------------------------------------
+# Streaming multipart receiver
+# ------------------------------------------------------------
+class _StreamingUpload:
+    """
+    Parses multipart/form-data straight off the request stream.
+
+    - The file part goes to persist_upload_path(), SHA-256 updated per
+      UPLOAD_CHUNK_SIZE block as it is written (no spooled copy, no re-read)
+    - Text parts are collected into fields
+    """
+
+    def __init__(self, content_type: str):
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Expected multipart/form-data with a boundary")
+
+        self.fields: dict[str, str] = {}
+        self.filename: str | None = None
+        self.path: str | None = None
+        self.sha256 = hashlib.sha256()
+
+        self._out = None
+        self._pending = bytearray()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._part_name: str | None = None
+        self._part_is_file = False
+        self._part_value = bytearray()
+
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    # ---- parser callbacks (sync, no I/O) ----
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._part_name = None
+        self._part_is_file = False
+        self._part_value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._part_name = options.get(b"name", b"").decode("utf-8", "replace")
+
+        if b"filename" not in options:
+            return
+
+        if self._out is not None:
+            raise ValueError("Only one file per upload is supported")
+
+        self._part_is_file = True
+        self.filename = options[b"filename"].decode("utf-8", "replace")
+        self.path = persist_upload_path(os.path.splitext(self.filename)[1])
+        self._out = open(self.path, "wb")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._part_is_file:
+            self._pending += data[start:end]
+            return
+
+        self._part_value += data[start:end]
+        if len(self._part_value) > UPLOAD_MAX_FIELD_SIZE:
+            raise ValueError(f"Form field '{self._part_name}' is too large")
+
+    def _on_part_end(self):
+        if not self._part_is_file and self._part_name:
+            self.fields[self._part_name] = self._part_value.decode("utf-8", "replace")
+
+    # ---- I/O ----
+    def _write_block(self, block: bytes):
+        # hashlib releases the GIL on large buffers → fine in the threadpool
+        self.sha256.update(block)
+        self._out.write(block)
+
+    async def _flush(self):
+        if self._pending:
+            block = bytes(self._pending)
+            self._pending.clear()
+            await run_in_threadpool(self._write_block, block)
+
+    async def receive(self, request: Request) -> str:
+        """
+        Consume the body; returns the file's SHA-256 hex.
+        """
+        try:
+            async for chunk in request.stream():
+                self._parser.write(chunk)
+                if len(self._pending) >= UPLOAD_CHUNK_SIZE:
+                    await self._flush()
+
+            self._parser.finalize()
+            await self._flush()
+        finally:
+            if self._out is not None:
+                self._out.close()
+
+        return self.sha256.hexdigest()
 
-@router.post("/upload")
-async def upload_financial_file(
-    company_name: str = Form(...),
-    user_email: str = Form(...),
-    file: UploadFile = File(...),
-):
+    def discard(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+@router.post("/upload", status_code=202, openapi_extra=UPLOAD_FORM_SCHEMA)
+async def upload_financial_file(request: Request):
+    """
+    Persist the upload and enqueue ingestion.
+
+    Form fields: company_name, user_email, file, source_grain (optional).
+
+    source_grain only sets the grain of date-valued periods ("auto" =
+    inferred from the spacing of the dates, month when ambiguous);
+    labels like "Q3 FY24" / "FY2023" carry their own grain.
+
+    The body is hashed while it streams to disk; a file this company
+    already ingested is answered from one indexed lookup, before any
+    company / parsing work.
+
+    Returns a job_id immediately; poll GET /upload/{job_id} for progress.
+    """
     print("🔹 /upload called")
-    print("Company name:", company_name)
-    print("User email:", user_email)
-    print("Original filename:", file.filename)
 
-    suffix = os.path.splitext(file.filename)[1]
+    upload = None
 
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            contents = await file.read()
-            tmp.write(contents)
-            tmp_path = tmp.name
+        upload = _StreamingUpload(request.headers.get("content-type", ""))
+        file_hash = await upload.receive(request)
+
+        company_name = upload.fields.get("company_name")
+        user_email = upload.fields.get("user_email")
+        source_grain = upload.fields.get("source_grain") or "auto"
 
-        print("Temp file path:", tmp_path)
+        missing = [
+            name for name, value in (
+                ("company_name", company_name),
+                ("user_email", user_email),
+                ("file", upload.path),
+            )
+            if not value
+        ]
+        if missing:
+            upload.discard()
+            raise HTTPException(
+                status_code=422,
+                detail=f"Missing form field(s): {', '.join(missing)}",
+            )
 
-        # 1️⃣ Ingest file (DO NOT pass source_name)
-        result = ingest_financial_file(
-            file_path=tmp_path,
+        if source_grain not in SOURCE_GRAIN_TO_PERIOD_TYPE:
+            upload.discard()
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unsupported source_grain: {source_grain}",
+            )
+
+        print("Company name:", company_name)
+        print("User email:", user_email)
+        print("Original filename:", upload.filename)
+        print("Upload persisted:", upload.path)
+
+        # Re-upload of an ingested file → answer before anything else runs
+        existing = await run_in_threadpool(find_source_document, user_email, file_hash)
+        if existing and existing["status"] == "completed":
+            upload.discard()
+            return {
+                "status": "success",
+                "job_id": existing["job_id"],
+                "company_id": existing["company_id"],
+                "message": "Already ingested",
+            }
+
+        # Registration touches the DB → keep it off the event loop
+        job = await run_in_threadpool(
+            enqueue_ingestion_job,
+            file_path=upload.path,
             user_email=user_email,
             company_name=company_name,
+            original_filename=upload.filename,
             source_type="csv",
-            source_grain="monthly",
+            source_grain=source_grain,
+            file_hash=file_hash,
         )
 
-        # 2️⃣ Attach ORIGINAL filename for evidence display
-        with psycopg2.connect(DATABASE_URL) as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    UPDATE source_documents
-                    SET original_filename = %s
-                    WHERE id = (
-                        SELECT id
-                        FROM source_documents
-                        WHERE company_id = %s
-                        ORDER BY uploaded_at DESC
-                        LIMIT 1
-                    );
-
-                    """,
-                    (file.filename, result["company_id"])
-                )
-                conn.commit()
-
-        facts = fetch_recent_facts(result["company_id"], limit=20)
-        summaries = fetch_recent_summaries(result["company_id"], limit=5)
-
-        return {
-            "status": "success",
-            "company_id": result["company_id"],
-            "message": result["message"],
-            "preview": {
-                "facts_inserted": facts,
-                "summaries_generated": summaries,
-            },
-        }
+    except HTTPException:
+        raise
 
     except Exception as e:
         print("❌ ERROR DURING UPLOAD")
         traceback.print_exc()
 
+        if upload is not None:
+            upload.discard()
+
         raise HTTPException(
             status_code=400,
             detail={
@@ -90,7 +275,46 @@ async def upload_financial_file(
             },
         )
 
-    finally:
-        if "tmp_path" in locals() and os.path.exists(tmp_path):
-            os.remove(tmp_path)
-            print("Temp file cleaned up")
+    if job["status"] == "completed":
+        return {
+            "status": "success",
+            "job_id": job["job_id"],
+            "company_id": job["company_id"],
+            "message": "Already ingested",
+        }
+
+    return {
+        "status": job["status"],
+        "job_id": job["job_id"],
+        "company_id": job["company_id"],
+        "message": (
+            "Ingestion queued" if job["enqueued"]
+            else "Ingestion already in progress"
+        ),
+    }
+
+
+@router.get("/upload/{job_id}")
+def get_upload_status(job_id: str):
+    """
+    Ingestion job status (source_documents.ingestion_*).
+
+    A preview of inserted facts and generated summaries is
+    included once the job has completed.
+    """
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+
+    job = get_ingestion_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+
+    if job["status"] == "completed":
+        job["preview"] = {
+            "facts_inserted": fetch_recent_facts(job["company_id"], limit=20),
+            "summaries_generated": fetch_recent_summaries(job["company_id"], limit=5),
+        }
+
+    return job
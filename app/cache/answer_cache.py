@@ -0,0 +1,200 @@
+"""
+Answer cache: full /query responses per (company, data_version, question).
+
+Dashboards re-ask the same questions between uploads; a hit skips
+retrieval, both LLM calls and the SQL presentation build.
+
+- Exact tier: key = (company_id, data_version, normalize_question(q))
+- Semantic tier (ANSWER_CACHE_SEMANTIC_THRESHOLD > 0): on an exact miss,
+  reuse the answer of a cached question of the same company + version
+  whose embedding has cosine similarity >= the threshold. Uses the
+  (cached) query embedding retrieval would compute anyway
+- data_version in the key means a new ingestion is never answered from
+  stale entries; invalidate_company() also frees them on completion
+- Bounded by ANSWER_CACHE_SIZE (LRU) and ANSWER_CACHE_TTL seconds
+
+Per worker (in-process), like the query embedding cache.
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.cache.lru_cache import LRUCache
+from app.retrieval.retrieve_financial_evidence import embed_question, normalize_question
+
+logger = logging.getLogger("cache.answers")
+
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+# 0 disables the semantic tier
+ANSWER_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD", "0"))
+
+# Bump when the /query response shape changes
+ANSWER_CACHE_SCHEMA = "v1"
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        maxsize: int = ANSWER_CACHE_SIZE,
+        ttl_seconds: float = ANSWER_CACHE_TTL,
+        semantic_threshold: float = ANSWER_CACHE_SEMANTIC_THRESHOLD,
+        embed=embed_question,
+    ):
+        self.semantic_threshold = semantic_threshold
+        self._embed = embed
+        self._entries = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+        # company_id → (data_version, OrderedDict[key → unit vector])
+        self._vectors = {}
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_ms = 0
+
+    @staticmethod
+    def key(company_id: str, data_version, question: str) -> tuple:
+        return (ANSWER_CACHE_SCHEMA, company_id, data_version, normalize_question(question))
+
+    # --------------------------------------------------
+    # Lookup
+    # --------------------------------------------------
+    def get(self, company_id: str, data_version, question: str) -> tuple[dict | None, str | None]:
+        """
+        (response, "exact" | "semantic") on a hit, (None, None) on a miss.
+        May embed the question (blocking): call off the event loop.
+        """
+        t0 = time.perf_counter()
+        key = self.key(company_id, data_version, question)
+
+        kind = "exact"
+        entry = self._entries.get(key)
+
+        if entry is None and self.semantic_threshold > 0:
+            kind = "semantic"
+            entry = self._semantic_get(company_id, data_version, question)
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        response, compute_ms = entry
+        lookup_ms = (time.perf_counter() - t0) * 1000
+
+        with self._lock:
+            if kind == "exact":
+                self.exact_hits += 1
+            else:
+                self.semantic_hits += 1
+            self.saved_ms += max(0, int(compute_ms - lookup_ms))
+
+        # Responses are mutated downstream (debug timings)
+        return copy.deepcopy(response), kind
+
+    def _semantic_get(self, company_id: str, data_version, question: str):
+        with self._lock:
+            version, vectors = self._vectors.get(company_id, (None, None))
+            if version != data_version or not vectors:
+                return None
+            keys = list(vectors)
+            matrix = np.stack(list(vectors.values()))
+
+        query = self._unit(self._embed(question))
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+
+        if scores[best] < self.semantic_threshold:
+            return None
+
+        entry = self._entries.get(keys[best])
+        if entry is None:
+            # Evicted / expired: forget its vector too
+            with self._lock:
+                vectors.pop(keys[best], None)
+        return entry
+
+    # --------------------------------------------------
+    # Store / invalidate
+    # --------------------------------------------------
+    def set(self, company_id: str, data_version, question: str, response: dict, compute_ms: float):
+        key = self.key(company_id, data_version, question)
+        self._entries.set(key, (copy.deepcopy(response), compute_ms))
+
+        if self.semantic_threshold <= 0:
+            return
+
+        vector = self._unit(self._embed(question))
+        with self._lock:
+            version, vectors = self._vectors.get(company_id, (None, None))
+            if version != data_version:
+                # Older versions are never read again
+                vectors = OrderedDict()
+                self._vectors[company_id] = (data_version, vectors)
+            vectors[key] = vector
+            vectors.move_to_end(key)
+            while len(vectors) > self._entries.maxsize:
+                vectors.popitem(last=False)
+
+    def invalidate_company(self, company_id: str) -> int:
+        dropped = self._entries.pop_where(lambda k: k[1] == company_id)
+        with self._lock:
+            self._vectors.pop(company_id, None)
+        if dropped:
+            logger.info("Answer cache invalidated | company_id=%s | entries=%s", company_id, dropped)
+        return dropped
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": ANSWER_CACHE_ENABLED,
+                "size": len(self._entries),
+                "maxsize": self._entries.maxsize,
+                "ttl_seconds": self._entries.ttl_seconds,
+                "evictions": self._entries.evictions,
+                "semantic_threshold": self.semantic_threshold or None,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else None,
+                "saved_ms": self.saved_ms,
+            }
+
+
+# ------------------------------------------------------------
+# Process-wide cache
+# ------------------------------------------------------------
+_answer_cache = AnswerCache()
+
+
+def get_answer_cache() -> AnswerCache | None:
+    """
+    None when ANSWER_CACHE_ENABLED=0.
+    """
+    return _answer_cache if ANSWER_CACHE_ENABLED else None
+
+
+def invalidate_company_answers(company_id: str):
+    _answer_cache.invalidate_company(company_id)
+
+
+def get_answer_cache_stats() -> dict:
+    return _answer_cache.stats()
@@ -0,0 +1,49 @@
+"""
+Shared pieces of the pluggable caches (presentation_cache, intent_cache).
+
+- CacheBackend: the backend interface (get() returns None on miss)
+- HitCounter: thread-safe hit / miss counters for backends that do not
+  sit on an LRUCache (which counts for itself); backends are called from
+  threadpool workers
+"""
+
+import threading
+from abc import ABC, abstractmethod
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str):
+        """
+        Cached value, or None on a miss.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class HitCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,234 @@
+"""
+Presentation-intent cache (validated planner LLM outputs).
+
+The planner prompt is deterministic (system prompt + allowed KPIs +
+question + summary texts), so the same prompt on the same model yields
+the same plan. Keys are sha256(model, prompt); values are the
+PresentationIntent JSON. The caller stores only plans that parsed AND
+passed check_planned_kpis (non-empty, allowed KPIs only) — failed or
+off-contract generations are retried next time, never cached (an
+off-contract plan is still used for the current answer).
+
+Backends (INTENT_CACHE_BACKEND):
+- "sqlite" (default): local file (INTENT_CACHE_PATH), survives restarts,
+  shared by the workers of one host; an in-process LRU sits in front.
+  Falls back to "memory" (logged) when the file cannot be opened
+- "memory": in-process LRU only
+- "off": no caching
+
+Entries expire after INTENT_CACHE_TTL seconds; the sqlite file keeps at
+most INTENT_CACHE_MAX_ENTRIES rows (oldest pruned first).
+
+Calls block (sqlite I/O): run them off the event loop.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app.cache.backend import CacheBackend, HitCounter
+from app.cache.lru_cache import LRUCache
+from app.presentation.presentation_schema import PresentationIntent
+
+logger = logging.getLogger("cache.presentation_intents")
+
+
+INTENT_CACHE_BACKEND = os.getenv("INTENT_CACHE_BACKEND", "sqlite")
+INTENT_CACHE_PATH = os.path.expanduser(
+    os.getenv("INTENT_CACHE_PATH", "~/.cache/ai-cfo/presentation_intents.sqlite3")
+)
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "512"))
+INTENT_CACHE_TTL = float(os.getenv("INTENT_CACHE_TTL", str(7 * 86400)))
+INTENT_CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "20000"))
+
+# Prune the sqlite file every N writes
+PRUNE_EVERY = 200
+
+
+def intent_fingerprint(prompt: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class MemoryIntentCache(CacheBackend):
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._cache = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+    def get(self, key: str) -> PresentationIntent | None:
+        raw = self._cache.get(key)
+        # Fresh object per caller: the hard guarantees mutate it
+        return PresentationIntent.model_validate_json(raw) if raw else None
+
+    def set(self, key: str, intent: PresentationIntent):
+        self._cache.set(key, intent.model_dump_json())
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class SqliteIntentCache(CacheBackend):
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int, memory_size: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._memory = LRUCache(maxsize=memory_size, ttl_seconds=ttl_seconds)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("pragma journal_mode=wal;")
+                self._conn.execute(
+                    """
+                    create table if not exists presentation_intents (
+                        key text primary key,
+                        intent text not null,
+                        created_at real not null
+                    );
+                    """
+                )
+                self._conn.execute(
+                    "create index if not exists presentation_intents_created_at_idx "
+                    "on presentation_intents (created_at);"
+                )
+        except sqlite3.Error:
+            self._conn.close()
+            raise
+
+        self._counter = HitCounter()
+        self._writes = 0
+        self._prune()
+
+    def get(self, key: str) -> PresentationIntent | None:
+        raw = self._memory.get(key)
+
+        if raw is None:
+            try:
+                with self._lock:
+                    row = self._conn.execute(
+                        "select intent from presentation_intents "
+                        "where key = ? and created_at > ?;",
+                        (key, time.time() - self._ttl),
+                    ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Intent cache read failed: %s", e)
+                row = None
+
+            if row is None:
+                self._counter.record(False)
+                return None
+            raw = row[0]
+            self._memory.set(key, raw)
+
+        self._counter.record(True)
+        return PresentationIntent.model_validate_json(raw)
+
+    def set(self, key: str, intent: PresentationIntent):
+        raw = intent.model_dump_json()
+        self._memory.set(key, raw)
+
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "insert or replace into presentation_intents (key, intent, created_at) "
+                    "values (?, ?, ?);",
+                    (key, raw, time.time()),
+                )
+                self._writes += 1
+                prune = self._writes % PRUNE_EVERY == 0
+        except sqlite3.Error as e:
+            logger.warning("Intent cache write failed: %s", e)
+            return
+
+        if prune:
+            self._prune()
+
+    def _prune(self):
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "delete from presentation_intents where created_at <= ?;",
+                    (time.time() - self._ttl,),
+                )
+                self._conn.execute(
+                    """
+                    delete from presentation_intents
+                    where key in (
+                        select key from presentation_intents
+                        order by created_at desc
+                        limit -1 offset ?
+                    );
+                    """,
+                    (self._max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Intent cache prune failed: %s", e)
+
+    def stats(self) -> dict:
+        try:
+            with self._lock:
+                size = self._conn.execute(
+                    "select count(*) from presentation_intents;"
+                ).fetchone()[0]
+        except sqlite3.Error:
+            size = None
+
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "size": size,
+            "max_entries": self._max_entries,
+            **self._counter.stats(),
+            "memory": self._memory.stats(),
+        }
+
+
+# ------------------------------------------------------------
+# Process-wide backend
+# ------------------------------------------------------------
+_backend: CacheBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_intent_cache() -> CacheBackend | None:
+    """
+    None when INTENT_CACHE_BACKEND=off.
+    """
+    global _backend
+    if INTENT_CACHE_BACKEND == "off":
+        return None
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if INTENT_CACHE_BACKEND == "sqlite":
+                    try:
+                        _backend = SqliteIntentCache(
+                            INTENT_CACHE_PATH,
+                            INTENT_CACHE_TTL,
+                            INTENT_CACHE_MAX_ENTRIES,
+                            INTENT_CACHE_SIZE,
+                        )
+                    except (OSError, sqlite3.Error) as e:
+                        # e.g. read-only home in a container: keep serving
+                        logger.warning(
+                            "Intent cache file unusable (%s: %s), using memory backend",
+                            INTENT_CACHE_PATH, e,
+                        )
+                        _backend = MemoryIntentCache(INTENT_CACHE_SIZE, INTENT_CACHE_TTL)
+                elif INTENT_CACHE_BACKEND == "memory":
+                    _backend = MemoryIntentCache(INTENT_CACHE_SIZE, INTENT_CACHE_TTL)
+                else:
+                    raise ValueError(
+                        f"Unsupported INTENT_CACHE_BACKEND: {INTENT_CACHE_BACKEND}"
+                    )
+    return _backend
+
+
+def get_intent_cache_stats() -> dict:
+    cache = get_intent_cache()
+    return cache.stats() if cache is not None else {"backend": "off"}
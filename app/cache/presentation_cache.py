@@ -0,0 +1,132 @@
+"""
+Presentation cache (baseline dashboards and other rendered payloads).
+
+Keys embed the company's data_version, so entries never need explicit
+invalidation: an ingestion bumps the version and old keys stop being read.
+
+Backends (PRESENTATION_CACHE_BACKEND):
+- "memory" (default): in-process LRU, per worker
+- "redis": shared across workers / hosts (PRESENTATION_CACHE_REDIS_URL),
+  needs the optional `redis` package
+
+Values must be JSON-serializable (after FastAPI's jsonable_encoder) for
+shared backends. Callers always get a private copy.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+
+from fastapi.encoders import jsonable_encoder
+
+from app.cache.backend import CacheBackend, HitCounter
+from app.cache.lru_cache import LRUCache
+
+logger = logging.getLogger("cache.presentation")
+
+
+PRESENTATION_CACHE_BACKEND = os.getenv("PRESENTATION_CACHE_BACKEND", "memory")
+PRESENTATION_CACHE_SIZE = int(os.getenv("PRESENTATION_CACHE_SIZE", "256"))
+PRESENTATION_CACHE_TTL = float(os.getenv("PRESENTATION_CACHE_TTL", "86400"))
+PRESENTATION_CACHE_REDIS_URL = os.getenv(
+    "PRESENTATION_CACHE_REDIS_URL", "redis://localhost:6379/0"
+)
+
+
+class MemoryPresentationCache(CacheBackend):
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._cache = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+
+    def get(self, key: str):
+        value = self._cache.get(key)
+        # Presentations are mutated downstream (rebalance / dedupe)
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, key: str, value):
+        self._cache.set(key, copy.deepcopy(value))
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisPresentationCache(CacheBackend):
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "presentation:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "PRESENTATION_CACHE_BACKEND=redis requires the 'redis' package"
+            ) from e
+
+        self._client = redis.Redis.from_url(url)
+        self._ttl = int(ttl_seconds)
+        self._prefix = prefix
+        self._counter = HitCounter()
+
+    def get(self, key: str):
+        try:
+            raw = self._client.get(self._prefix + key)
+        except Exception as e:
+            logger.warning("Presentation cache read failed: %s", e)
+            return None
+
+        self._counter.record(raw is not None)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value):
+        try:
+            self._client.set(
+                self._prefix + key,
+                json.dumps(jsonable_encoder(value)),
+                ex=self._ttl,
+            )
+        except Exception as e:
+            logger.warning("Presentation cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", **self._counter.stats()}
+
+
+# ------------------------------------------------------------
+# Process-wide backend
+# ------------------------------------------------------------
+_backend: CacheBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_presentation_cache() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if PRESENTATION_CACHE_BACKEND == "redis":
+                    _backend = RedisPresentationCache(
+                        PRESENTATION_CACHE_REDIS_URL,
+                        PRESENTATION_CACHE_TTL,
+                    )
+                elif PRESENTATION_CACHE_BACKEND == "memory":
+                    _backend = MemoryPresentationCache(
+                        PRESENTATION_CACHE_SIZE,
+                        PRESENTATION_CACHE_TTL,
+                    )
+                else:
+                    raise ValueError(
+                        f"Unsupported PRESENTATION_CACHE_BACKEND: "
+                        f"{PRESENTATION_CACHE_BACKEND}"
+                    )
+    return _backend
+
+
+def set_presentation_cache(backend: CacheBackend):
+    """
+    Plug in a custom shared backend (call at startup).
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def get_presentation_cache_stats() -> dict:
+    return get_presentation_cache().stats()
@@ -1,11 +1,329 @@
+"""
+Process-wide PostgreSQL connection pool.
+
+Every module borrows connections from here instead of calling
+psycopg2.connect() itself.
+
+- Bounded: at most DB_POOL_MAX_SIZE connections per process
+- Checkout waits up to DB_POOL_CHECKOUT_TIMEOUT seconds, then raises PoolTimeoutError
+- Connections idle longer than DB_POOL_HEALTH_CHECK_AFTER seconds are
+  health-checked (SELECT 1) before reuse; dead ones are replaced
+- conn.close() RETURNS the connection to the pool (open transactions are rolled back)
+
+Sizing:
+- Each uvicorn worker is its own process with its own pool
+- Sync endpoints and asyncio.to_thread work share AnyIO's threadpool
+  (40 threads per worker), so a worker never needs more than 40 connections
+- All workers together must stay below the server's max_connections
+
+Default DB_POOL_MAX_SIZE = min(40, (DB_MAX_CONNECTIONS - 10) // WEB_CONCURRENCY)
+"""
+
+import logging
 import os
+import threading
+import time
+import weakref
+from collections import deque
+
 import psycopg2
+import psycopg2.extensions
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+logger = logging.getLogger("db.pool")
+
+
+# ------------------------------------------------------------
+# Pool configuration
+# ------------------------------------------------------------
+THREADPOOL_SIZE = 40            # AnyIO default thread limiter per worker
+RESERVED_CONNECTIONS = 10       # migrations, psql, admin tooling
+
+
+def _default_max_size() -> int:
+    server_max = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    per_worker = (server_max - RESERVED_CONNECTIONS) // workers
+    return max(2, min(THREADPOOL_SIZE, per_worker))
+
+
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE") or _default_max_size())
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "10"))
+DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30"))
+
+
+class PoolTimeoutError(RuntimeError):
+    """No connection became available within the checkout timeout."""
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """
+    psycopg2 connection that returns itself to its pool on close().
+    """
+
+    _owner = None       # pool this connection belongs to
+    _pool = None        # pool it is currently checked out from
+    _finalizer = None
+    _last_used = 0.0
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.putconn(self)
+        elif self._owner is None:
+            super().close()
+        # else: already returned to its pool, nothing to do
+
+    def _close_physical(self):
+        self._owner = None
+        self._pool = None
+        if not self.closed:
+            super().close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of PooledConnection objects.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        max_size: int,
+        checkout_timeout: float,
+        health_check_after: float,
+    ):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0          # idle + checked out
+        self._in_use = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "leaked": 0,
+        }
+
+    # --------------------------------------------------------
+    # Checkout
+    # --------------------------------------------------------
+    def getconn(self, timeout: float | None = None) -> PooledConnection:
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn = self._reserve(deadline)
+
+            if conn is None:
+                conn = self._connect()
+            elif not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            return self._check_out(conn)
+
+    def _reserve(self, deadline: float):
+        """
+        Pop an idle connection, or reserve a slot for a new one (returns None).
+        """
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+
+                if self._idle:
+                    return self._idle.pop()
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available within "
+                        f"{self.checkout_timeout}s (max_size={self.max_size})"
+                    )
+
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+
+                self._cond.wait(remaining)
+
+    def _connect(self) -> PooledConnection:
+        try:
+            conn = psycopg2.connect(self.dsn, connection_factory=PooledConnection)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        conn._owner = self
+        with self._cond:
+            self._stats["created"] += 1
+        return conn
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        if conn.closed:
+            return False
+
+        if time.monotonic() - conn._last_used < self.health_check_after:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            logger.warning("Discarding unhealthy pooled connection")
+            return False
+
+    def _check_out(self, conn: PooledConnection) -> PooledConnection:
+        conn._pool = self
+        # Safety net: a borrowed connection that is garbage-collected
+        # without close() must still give its slot back.
+        conn._finalizer = weakref.finalize(conn, self._release_leaked_slot)
+
+        with self._cond:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+
+        return conn
+
+    # --------------------------------------------------------
+    # Return
+    # --------------------------------------------------------
+    def putconn(self, conn: PooledConnection):
+        if conn._pool is not self:
+            return  # already returned
+
+        conn._pool = None
+        conn._finalizer.detach()
+
+        reusable = not conn.closed and not self._closed
+        if reusable:
+            try:
+                if (
+                    conn.get_transaction_status()
+                    != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+                ):
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                conn._last_used = time.monotonic()
+                self._idle.append(conn)
+            else:
+                self._size -= 1
+                self._stats["discarded"] += 1
+            self._cond.notify()
+
+        if not reusable:
+            conn._close_physical()
+
+    def _discard(self, conn: PooledConnection):
+        conn._close_physical()
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def _release_leaked_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._in_use -= 1
+            self._stats["leaked"] += 1
+            self._cond.notify()
+        logger.warning("Pooled connection was garbage-collected without close()")
+
+    # --------------------------------------------------------
+    # Lifecycle + metrics
+    # --------------------------------------------------------
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn in idle:
+            conn._close_physical()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                **self._stats,
+            }
+
+
+# ------------------------------------------------------------
+# Process-wide singleton (re-created after fork)
+# ------------------------------------------------------------
+_pool: ConnectionPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool(
+                    dsn=DATABASE_URL,
+                    max_size=DB_POOL_MAX_SIZE,
+                    checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT,
+                    health_check_after=DB_POOL_HEALTH_CHECK_AFTER,
+                )
+                _pool_pid = pid
+    return _pool
+
 
 def get_db_connection():
-    return psycopg2.connect(DATABASE_URL)
+    """
+    Borrow a connection from the process-wide pool.
+
+    conn.close() returns it to the pool.
+    """
+    return _get_pool().getconn()
+
+
+def get_pool_stats() -> dict:
+    return _get_pool().stats()
+
+
+def close_db_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
@@ -0,0 +1,85 @@
+"""
+Benchmark: summary embedding throughput by batch size (CPU).
+
+Usage:
+    python -m app.dev.bench_embeddings [--summaries 512] [--batch-sizes 1 32 128]
+
+No database access (embedding cache bypassed). Texts mimic monthly KPI
+context summaries.
+"""
+
+import os
+
+# Force CPU before the model is loaded
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import argparse
+import calendar
+import time
+
+from app.embeddings.generate_embedding import generate_embeddings, _get_model
+
+
+TEMPLATES = [
+    "Revenue context (monthly): Revenue {direction}. Recent performance {trend}. Period: {month} {year}.",
+    "EBITDA context (monthly): EBITDA {direction}. Recent performance {trend}. Period: {month} {year}.",
+    "Cash balance context (monthly): Cash balance {direction}. Recent performance {trend}. Period: {month} {year}.",
+]
+DIRECTIONS = [
+    "increased compared to the previous period",
+    "declined compared to the previous period",
+    "remained relatively stable compared to the previous period",
+]
+TRENDS = [
+    "shows a short-term improving trend",
+    "shows a short-term declining trend",
+    "shows moderate short-term volatility",
+]
+
+
+def _summaries(n: int) -> list[str]:
+    texts = []
+    for i in range(n):
+        texts.append(
+            TEMPLATES[i % 3].format(
+                direction=DIRECTIONS[i % 3],
+                trend=TRENDS[(i // 3) % 3],
+                month=calendar.month_name[i % 12 + 1],
+                year=2020 + i // 12,
+            )
+        )
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--summaries", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 128])
+    args = parser.parse_args()
+
+    texts = _summaries(args.summaries)
+
+    # Load + warm up the model outside the timed region
+    _get_model()
+    generate_embeddings(texts[:8], use_cache=False)
+
+    print(f"{len(texts)} summaries, device=cpu")
+    for batch_size in args.batch_sizes:
+        t0 = time.perf_counter()
+
+        if batch_size == 1:
+            # Old path: one encode call per summary
+            for text in texts:
+                generate_embeddings([text], batch_size=1, use_cache=False)
+        else:
+            generate_embeddings(texts, batch_size=batch_size, use_cache=False)
+
+        seconds = time.perf_counter() - t0
+        print(
+            f"batch_size={batch_size:>4}: {seconds:7.2f} s "
+            f"({len(texts) / seconds:8.1f} summaries/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: row-by-row fact inserts vs COPY-based bulk load.
+
+Usage:
+    python -m app.dev.bench_fact_loader --company-id <uuid> [--months 36] [--metrics 40]
+
+Both paths run against DATABASE_URL inside transactions that are
+ROLLED BACK, so nothing is persisted.
+"""
+
+import argparse
+import os
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from dotenv import load_dotenv
+
+from app.ingestion.bulk_fact_loader import build_fact_batch, bulk_load_facts
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+def _synthetic_frame(metric_keys: list[str], months: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    frame = {
+        "period_date": [
+            date(2020 + m // 12, m % 12 + 1, 1) for m in range(months)
+        ]
+    }
+    for key in metric_keys:
+        frame[key] = rng.uniform(1_000, 1_000_000, size=months).round(2)
+    return pd.DataFrame(frame)
+
+
+def _create_periods(cur, company_id: str, period_dates) -> list:
+    period_ids = []
+    for d in period_dates:
+        cur.execute(
+            """
+            INSERT INTO financial_periods (
+                company_id, period_start, period_end, period_type, fiscal_year
+            )
+            VALUES (%s, %s, %s, 'month', %s)
+            RETURNING id;
+            """,
+            (company_id, d, d, d.year),
+        )
+        period_ids.append(cur.fetchone()[0])
+    return period_ids
+
+
+def _row_by_row(cur, df, company_id, period_ids):
+    for period_id, (_, row) in zip(period_ids, df.iterrows()):
+        for col, value in row.items():
+            if col == "period_date":
+                continue
+            cur.execute(
+                "SELECT id FROM metric_definitions WHERE metric_key = %s;",
+                (col,),
+            )
+            res = cur.fetchone()
+            if not res:
+                continue
+            cur.execute(
+                """
+                INSERT INTO financial_facts (
+                    company_id, period_id, metric_id, value, source_system
+                )
+                VALUES (%s, %s, %s, %s, 'benchmark')
+                ON CONFLICT DO NOTHING;
+                """,
+                (company_id, period_id, res[0], value),
+            )
+
+
+def _bulk(cur, df, company_id, period_ids, metric_ids):
+    batch = build_fact_batch(df, period_ids, metric_ids)
+    bulk_load_facts(
+        cur=cur,
+        batch=batch,
+        company_id=company_id,
+        source_system="benchmark",
+        source_document_id=None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--company-id", required=True)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--metrics", type=int, default=40)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    cur.execute(
+        "SELECT metric_key, id FROM metric_definitions ORDER BY metric_key LIMIT %s;",
+        (args.metrics,),
+    )
+    metric_ids = dict(cur.fetchall())
+    df = _synthetic_frame(list(metric_ids), args.months)
+    cells = len(df) * len(metric_ids)
+
+    results = {}
+    for name in ("row_by_row", "bulk_copy"):
+        period_ids = _create_periods(cur, args.company_id, df["period_date"])
+
+        t0 = time.perf_counter()
+        if name == "row_by_row":
+            _row_by_row(cur, df, args.company_id, period_ids)
+        else:
+            _bulk(cur, df, args.company_id, period_ids, metric_ids)
+        results[name] = time.perf_counter() - t0
+
+        conn.rollback()
+
+    cur.close()
+    conn.close()
+
+    print(f"{args.months} months × {len(metric_ids)} metrics = {cells} facts")
+    for name, seconds in results.items():
+        print(
+            f"{name:>12}: {seconds * 1000:9.1f} ms "
+            f"({cells / seconds:,.0f} facts/s)"
+        )
+    print(f"     speedup: {results['row_by_row'] / results['bulk_copy']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
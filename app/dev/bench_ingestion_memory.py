@@ -0,0 +1,112 @@
+"""
+Benchmark: peak memory of whole-file vs chunked parsing (no database).
+
+Usage:
+    python -m app.dev.bench_ingestion_memory [--rows 300000] [--metrics 20]
+        [--chunk-rows 50000] [--file /tmp/ledger.csv]
+
+Each mode runs in its own subprocess and reports its peak RSS growth
+(ru_maxrss after parsing + building fact batches, minus after imports):
+
+- whole:   pd.read_csv of the full file, one fact batch
+- chunked: iter_file_chunks(), one fact batch per chunk (ingestion path)
+
+Chunked peak stays roughly flat as --rows grows; whole grows linearly.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from app.ingestion.bulk_fact_loader import build_fact_batch
+from app.ingestion.chunked_reader import iter_file_chunks
+
+
+def _peak_rss_mb() -> float:
+    # Linux reports KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_ledger_csv(path: str, rows: int, metrics: int):
+    rng = np.random.default_rng(42)
+    block = 50_000
+    with open(path, "w") as out:
+        for start in range(0, rows, block):
+            n = min(block, rows - start)
+            frame = {"date": pd.date_range("2000-01-01", periods=n, freq="D").date}
+            for m in range(metrics):
+                frame[f"metric_{m}"] = rng.uniform(0, 1e6, size=n).round(2)
+            pd.DataFrame(frame).to_csv(out, header=start == 0, index=False)
+
+
+def _run(mode: str, path: str, chunk_rows: int):
+    metric_ids = {f"metric_{m}": f"id-{m}" for m in range(1000)}
+    baseline = _peak_rss_mb()
+    facts = 0
+
+    if mode == "whole":
+        chunks = [pd.read_csv(path)]
+    else:
+        chunks = iter_file_chunks(path, chunk_rows)
+
+    for df in chunks:
+        df = df.rename(columns={"date": "period_date"})
+        batch = build_fact_batch(df, ["period"] * len(df), metric_ids)
+        facts += len(batch)
+        del batch, df
+
+    print(f"{mode:>8}: {facts:>10,} facts  peak +{_peak_rss_mb() - baseline:8.1f} MB")
+
+
+def measure_peak_rss_mb(mode: str, path: str, chunk_rows: int) -> float:
+    """
+    Peak RSS growth (MB) of one mode, in a fresh subprocess.
+    """
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "app.dev.bench_ingestion_memory",
+            "--run", mode,
+            "--file", path,
+            "--chunk-rows", str(chunk_rows),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    line = result.stdout.strip().splitlines()[-1]
+    print(line)
+    return float(line.split("peak +")[1].split()[0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--metrics", type=int, default=20)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--file")
+    parser.add_argument("--run", choices=["whole", "chunked"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        _run(args.run, args.file, args.chunk_rows)
+        return
+
+    path = args.file or os.path.join(tempfile.gettempdir(), "bench_ledger.csv")
+    if not os.path.exists(path):
+        write_ledger_csv(path, args.rows, args.metrics)
+
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"{path}: {size_mb:.1f} MB, chunk_rows={args.chunk_rows}")
+
+    for mode in ("whole", "chunked"):
+        measure_peak_rss_mb(mode, path, args.chunk_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: per-metric fact queries (N+1) vs one batched query.
+
+Usage:
+    python -m app.dev.bench_metric_fetch --company-id <uuid>
+        [--roots revenue gross_margin cash_balance] [--repeat 20]
+
+Fetches every metric of the KPI hierarchy build_presentation() would
+render for the given roots. Read-only.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.db.connection import get_db_connection
+from app.metrics.dependency_graph import load_metric_dependency_graph
+from app.metrics.kpi_hierarchy import build_kpi_hierarchy
+from app.presentation.fetch_metric_rows import (
+    fetch_metric_rows_from_facts,
+    fetch_metric_series_batch,
+)
+
+
+def _n_plus_one(conn, company_id, metrics):
+    return {
+        metric: fetch_metric_rows_from_facts(
+            conn=conn, company_id=company_id, metric_key=metric
+        )
+        for metric in metrics
+    }
+
+
+def _batched(conn, company_id, metrics):
+    return fetch_metric_series_batch(
+        conn=conn, company_id=company_id, metric_keys=metrics
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--company-id", required=True)
+    parser.add_argument(
+        "--roots", nargs="+", default=["revenue", "gross_margin", "cash_balance"]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        hierarchy = build_kpi_hierarchy(
+            root_kpis=args.roots,
+            dependency_graph=load_metric_dependency_graph(conn),
+            max_depth=2,
+        )
+        metrics = [m for section in hierarchy.values() for m in section]
+
+        # Same data either way
+        rows = _n_plus_one(conn, args.company_id, metrics)
+        series = _batched(conn, args.company_id, metrics)
+        for metric in metrics:
+            expected = [(r["period_label"], r["value"]) for r in rows[metric]]
+            got = (
+                list(zip(series[metric].period_labels, series[metric].values))
+                if metric in series else []
+            )
+            assert got == expected, f"Mismatch for {metric}"
+
+        print(
+            f"{len(metrics)} metrics, "
+            f"{sum(len(s) for s in series.values())} fact rows"
+        )
+
+        for name, fetch in (("n_plus_one", _n_plus_one), ("batched", _batched)):
+            latencies = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                fetch(conn, args.company_id, metrics)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                conn.rollback()
+
+            print(
+                f"{name:>11}: p50={np.percentile(latencies, 50):7.2f} ms  "
+                f"p95={np.percentile(latencies, 95):7.2f} ms"
+            )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
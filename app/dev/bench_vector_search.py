@@ -0,0 +1,168 @@
+"""
+Benchmark: ANN vector search vs exact search on summary_embeddings.
+
+Usage:
+    python -m app.dev.bench_vector_search [--company-id <uuid>] [--queries 200]
+        [--k 5] [--ef-search 16 40 64 128] [--probes 1 5 10 20]
+        [--iterative-scan off relaxed_order]
+
+- Runs the production query (NEAREST_SUMMARIES_SQL: company filter +
+  ORDER BY <-> LIMIT k), without retrieval's exact-scan fallback, so
+  filtering losses show up
+- Queries are stored embeddings with small gaussian noise (no model
+  needed), each searched within ITS OWN company; --company-id samples
+  one tenant only (benchmark small tenants this way)
+- Ground truth = same query with index scans disabled
+- Reports recall@k, short results (fewer rows than the exact search)
+  and p50 / p95 latency per search setting
+
+Read-only: every query runs in a transaction that is rolled back.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.db.connection import get_db_connection
+from app.retrieval.vector_index import (
+    ITERATIVE_SCAN_MODES,
+    NEAREST_SUMMARIES_SQL,
+    apply_search_settings,
+    force_exact_search,
+    get_vector_index_status,
+    iterative_scan_supported,
+)
+
+
+def _sample_queries(cur, company_id, n: int, noise: float) -> list[tuple]:
+    """
+    [(company_id, embedding)]
+    """
+    if company_id:
+        cur.execute(
+            """
+            select company_id, embedding::real[]
+            from summary_embeddings
+            where company_id = %s
+            order by random()
+            limit %s;
+            """,
+            (company_id, n),
+        )
+    else:
+        cur.execute(
+            """
+            select company_id, embedding::real[]
+            from summary_embeddings
+            order by random()
+            limit %s;
+            """,
+            (n,),
+        )
+    rng = np.random.default_rng(42)
+
+    queries = []
+    for query_company_id, embedding in cur.fetchall():
+        vec = np.asarray(embedding, dtype=np.float32)
+        vec = vec + rng.normal(0, noise, size=vec.shape).astype(np.float32)
+        queries.append((query_company_id, (vec / np.linalg.norm(vec)).tolist()))
+    return queries
+
+
+def _search(cur, company_id, embedding, k: int) -> list:
+    cur.execute(
+        NEAREST_SUMMARIES_SQL,
+        {"company_id": company_id, "embedding": embedding, "top_k": k},
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _run(conn, queries, k, configure) -> tuple[list, list]:
+    results, latencies = [], []
+    with conn.cursor() as cur:
+        for company_id, embedding in queries:
+            configure(cur)
+            t0 = time.perf_counter()
+            results.append(_search(cur, company_id, embedding, k))
+            latencies.append((time.perf_counter() - t0) * 1000)
+            conn.rollback()
+    return results, latencies
+
+
+def _report(label, results, exact, latencies):
+    recalls = [
+        len(set(got) & set(truth)) / len(truth)
+        for got, truth in zip(results, exact)
+        if truth
+    ]
+    short = sum(len(got) < len(truth) for got, truth in zip(results, exact))
+    print(
+        f"{label:>36}: recall@k={np.mean(recalls):.3f}  short={short:4d}  "
+        f"p50={np.percentile(latencies, 50):7.2f} ms  "
+        f"p95={np.percentile(latencies, 95):7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--company-id")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 40, 64, 128])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument(
+        "--iterative-scan", nargs="+", default=list(ITERATIVE_SCAN_MODES),
+        choices=ITERATIVE_SCAN_MODES,
+    )
+    args = parser.parse_args()
+
+    status = get_vector_index_status()
+    methods = {i["method"] for i in status["indexes"] if i["valid"]}
+    print(f"{status['rows']} embeddings, indexes: {sorted(methods) or 'none'}")
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            queries = _sample_queries(cur, args.company_id, args.queries, args.noise)
+            iterative_modes = (
+                args.iterative_scan if iterative_scan_supported(cur) else ["off"]
+            )
+        conn.rollback()
+
+        if not queries:
+            print("No embeddings to query")
+            return
+
+        exact, latencies = _run(conn, queries, args.k, force_exact_search)
+        companies = len({company_id for company_id, _ in queries})
+        print(f"{len(queries)} queries over {companies} company(ies), k={args.k}")
+        _report("exact", exact, exact, latencies)
+
+        for mode in iterative_modes:
+            if "hnsw" in methods:
+                for ef in args.ef_search:
+                    results, latencies = _run(
+                        conn, queries, args.k,
+                        lambda cur, ef=ef, mode=mode: apply_search_settings(
+                            cur, ef_search=ef, iterative_scan=mode
+                        ),
+                    )
+                    _report(f"hnsw ef_search={ef} iterative={mode}", results, exact, latencies)
+
+            if "ivfflat" in methods:
+                for probes in args.probes:
+                    results, latencies = _run(
+                        conn, queries, args.k,
+                        lambda cur, probes=probes, mode=mode: apply_search_settings(
+                            cur, probes=probes, iterative_scan=mode
+                        ),
+                    )
+                    _report(f"ivfflat probes={probes} iterative={mode}", results, exact, latencies)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
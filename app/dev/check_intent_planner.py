@@ -0,0 +1,85 @@
+"""
+Check the rule-based presentation-intent planner on typical questions.
+
+Usage:
+    python -m app.dev.check_intent_planner
+
+For each question: the planner's confidence must land on the expected
+side of PLANNER_CONFIDENCE_THRESHOLD (fast path vs LLM), and fast-path
+plans must carry the expected per-KPI intents.
+"""
+
+import sys
+
+from app.presentation.intent_planner import (
+    PLANNER_CONFIDENCE_THRESHOLD,
+    plan_presentation_intent,
+)
+
+PNL_EVIDENCE = [{"content": (
+    "P&L summary\n"
+    "- Revenue: 1200000\n"
+    "- COGS: 400000\n"
+    "- Gross Margin: 0.66\n"
+    "- Net Profit: 150000\n"
+)}]
+CASH_EVIDENCE = [{"content": (
+    "Cash flow summary\n"
+    "- Cash Balance: 900000\n"
+    "- Burn Rate: 80000\n"
+    "- Runway: 11\n"
+)}]
+
+# question, evidence, statements, seed KPIs, expected kpi_intents (None → LLM)
+CASES = [
+    ("How is revenue?", PNL_EVIDENCE, ["pnl"], ["revenue"],
+     {"revenue": "trend"}),
+    ("Compare net profit vs last quarter", PNL_EVIDENCE, ["pnl"], ["net_profit"],
+     {"net_profit": "comparison"}),
+    ("What is our current cash balance?", CASH_EVIDENCE, ["cash_flow"], ["cash_balance"],
+     {"cash_balance": "snapshot"}),
+    ("How are revenue and gross margin trending?", PNL_EVIDENCE, ["pnl"],
+     ["revenue", "gross_margin"],
+     {"revenue": "trend", "gross_margin": "comparison"}),
+    ("Show the revenue variance against budget", PNL_EVIDENCE, ["pnl"], ["revenue"],
+     {"revenue": "variance"}),
+    ("Revenue vs budget", PNL_EVIDENCE, ["pnl"], ["revenue"],
+     {"revenue": "variance"}),
+    ("Give a CEO-level overview of our financial situation", PNL_EVIDENCE, ["pnl"], [],
+     None),
+    ("Give me a revenue overview", PNL_EVIDENCE, ["pnl"], ["revenue"],
+     None),
+    ("How is healthcare revenue?", PNL_EVIDENCE, ["pnl"], ["revenue"],  # not "health"
+     {"revenue": "trend"}),
+    ("How is ebitda?", PNL_EVIDENCE, ["pnl"], ["ebitda"],             # not in evidence
+     None),
+    ("Compare the revenue mix vs budget", PNL_EVIDENCE, ["pnl"], ["revenue"],
+     None),                                                          # conflicting wording
+]
+
+
+def main():
+    failed = 0
+
+    for question, evidence, statements, seeds, expected in CASES:
+        planned = plan_presentation_intent(question, evidence, statements, seeds)
+        fast_path = planned.confidence >= PLANNER_CONFIDENCE_THRESHOLD
+
+        kpi_intents = {k: v.value for k, v in planned.intent.kpi_intents.items()}
+        ok = fast_path == (expected is not None) and (
+            expected is None or kpi_intents == expected
+        )
+        failed += not ok
+
+        print(
+            f"{'ok  ' if ok else 'FAIL'} {question!r}: "
+            f"confidence={planned.confidence} "
+            f"{kpi_intents if fast_path else 'LLM'}  {planned.reasons}"
+        )
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Shared embedding cache keyed by (content_hash, model_name).
+
+Two tiers:
+- In-process LRU (EMBEDDING_CACHE_SIZE entries, float32 vectors)
+- public.embedding_cache table, shared by every worker / process
+
+Identical text (e.g. template summaries repeated across companies, or a
+summary re-upserted with unchanged content) is encoded by MiniLM once.
+
+content_hash = sha256 hex of the UTF-8 text, i.e. the same value as
+encode(sha256(convert_to(content, 'UTF8')), 'hex') in PostgreSQL.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Dict, Iterable, List
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from app.cache.lru_cache import LRUCache
+from app.db.connection import get_db_connection
+
+logger = logging.getLogger("embeddings.cache")
+
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+_memory = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------
+# Lookup
+# ------------------------------------------------------------
+def get_cached_embeddings(
+    hashes: Iterable[str],
+    model_name: str,
+) -> Dict[str, List[float]]:
+    """
+    Return {content_hash: embedding} for every hash found in either tier.
+
+    - Memory first, ONE table query for the rest
+    - Table hits are promoted into memory
+    """
+
+    found = {}
+    missing = []
+
+    for h in dict.fromkeys(hashes):
+        vec = _memory.get((h, model_name))
+        if vec is None:
+            missing.append(h)
+        else:
+            found[h] = vec.tolist()
+
+    if not missing:
+        return found
+
+    try:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    select content_hash, embedding::real[]
+                    from embedding_cache
+                    where model_name = %s
+                      and content_hash = any(%s);
+                    """,
+                    (model_name, missing),
+                )
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        # Cache is an optimisation: never fail an embedding because of it
+        logger.warning("Embedding cache lookup failed: %s", e)
+        return found
+
+    for h, embedding in rows:
+        vec = np.asarray(embedding, dtype=np.float32)
+        _memory.set((h, model_name), vec)
+        found[h] = vec.tolist()
+
+    return found
+
+
+# ------------------------------------------------------------
+# Store
+# ------------------------------------------------------------
+def store_embeddings(
+    embeddings: Dict[str, List[float]],
+    model_name: str,
+    persist: bool = True,
+):
+    """
+    Add freshly generated embeddings to the cache.
+
+    persist=False keeps them in memory only (e.g. ad-hoc query text,
+    which is not worth a shared table row).
+    """
+
+    for h, embedding in embeddings.items():
+        _memory.set((h, model_name), np.asarray(embedding, dtype=np.float32))
+
+    if not persist or not embeddings:
+        return
+
+    try:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                    insert into embedding_cache (
+                        content_hash,
+                        model_name,
+                        embedding
+                    )
+                    values %s
+                    on conflict (content_hash, model_name) do nothing;
+                    """,
+                    [
+                        (h, model_name, embedding)
+                        for h, embedding in embeddings.items()
+                    ],
+                    page_size=500,
+                )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("Embedding cache store failed: %s", e)
+
+
+def get_embedding_cache_stats() -> dict:
+    return _memory.stats()
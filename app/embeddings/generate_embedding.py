@@ -5,17 +5,20 @@ Canonical embedding generator for Project Jelly.
 - Produces 384-dim embeddings
 - HARD FAILS on empty text or bad output
 - Safe for ingestion-time usage only
+- Vectors are cached by (content_hash, model_name), see embedding_cache
 """
 
 from sentence_transformers import SentenceTransformer
+from psycopg2.extras import execute_values
 from typing import List
 import threading
-import os
-import psycopg2
-from dotenv import load_dotenv
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.db.connection import get_db_connection
+from app.embeddings.embedding_cache import (
+    content_hash,
+    get_cached_embeddings,
+    store_embeddings,
+)
 
 
 # ------------------------------------------------------------
@@ -23,6 +26,7 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 # ------------------------------------------------------------
 MODEL_NAME = "all-MiniLM-L6-v2"
 EXPECTED_DIM = 384
+DEFAULT_BATCH_SIZE = 32
 
 # ------------------------------------------------------------
 # Singleton model load (important for perf + memory)
@@ -40,12 +44,94 @@ def _get_model() -> SentenceTransformer:
     return _model
 
 
+def _check_embedding(embedding: List[float]) -> List[float]:
+    # ------------------------------------------------------------
+    # HARD GUARDRAILS (NON-NEGOTIABLE)
+    # ------------------------------------------------------------
+    if len(embedding) != EXPECTED_DIM:
+        raise RuntimeError(
+            f"Embedding dimension mismatch: "
+            f"expected {EXPECTED_DIM}, got {len(embedding)}"
+        )
+
+    if all(v == 0.0 for v in embedding):
+        raise RuntimeError("Generated embedding is all zeros")
+
+    return embedding
+
+
 # ------------------------------------------------------------
 # Public API (THIS is what ingestion must call)
 # ------------------------------------------------------------
+def generate_embeddings(
+    texts: List[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    use_cache: bool = True,
+    persist: bool = True,
+) -> List[List[float]]:
+    """
+    Generate semantic embeddings for a list of non-empty texts.
+
+    - Cached texts are not re-encoded (use_cache=False forces encoding)
+    - ONE encode call for the rest; the model batches internally (batch_size)
+    - New vectors go to the shared cache table only when persist=True
+    - Output order matches input order
+
+    GUARANTEES (per row):
+    - Never embeds empty text
+    - Never returns zero vectors
+    - Always returns EXPECTED_DIM floats
+    """
+
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            raise ValueError(
+                f"Refusing to generate embedding for empty or "
+                f"whitespace-only text (index {i})"
+            )
+
+    if not texts:
+        return []
+
+    hashes = [content_hash(text) for text in texts]
+
+    by_hash = get_cached_embeddings(hashes, MODEL_NAME) if use_cache else {}
+
+    # Encode each distinct uncached text once
+    pending = {
+        h: text
+        for h, text in zip(hashes, texts)
+        if h not in by_hash
+    }
+
+    if pending:
+        model = _get_model()
+
+        encoded = model.encode(
+            list(pending.values()),
+            batch_size=batch_size,
+            normalize_embeddings=True,  # cosine-safe, deterministic
+        ).tolist()
+
+        fresh = {
+            h: _check_embedding(e)
+            for h, e in zip(pending, encoded)
+        }
+
+        if use_cache:
+            store_embeddings(fresh, MODEL_NAME, persist=persist)
+
+        by_hash.update(fresh)
+
+    return [_check_embedding(by_hash[h]) for h in hashes]
+
+
 def generate_embedding(text: str) -> List[float]:
     """
-    Generate a semantic embedding for non-empty summary text.
+    Generate a semantic embedding for non-empty text (e.g. a user question).
+
+    - Served from the embedding cache when possible
+    - New vectors are kept in memory only
 
     GUARANTEES:
     - Never embeds empty text
@@ -58,41 +144,29 @@ def generate_embedding(text: str) -> List[float]:
             "Refusing to generate embedding for empty or whitespace-only text"
         )
 
-    model = _get_model()
-
-    embedding = model.encode(
-        text,
-        normalize_embeddings=True,  # cosine-safe, deterministic
-    ).tolist()
-
-    # ------------------------------------------------------------
-    # HARD GUARDRAILS (NON-NEGOTIABLE)
-    # ------------------------------------------------------------
-    if len(embedding) != EXPECTED_DIM:
-        raise RuntimeError(
-            f"Embedding dimension mismatch: "
-            f"expected {EXPECTED_DIM}, got {len(embedding)}"
-        )
-
-    if all(v == 0.0 for v in embedding):
-        raise RuntimeError("Generated embedding is all zeros")
+    return generate_embeddings([text], batch_size=1, persist=False)[0]
 
-    return embedding
 
-def embed_missing_summaries(company_id: str):
+def embed_missing_summaries(
+    company_id: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+):
     """
-    Generate embeddings for summaries that do not yet have one.
+    Generate embeddings for summaries that have none, or a stale one.
 
     - Reads from financial_summaries.content
-    - Writes to summary_embeddings
+    - Writes to summary_embeddings (one row per summary)
+    - Stale = stored content_hash / model_name no longer match the summary,
+      i.e. the summary text was rewritten by a later upload
+    - Unchanged summaries are skipped; repeated text comes from the cache
     - Idempotent
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
 
     # ------------------------------------------------------------
-    # 1. Fetch summaries without embeddings
+    # 1. Fetch summaries without a current embedding
     # ------------------------------------------------------------
     cur.execute(
         """
@@ -103,9 +177,14 @@ def embed_missing_summaries(company_id: str):
         left join summary_embeddings e
           on s.id = e.summary_id
         where s.company_id = %s
-          and e.id is null;
+          and (
+            e.id is null
+            or e.model_name is distinct from %s
+            or e.content_hash is distinct from
+               encode(sha256(convert_to(s.content, 'UTF8')), 'hex')
+          );
         """,
-        (company_id,)
+        (company_id, MODEL_NAME)
     )
 
     rows = cur.fetchall()
@@ -116,21 +195,39 @@ def embed_missing_summaries(company_id: str):
         return
 
     # ------------------------------------------------------------
-    # 2. Generate and store embeddings
+    # 2. Generate embeddings in batches, store in ONE statement
+    #    (stale rows are replaced in place)
     # ------------------------------------------------------------
-    for summary_id, content in rows:
-        embedding = generate_embedding(content)
-
-        cur.execute(
-            """
-            insert into summary_embeddings (
-                summary_id,
-                embedding
-            )
-            values (%s, %s);
-            """,
-            (summary_id, embedding)
+    summary_ids = [summary_id for summary_id, _ in rows]
+    contents = [content for _, content in rows]
+    embeddings = generate_embeddings(contents, batch_size=batch_size)
+
+    execute_values(
+        cur,
+        """
+        insert into summary_embeddings (
+            summary_id,
+            company_id,
+            embedding,
+            content_hash,
+            model_name
         )
+        values %s
+        on conflict (summary_id)
+        do update set
+            embedding = excluded.embedding,
+            content_hash = excluded.content_hash,
+            model_name = excluded.model_name,
+            company_id = excluded.company_id,
+            created_at = now();
+        """,
+        [
+            (summary_id, company_id, embedding, content_hash(content), MODEL_NAME)
+            for summary_id, content, embedding
+            in zip(summary_ids, contents, embeddings)
+        ],
+        page_size=500,
+    )
 
     conn.commit()
     cur.close()
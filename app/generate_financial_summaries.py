@@ -1,14 +1,11 @@
-import os
-import psycopg2
 from datetime import datetime, timezone
-from dotenv import load_dotenv
 import calendar
 import logging
 
-logger = logging.getLogger("summaries")
+from app.db.connection import get_db_connection
+from app.ingestion.period_derivation import fiscal_year_label
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+logger = logging.getLogger("summaries")
 
 
 def _insert_summary_sources(cur, company_id, period_id, summary_id):
@@ -47,7 +44,7 @@ def generate_and_store_monthly_summary(company_id: str):
     Deterministic monthly summaries from SQL facts.
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
 
     cur.execute(
@@ -133,12 +130,22 @@ def generate_and_store_monthly_summary(company_id: str):
     conn.close()
 
 
-def generate_and_store_quarterly_uploaded_summary(company_id: str):
+def generate_and_store_quarterly_uploaded_summary(
+    company_id: str,
+    period_ids: list | None = None,
+):
     """
     Deterministic summaries for uploaded quarterly data only.
+
+    period_ids:
+    - None → all quarterly periods
+    - touched periods → only those (no cross-period context)
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    if period_ids is not None and not period_ids:
+        return
+
+    conn = get_db_connection()
     cur = conn.cursor()
 
     cur.execute(
@@ -149,16 +156,19 @@ def generate_and_store_quarterly_uploaded_summary(company_id: str):
             p.period_end,
             p.fiscal_year,
             p.fiscal_quarter,
+            c.fiscal_year_start_month,
             m.display_name,
             f.value
         FROM financial_facts f
         JOIN financial_periods p ON f.period_id = p.id
+        JOIN companies c ON c.id = p.company_id
         JOIN metric_definitions m ON f.metric_id = m.id
         WHERE p.company_id = %s
           AND p.period_type = 'quarter'
+          AND (%s::uuid[] IS NULL OR p.id = ANY(%s::uuid[]))
         ORDER BY p.period_start ASC;
         """,
-        (company_id,),
+        (company_id, period_ids, period_ids),
     )
 
     rows = cur.fetchall()
@@ -175,6 +185,7 @@ def generate_and_store_quarterly_uploaded_summary(company_id: str):
         end,
         fiscal_year,
         fiscal_quarter,
+        fiscal_year_start_month,
         metric_name,
         value,
     ) in rows:
@@ -183,7 +194,7 @@ def generate_and_store_quarterly_uploaded_summary(company_id: str):
             periods[period_id] = {
                 "start": start,
                 "end": end,
-                "fiscal_year": fiscal_year,
+                "fiscal_year_label": fiscal_year_label(fiscal_year, fiscal_year_start_month),
                 "quarter": fiscal_quarter,
                 "metrics": [],
             }
@@ -193,7 +204,7 @@ def generate_and_store_quarterly_uploaded_summary(company_id: str):
     for period_id, data in periods.items():
         header = (
             f"Financial summary based on uploaded quarterly data "
-            f"for Q{data['quarter']} FY{data['fiscal_year']}"
+            f"for Q{data['quarter']} {data['fiscal_year_label']}"
         )
 
         if data["start"] and data["end"]:
@@ -240,12 +251,22 @@ def generate_and_store_quarterly_uploaded_summary(company_id: str):
     conn.close()
 
 
-def generate_and_store_yearly_uploaded_summary(company_id: str):
+def generate_and_store_yearly_uploaded_summary(
+    company_id: str,
+    period_ids: list | None = None,
+):
     """
     Deterministic summaries for uploaded yearly data only.
+
+    period_ids:
+    - None → all yearly periods
+    - touched periods → only those (no cross-period context)
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    if period_ids is not None and not period_ids:
+        return
+
+    conn = get_db_connection()
     cur = conn.cursor()
 
     cur.execute(
@@ -255,16 +276,19 @@ def generate_and_store_yearly_uploaded_summary(company_id: str):
             p.period_start,
             p.period_end,
             p.fiscal_year,
+            c.fiscal_year_start_month,
             m.display_name,
             f.value
         FROM financial_facts f
         JOIN financial_periods p ON f.period_id = p.id
+        JOIN companies c ON c.id = p.company_id
         JOIN metric_definitions m ON f.metric_id = m.id
         WHERE p.company_id = %s
           AND p.period_type = 'year'
+          AND (%s::uuid[] IS NULL OR p.id = ANY(%s::uuid[]))
         ORDER BY p.period_start ASC;
         """,
-        (company_id,),
+        (company_id, period_ids, period_ids),
     )
 
     rows = cur.fetchall()
@@ -275,19 +299,27 @@ def generate_and_store_yearly_uploaded_summary(company_id: str):
 
     periods = {}
 
-    for period_id, start, end, fiscal_year, metric_name, value in rows:
+    for (
+        period_id,
+        start,
+        end,
+        fiscal_year,
+        fiscal_year_start_month,
+        metric_name,
+        value,
+    ) in rows:
         if period_id not in periods:
             periods[period_id] = {
                 "start": start,
                 "end": end,
-                "fiscal_year": fiscal_year,
+                "fiscal_year_label": fiscal_year_label(fiscal_year, fiscal_year_start_month),
                 "metrics": [],
             }
 
         periods[period_id]["metrics"].append((metric_name, value))
 
     for period_id, data in periods.items():
-        header = f"Financial summary based on uploaded yearly data for FY{data['fiscal_year']}"
+        header = f"Financial summary based on uploaded yearly data for {data['fiscal_year_label']}"
 
         if data["start"] and data["end"]:
             header += f" ({data['start']} to {data['end']})."
@@ -0,0 +1,205 @@
+"""
+Bulk fact loader for ingestion.
+
+- Metric ids are resolved ONCE per file (no per-cell lookups)
+- Fact rows are built as a columnar batch (one array per column)
+- The batch is streamed through COPY into a transaction-local staging table
+- A single INSERT ... SELECT appends it to financial_facts (every row is
+  a new fact: files with dimension columns carry several facts per
+  period + metric, so there is no natural key to merge on)
+- The inserted facts are folded into company_metric_rollups in the same
+  transaction
+- A retried document first drops the facts of its earlier attempt
+  (delete_document_facts), so re-ingesting never double-counts
+
+Lineage (source_document_id) and source_system are stamped during the merge,
+so every fact keeps pointing at the file it came from.
+"""
+
+import csv
+import io
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import pandas as pd
+
+from app.ingestion.ingestion_helpers import normalize_metric_key
+from app.metrics.company_rollups import apply_fact_delta, rebuild_company_rollups
+
+
+STAGING_TABLE = "staging_financial_facts"
+INSERTED_TABLE = "staging_inserted_facts"
+
+
+@dataclass
+class FactBatch:
+    """
+    Columnar batch of facts for ONE company + ONE source document.
+
+    Row i is (period_ids[i], metric_ids[i], values[i]).
+    """
+    period_ids: List = field(default_factory=list)
+    metric_ids: List = field(default_factory=list)
+    values: List = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def build_fact_batch(
+    canonical_df: pd.DataFrame,
+    period_ids: list,
+    metric_ids: Dict[str, str],
+) -> FactBatch:
+    """
+    Build a columnar fact batch from a canonical DataFrame.
+
+    - period_ids[i] is the period_id of canonical_df row i
+    - metric_ids maps metric_key → metric_definitions.id
+    - Columns that are not registered metrics are skipped
+    - Missing cells (None / NaN) are skipped
+    """
+
+    if len(period_ids) != len(canonical_df):
+        raise ValueError(
+            f"period_ids length {len(period_ids)} does not match "
+            f"row count {len(canonical_df)}"
+        )
+
+    batch = FactBatch()
+
+    for col in canonical_df.columns:
+        if col == "period_date":
+            continue
+
+        metric_id = metric_ids.get(normalize_metric_key(col))
+        if metric_id is None:
+            continue
+
+        values = canonical_df[col]
+        present = values.notna().to_numpy()
+
+        if not present.any():
+            continue
+
+        batch.period_ids.extend(
+            pid for pid, keep in zip(period_ids, present) if keep
+        )
+        batch.values.extend(values[present].tolist())
+        batch.metric_ids.extend([metric_id] * int(present.sum()))
+
+    return batch
+
+
+def _batch_to_csv(batch: FactBatch) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(zip(batch.period_ids, batch.metric_ids, batch.values))
+    buffer.seek(0)
+    return buffer
+
+
+def delete_document_facts(cur, company_id: str, source_document_id: str) -> int:
+    """
+    Drop the facts an earlier attempt of this document loaded (it failed
+    after the facts committed, e.g. while summarizing) and recompute the
+    company's rollups without them.
+
+    Runs inside the caller's transaction. Returns the number of facts deleted.
+    """
+    cur.execute(
+        """
+        DELETE FROM financial_facts
+        WHERE company_id = %s AND source_document_id = %s;
+        """,
+        (company_id, source_document_id),
+    )
+    deleted = cur.rowcount
+
+    # last_value cannot be rolled back incrementally: recompute
+    if deleted:
+        rebuild_company_rollups(cur, company_id)
+
+    return deleted
+
+
+def bulk_load_facts(
+    cur,
+    batch: FactBatch,
+    company_id: str,
+    source_system: str,
+    source_document_id: str,
+) -> int:
+    """
+    COPY a fact batch into staging and append it to financial_facts.
+
+    Runs inside the caller's transaction (caller commits).
+    Returns the number of facts inserted.
+    """
+
+    if not batch:
+        return 0
+
+    cur.execute(
+        f"""
+        CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+            period_id uuid NOT NULL,
+            metric_id uuid NOT NULL,
+            value numeric
+        ) ON COMMIT DROP;
+        """
+    )
+
+    cur.execute(
+        f"""
+        CREATE TEMP TABLE IF NOT EXISTS {INSERTED_TABLE} (
+            id uuid NOT NULL,
+            period_id uuid NOT NULL,
+            metric_id uuid NOT NULL,
+            value numeric
+        ) ON COMMIT DROP;
+        """
+    )
+
+    cur.copy_expert(
+        f"COPY {STAGING_TABLE} (period_id, metric_id, value) "
+        f"FROM STDIN WITH (FORMAT csv);",
+        _batch_to_csv(batch),
+    )
+
+    cur.execute(
+        f"""
+        WITH inserted AS (
+            INSERT INTO financial_facts (
+                company_id,
+                period_id,
+                metric_id,
+                value,
+                source_system,
+                source_document_id
+            )
+            SELECT
+                %s,
+                s.period_id,
+                s.metric_id,
+                s.value,
+                %s,
+                %s
+            FROM {STAGING_TABLE} s
+            RETURNING id, period_id, metric_id, value
+        )
+        INSERT INTO {INSERTED_TABLE} (id, period_id, metric_id, value)
+        SELECT id, period_id, metric_id, value
+        FROM inserted;
+        """,
+        (company_id, source_system, source_document_id),
+    )
+    inserted = cur.rowcount
+
+    if inserted:
+        apply_fact_delta(cur, company_id, INSERTED_TABLE)
+
+    # Staging may be reused by a later batch in the same transaction
+    cur.execute(f"TRUNCATE {STAGING_TABLE}, {INSERTED_TABLE};")
+
+    return inserted
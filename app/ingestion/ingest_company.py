@@ -1,9 +1,4 @@
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.db.connection import get_db_connection
 
 
 def extract_domain(email: str) -> str:
@@ -29,7 +24,7 @@ def ensure_company_exists(
 
     company_domain = extract_domain(company_email)
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
 
     # 1️⃣ Check if company already exists by domain
@@ -69,3 +64,39 @@ def ensure_company_exists(
     conn.close()
 
     return company_id
+
+
+# ------------------------------------------------------------
+# Data version (bumped whenever a company's financial data changes)
+# ------------------------------------------------------------
+def bump_company_data_version(cur, company_id: str):
+    """
+    Runs inside the caller's transaction: readers see the new version
+    together with the data that caused it.
+    """
+    cur.execute(
+        "update companies set data_version = data_version + 1 where id = %s;",
+        (company_id,),
+    )
+
+
+def get_company_data_version(company_id: str, conn=None) -> int | None:
+    """
+    Current data_version, or None if the company does not exist.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "select data_version from companies where id = %s;",
+                (company_id,),
+            )
+            row = cur.fetchone()
+    finally:
+        if own_conn:
+            conn.close()
+
+    return row[0] if row else None
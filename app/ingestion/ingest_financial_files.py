@@ -1,23 +1,33 @@
+import logging
 import os
 from datetime import datetime, timezone
 from collections import defaultdict
+from itertools import chain
 
-import pandas as pd
 import psycopg2
-from dotenv import load_dotenv
 
-from app.ingestion.ingest_company import ensure_company_exists
+from app.db.connection import get_db_connection
+from app.ingestion.ingest_company import (
+    bump_company_data_version,
+    ensure_company_exists,
+)
+from app.ingestion.bulk_fact_loader import (
+    build_fact_batch,
+    bulk_load_facts,
+    delete_document_facts,
+)
+from app.ingestion.chunked_reader import iter_file_chunks
 from app.ingestion.ingestion_helpers import (
     compute_file_hash,
     get_or_create_source_document,
-    get_or_create_period,
+    resolve_periods,
+    try_lock_source_document,
+    unlock_source_document,
+    update_ingestion_progress,
     normalize_metric_key,
 )
-from app.ingestion.period_derivation import (
-    derive_fiscal_year_from_date,
-    derive_period_dates,
-    extract_calendar_month,
-)
+from app.ingestion.period_derivation import infer_date_grain, parse_period_column
+from app.metrics.metric_registry import get_metric_registry
 from app.normalization.column_mapper import normalize_columns
 from app.normalization.schema_definitions import CANONICAL_FIELDS
 from app.validations.metric_completeness import check_missing_expected_metrics
@@ -29,8 +39,65 @@ from app.generate_financial_summaries import (
 )
 from app.embeddings.generate_embedding import embed_missing_summaries
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+logger = logging.getLogger("ingestion.pipeline")
+
+
+# Declared upload grain → period_type of date-valued period cells
+# ("auto": inferred from the dates, see infer_date_grain)
+SOURCE_GRAIN_TO_PERIOD_TYPE = {
+    "auto": "auto",
+    "monthly": "month",
+    "quarter": "quarter",
+    "year": "year",
+}
+
+# metric_definitions.allowed_grains: "off" | "warn" (validation issue) |
+# "reject" (facts at a disallowed grain are not loaded)
+GRAIN_ENFORCEMENT = os.getenv("GRAIN_ENFORCEMENT", "warn")
+
+
+def enforce_allowed_grains(
+    metric_registry,
+    present_metrics: set,
+    metric_ids: dict,
+    period_type: str,
+    issues: list,
+) -> dict:
+    """
+    metric_ids to load at period_type (registry lookups, no queries).
+
+    Metrics with an empty allowed_grains are unrestricted. Violations are
+    appended to issues (warn / reject), and dropped under "reject".
+    """
+    if GRAIN_ENFORCEMENT == "off":
+        return metric_ids
+
+    disallowed = sorted(
+        metric_key
+        for metric_key in present_metrics
+        if (definition := metric_registry.get(metric_key))
+        and definition.allowed_grains
+        and period_type not in definition.allowed_grains
+    )
+
+    for metric_key in disallowed:
+        issues.append(
+            {
+                "issue_type": "grain_not_allowed",
+                "severity": "error" if GRAIN_ENFORCEMENT == "reject" else "warning",
+                "metric_key": metric_key,
+                "description": (
+                    f"Metric '{metric_key}' is not defined at {period_type} grain "
+                    f"(allowed: {', '.join(metric_registry.get(metric_key).allowed_grains)})"
+                    + ("; values not loaded" if GRAIN_ENFORCEMENT == "reject" else "")
+                ),
+            }
+        )
+
+    if GRAIN_ENFORCEMENT != "reject":
+        return metric_ids
+
+    return {k: v for k, v in metric_ids.items() if k not in disallowed}
 
 
 def ingest_financial_file(
@@ -38,9 +105,10 @@ def ingest_financial_file(
     user_email: str,
     company_name: str | None = None,
     source_type: str = "csv",
-    source_grain: str = "monthly",
+    source_grain: str = "monthly",         # "auto" | "monthly" | "quarter" | "year"
     is_estimated: bool = False,
     original_filename: str | None = None,  # ✅ ADD
+    file_hash: str | None = None,          # computed during upload
 ):
 
     """
@@ -48,8 +116,10 @@ def ingest_financial_file(
 
     GUARANTEES:
     - period_date is the single source of truth for time
+      (dates or period labels; mixed grains load per grain)
     - only metrics in metric_definitions are ingested
     - no LLM required for date parsing
+    - file parsed in bounded chunks (memory does not grow with file size)
     """
 
     # ------------------------------------------------------------
@@ -60,241 +130,278 @@ def ingest_financial_file(
         company_name=company_name,
     )
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
+    locked_document_id = None
+
+    # Failed jobs are routine (bad labels, LLM / DB errors): always roll
+    # back and hand the connection back to the pool
+    try:
+        # ------------------------------------------------------------
+        # Fetch fiscal year start month + industry
+        # ------------------------------------------------------------
+        cur.execute(
+            """
+            SELECT fiscal_year_start_month, industry_code
+            FROM companies
+            WHERE id = %s;
+            """,
+            (company_id,),
+        )
+        fiscal_year_start_month, industry_code = cur.fetchone()
 
-    # ------------------------------------------------------------
-    # Fetch fiscal year start month + industry
-    # ------------------------------------------------------------
-    cur.execute(
-        """
-        SELECT fiscal_year_start_month, industry_code
-        FROM companies
-        WHERE id = %s;
-        """,
-        (company_id,),
-    )
-    fiscal_year_start_month, industry_code = cur.fetchone()
+        # ------------------------------------------------------------
+        # Canonical metrics registry (in-memory, no round trip when warm)
+        # ------------------------------------------------------------
+        metric_registry = get_metric_registry(conn)
+        canonical_metrics = metric_registry.as_canonical_metrics()
 
-    # ------------------------------------------------------------
-    # Fetch canonical metrics registry
-    # ------------------------------------------------------------
-    cur.execute(
-        """
-        SELECT
-            metric_key,
-            statement_type_id,
-            aggregation_type,
-            is_derived,
-            allowed_grains
-        FROM metric_definitions;
-        """
-    )
+        # ------------------------------------------------------------
+        # 1. Register source document
+        # ------------------------------------------------------------
+        if file_hash is None:
+            file_hash = compute_file_hash(file_path)
 
-    canonical_metrics = [
-        {
-            "metric_key": row[0],
-            "statement_type_id": row[1],
-            "aggregation_type": row[2],
-            "is_derived": row[3],
-            "allowed_grains": row[4],
-        }
-        for row in cur.fetchall()
-    ]
+        source_doc = get_or_create_source_document(
+            cur=cur,
+            company_id=company_id,
+            file_hash=file_hash,
+            source_type=source_type,
+            source_name=original_filename or os.path.basename(file_path),
+        )
 
-    # ------------------------------------------------------------
-    # 1. Register source document
-    # ------------------------------------------------------------
-    file_hash = compute_file_hash(file_path)
-
-    source_doc = get_or_create_source_document(
-        cur=cur,
-        company_id=company_id,
-        file_hash=file_hash,
-        source_type=source_type,
-        source_name=original_filename or os.path.basename(file_path),
-    )
+        source_document_id = source_doc["id"]
 
-    source_document_id = source_doc["id"]
+        # A run reclaimed as stale may still be alive: never load twice
+        if not try_lock_source_document(cur, source_document_id):
+            logger.info(
+                "Document is being ingested by another run | source_document_id=%s",
+                source_document_id,
+            )
+            return {"company_id": company_id, "message": "Already being ingested"}
+        locked_document_id = source_document_id
 
-    if source_doc["status"] == "completed":
-        cur.close()
-        conn.close()
-        return {"company_id": company_id, "message": "Already ingested"}
+        # Status as of the lock (an earlier run may have just finished)
+        cur.execute(
+            "SELECT ingestion_status FROM source_documents WHERE id = %s;",
+            (source_document_id,),
+        )
+        if cur.fetchone()[0] == "completed":
+            return {"company_id": company_id, "message": "Already ingested"}
+
+        # Make the document visible to status polling right away
+        conn.commit()
+        update_ingestion_progress(source_document_id, "processing", "parsing")
+
+        # ------------------------------------------------------------
+        # 2. Parse file (bounded chunks, see chunked_reader)
+        # ------------------------------------------------------------
+        chunks = iter_file_chunks(file_path)
+
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            raise ValueError("Uploaded file has no data rows")
+
+        # ------------------------------------------------------------
+        # 3. Normalize columns (mapping decided ONCE, on the first chunk)
+        # ------------------------------------------------------------
+        update_ingestion_progress(source_document_id, "processing", "normalizing")
+
+        canonical_df, report = normalize_columns(
+            first_chunk,
+            CANONICAL_FIELDS,
+            source_metadata={
+                "source": source_type,
+                "source_grain": source_grain,
+                "is_estimated": is_estimated,
+            },
+            canonical_metrics=canonical_metrics,
+        )
 
-    # ------------------------------------------------------------
-    # 2. Parse file
-    # ------------------------------------------------------------
-    if file_path.lower().endswith((".csv", ".txt")):
-        raw_df = pd.read_csv(file_path)
-    elif file_path.lower().endswith((".xlsx", ".xls")):
-        raw_df = pd.read_excel(file_path)
-    else:
-        raise ValueError("Unsupported file type")
+        rename_map = {
+            m["raw_column"]: m["canonical_field"]
+            for m in report["mapped"]
+        }
 
-    # ------------------------------------------------------------
-    # 3. Normalize columns
-    # ------------------------------------------------------------
-    canonical_df, report = normalize_columns(
-        raw_df,
-        CANONICAL_FIELDS,
-        source_metadata={
-            "source": source_type,
-            "source_grain": source_grain,
-            "is_estimated": is_estimated,
-        },
-        canonical_metrics=canonical_metrics,
-    )
+        store_validation_issues(company_id, report.get("issues", []))
 
-    store_validation_issues(company_id, report.get("issues", []))
+        if "period_date" not in canonical_df.columns:
+            raise ValueError("period_date is required for ingestion")
 
-    if "period_date" not in canonical_df.columns:
-        raise ValueError("period_date is required for ingestion")
+        # ------------------------------------------------------------
+        # 4. Metric completeness validation
+        # ------------------------------------------------------------
+        present_metrics = {
+            normalize_metric_key(col)
+            for col in canonical_df.columns
+            if col != "period_date"
+        }
 
-    # ------------------------------------------------------------
-    # 4. Metric completeness validation
-    # ------------------------------------------------------------
-    present_metrics = {
-        normalize_metric_key(col)
-        for col in canonical_df.columns
-        if col != "period_date"
-    }
-
-    cur.execute(
-        """
-        SELECT md.metric_key, st.name
-        FROM metric_definitions md
-        JOIN statement_types st ON md.statement_type_id = st.id
-        WHERE md.metric_key = ANY(%s);
-        """,
-        (list(present_metrics),),
-    )
+        metric_to_statement = {
+            metric_key: metric_registry.statement_of(metric_key)
+            for metric_key in present_metrics
+            if metric_registry.statement_of(metric_key)
+        }
 
-    metric_to_statement = dict(cur.fetchall())
-    present_metrics_by_statement = defaultdict(set)
+        present_metrics_by_statement = defaultdict(set)
 
-    for metric_key, statement_name in metric_to_statement.items():
-        present_metrics_by_statement[statement_name.lower()].add(metric_key)
+        for metric_key, statement_name in metric_to_statement.items():
+            present_metrics_by_statement[statement_name.lower()].add(metric_key)
 
-    for statement_name, metrics in present_metrics_by_statement.items():
-        issues = check_missing_expected_metrics(
-            statement_type=statement_name,
-            present_metrics=metrics,
-            industry=industry_code,
-        )
-        store_validation_issues(company_id, issues)
+        for statement_name, metrics in present_metrics_by_statement.items():
+            issues = check_missing_expected_metrics(
+                statement_type=statement_name,
+                present_metrics=metrics,
+                industry=industry_code,
+            )
+            store_validation_issues(company_id, issues)
 
-    # ------------------------------------------------------------
-    # 5. Determine period type
-    # ------------------------------------------------------------
-    if source_grain not in {"monthly", "quarter", "year"}:
-        raise ValueError(f"Unsupported source_grain: {source_grain}")
+        # ------------------------------------------------------------
+        # 5. Grain of date-valued periods (labels carry their own grain)
+        # ------------------------------------------------------------
+        if source_grain not in SOURCE_GRAIN_TO_PERIOD_TYPE:
+            raise ValueError(f"Unsupported source_grain: {source_grain}")
 
-    period_type = (
-        "month" if source_grain == "monthly"
-        else "quarter" if source_grain == "quarter"
-        else "year"
-    )
+        date_grain = SOURCE_GRAIN_TO_PERIOD_TYPE[source_grain]
 
-    # ------------------------------------------------------------
-    # 6. Insert financial facts (WITH source_document_id ✅)
-    # ------------------------------------------------------------
-    for _, row in canonical_df.iterrows():
+        # Decided ONCE, on the first chunk: every chunk uses the same grain
+        if date_grain == "auto":
+            date_grain = infer_date_grain(
+                canonical_df["period_date"],
+                fiscal_year_start_month=fiscal_year_start_month,
+            )
+            logger.info(
+                "Date grain inferred | source_document_id=%s | grain=%s",
+                source_document_id, date_grain,
+            )
 
-        period_date = row["period_date"]
+        # ------------------------------------------------------------
+        # 6. + 7. Per chunk: parse periods (vectorized), then per grain:
+        #         resolve periods (one upsert) and bulk load facts
+        #         (WITH source_document_id ✅)
+        # ------------------------------------------------------------
+        update_ingestion_progress(source_document_id, "processing", "loading_facts")
+
+        # Retried document: facts of the failed attempt are replaced, not doubled
+        if not source_doc["is_new"]:
+            deleted = delete_document_facts(cur, company_id, source_document_id)
+            if deleted:
+                logger.info(
+                    "Replacing facts of earlier attempt | source_document_id=%s | facts=%s",
+                    source_document_id, deleted,
+                )
 
-        fiscal_year = derive_fiscal_year_from_date(
-            value=period_date,
-            fiscal_year_start_month=fiscal_year_start_month,
-        )
+        metric_ids = metric_registry.ids_by_key()
+        touched_period_ids = set()
 
-        if period_type == "month":
-            fiscal_month = extract_calendar_month(period_date)
-            fiscal_quarter = None
-        elif period_type == "quarter":
-            raise ValueError("Quarterly uploads must include quarter info")
-        else:
-            fiscal_month = None
-            fiscal_quarter = None
-
-        period_start, period_end = derive_period_dates(
-            period_type=period_type,
-            fiscal_year=fiscal_year,
-            fiscal_quarter=fiscal_quarter,
-            fiscal_month=fiscal_month,
-            fiscal_year_start_month=fiscal_year_start_month,
-        )
+        # period_type → metric_ids loadable at that grain (allowed_grains)
+        metric_ids_by_grain = {}
+        grain_issues = []
 
-        period_id = get_or_create_period(
-            cur=cur,
-            company_id=company_id,
-            period_start=period_start,
-            period_end=period_end,
-            period_type=period_type,
-            fiscal_year=fiscal_year,
-            fiscal_quarter=fiscal_quarter,
-            fiscal_month=fiscal_month,
+        canonical_chunks = chain(
+            [canonical_df],
+            (chunk.rename(columns=rename_map) for chunk in chunks),
         )
 
-        for col, value in row.items():
-            if col == "period_date" or value is None:
-                continue
+        for chunk_df in canonical_chunks:
+            periods = parse_period_column(
+                chunk_df["period_date"],
+                fiscal_year_start_month=fiscal_year_start_month,
+                date_grain=date_grain,
+            )
 
-            metric_key = normalize_metric_key(col)
+            # Mixed-grain files → one bulk load per grain
+            for period_type, rows in periods.groupby("period_type").indices.items():
+                if period_type not in metric_ids_by_grain:
+                    metric_ids_by_grain[period_type] = enforce_allowed_grains(
+                        metric_registry,
+                        present_metrics,
+                        metric_ids,
+                        period_type,
+                        grain_issues,
+                    )
+
+                grain_periods = periods.iloc[rows]
+
+                period_id_by_start = resolve_periods(
+                    cur=cur,
+                    company_id=company_id,
+                    period_type=period_type,
+                    periods=grain_periods,
+                )
 
-            cur.execute(
-                "SELECT id FROM metric_definitions WHERE metric_key = %s;",
-                (metric_key,),
-            )
-            res = cur.fetchone()
-            if not res:
-                continue
-
-            cur.execute(
-                """
-                INSERT INTO financial_facts (
-                    company_id,
-                    period_id,
-                    metric_id,
-                    value,
-                    source_system,
-                    source_document_id
+                period_ids = [
+                    period_id_by_start[d] for d in grain_periods["period_start"]
+                ]
+
+                fact_batch = build_fact_batch(
+                    canonical_df=chunk_df.iloc[rows],
+                    period_ids=period_ids,
+                    metric_ids=metric_ids_by_grain[period_type],
                 )
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT DO NOTHING;
-                """,
-                (
-                    company_id,
-                    period_id,
-                    res[0],
-                    value,
-                    source_type,
-                    source_document_id,
-                ),
-            )
 
-    conn.commit()
+                bulk_load_facts(
+                    cur=cur,
+                    batch=fact_batch,
+                    company_id=company_id,
+                    source_system=source_type,
+                    source_document_id=source_document_id,
+                )
 
-    # ------------------------------------------------------------
-    # 7. Generate summaries + embeddings
-    # ------------------------------------------------------------
-    generate_monthly_context_summaries(company_id)
-    generate_and_store_quarterly_uploaded_summary(company_id)
-    generate_and_store_yearly_uploaded_summary(company_id)
-    embed_missing_summaries(company_id)
-
-    cur.execute(
-        """
-        UPDATE source_documents
-        SET ingestion_status = 'completed',
-            last_processed_at = %s
-        WHERE id = %s;
-        """,
-        (datetime.now(timezone.utc), source_document_id),
-    )
-    conn.commit()
+                touched_period_ids.update(period_id_by_start.values())
+
+        store_validation_issues(company_id, grain_issues)
+
+        # New facts are visible from here on: invalidate cached presentations
+        bump_company_data_version(cur, company_id)
+        conn.commit()
+
+        # ------------------------------------------------------------
+        # 8. Generate summaries + embeddings
+        # ------------------------------------------------------------
+        update_ingestion_progress(source_document_id, "processing", "summarizing")
+
+        # Only periods touched by THIS document (+ dependent context windows)
+        touched_period_ids = sorted(touched_period_ids)
 
-    cur.close()
-    conn.close()
+        generate_monthly_context_summaries(company_id, touched_period_ids)
+        generate_and_store_quarterly_uploaded_summary(company_id, touched_period_ids)
+        generate_and_store_yearly_uploaded_summary(company_id, touched_period_ids)
+
+        update_ingestion_progress(source_document_id, "processing", "embedding")
+
+        embed_missing_summaries(company_id)
+
+        cur.execute(
+            """
+            UPDATE source_documents
+            SET ingestion_status = 'completed',
+                ingestion_step = NULL,
+                ingestion_error = NULL,
+                last_processed_at = %s
+            WHERE id = %s;
+            """,
+            (datetime.now(timezone.utc), source_document_id),
+        )
 
-    return {"company_id": company_id, "message": "Ingestion completed"}
+        # Summaries / embeddings changed too: invalidate cached presentations
+        bump_company_data_version(cur, company_id)
+        conn.commit()
+
+        return {"company_id": company_id, "message": "Ingestion completed"}
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        try:
+            if locked_document_id is not None:
+                unlock_source_document(cur, locked_document_id)
+                conn.commit()
+        except psycopg2.Error as e:
+            # Broken connection: the server drops its locks with it
+            logger.warning("Could not release document lock: %s", e)
+        finally:
+            cur.close()
+            conn.close()
@@ -1,4 +1,11 @@
 import hashlib
+from datetime import datetime, timezone
+
+from app.db.connection import get_db_connection
+from app.metrics.metric_registry import get_metric_registry
+
+
+HASH_READ_SIZE = 1024 * 1024
 
 
 def compute_file_hash(file_path: str) -> str:
@@ -8,7 +15,7 @@ def compute_file_hash(file_path: str) -> str:
     """
     sha256 = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        for chunk in iter(lambda: f.read(HASH_READ_SIZE), b""):
             sha256.update(chunk)
     return sha256.hexdigest()
 
@@ -70,32 +77,97 @@ def get_or_create_source_document(
 
 
 
-def get_or_create_period(
+# ------------------------------------------------------------
+# One live run per source document
+# ------------------------------------------------------------
+# Advisory lock key of a source document (uuid → bigint)
+SOURCE_DOCUMENT_LOCK_KEY = "hashtextextended(%s::text, 0)"
+
+
+def try_lock_source_document(cur, source_document_id) -> bool:
+    """
+    Take the document's session advisory lock, without waiting.
+
+    Held across the pipeline's commits until unlock_source_document()
+    (or until the connection dies, e.g. the worker crashed). False when
+    another run of the same document still holds it.
+    """
+    cur.execute(
+        f"select pg_try_advisory_lock({SOURCE_DOCUMENT_LOCK_KEY});",
+        (str(source_document_id),),
+    )
+    return cur.fetchone()[0]
+
+
+def unlock_source_document(cur, source_document_id):
+    cur.execute(
+        f"select pg_advisory_unlock({SOURCE_DOCUMENT_LOCK_KEY});",
+        (str(source_document_id),),
+    )
+
+
+def update_ingestion_progress(
+    source_document_id,
+    status: str,
+    step: str | None = None,
+    error: str | None = None,
+):
+    """
+    Record ingestion progress on source_documents.
+
+    Uses its OWN connection and commits immediately, so progress is
+    visible to status polling while the pipeline transaction is open.
+
+    status: queued | processing | completed | failed
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                update source_documents
+                set ingestion_status = %s,
+                    ingestion_step = %s,
+                    ingestion_error = %s,
+                    last_processed_at = %s
+                where id = %s;
+                """,
+                (
+                    status,
+                    step,
+                    error,
+                    datetime.now(timezone.utc),
+                    source_document_id,
+                ),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def resolve_periods(
     cur,
     company_id,
-    period_start,
-    period_end,
     period_type,
-    fiscal_year,
-    fiscal_quarter,
-    fiscal_month,
+    periods,
 ):
-
     """
-    Period uniqueness = (company_id, period_start, period_type)
+    Set-based period upsert.
+
+    Period uniqueness = (company_id, period_start, period_type),
+    enforced by a unique constraint so concurrent uploads cannot
+    create duplicates.
+
+    periods: DataFrame from derive_period_columns (one row per fact row).
+    Distinct periods are upserted in ONE statement.
+
+    Returns:
+    - {period_start: period_id}
     """
-    cur.execute(
-        """
-        select id from financial_periods
-        where company_id = %s
-          and period_start = %s
-          and period_type = %s;
-        """,
-        (company_id, period_start, period_type),
-    )
-    row = cur.fetchone()
-    if row:
-        return row[0]
+    distinct = periods.drop_duplicates(subset="period_start")
+
+    if distinct.empty:
+        return {}
 
     cur.execute(
         """
@@ -108,20 +180,30 @@ def get_or_create_period(
             fiscal_quarter,
             fiscal_month
         )
-        values (%s, %s, %s, %s, %s, %s, %s)
-        returning id;
+        select %s, t.period_start, t.period_end, %s,
+               t.fiscal_year, t.fiscal_quarter, t.fiscal_month
+        from unnest(
+            %s::date[],
+            %s::date[],
+            %s::int[],
+            %s::int[],
+            %s::int[]
+        ) as t(period_start, period_end, fiscal_year, fiscal_quarter, fiscal_month)
+        on conflict (company_id, period_start, period_type)
+        do update set period_type = excluded.period_type
+        returning period_start, id;
         """,
         (
             company_id,
-            period_start,
-            period_end,
             period_type,
-            fiscal_year,
-            fiscal_quarter,
-            fiscal_month
+            distinct["period_start"].tolist(),
+            distinct["period_end"].tolist(),
+            distinct["fiscal_year"].tolist(),
+            distinct["fiscal_quarter"].tolist(),
+            distinct["fiscal_month"].tolist(),
         ),
     )
-    return cur.fetchone()[0]
+    return dict(cur.fetchall())
 
 
 def get_or_create_metric(
@@ -133,6 +215,10 @@ def get_or_create_metric(
     """
     Metric uniqueness is GLOBAL by metric_key.
     """
+    metric_id = get_metric_registry().id_of(metric_key)
+    if metric_id:
+        return metric_id
+
     cur.execute(
         "select id from metric_definitions where metric_key = %s;",
         (metric_key,),
@@ -0,0 +1,313 @@
+"""
+Background ingestion jobs.
+
+/upload persists the file, registers its source document and returns
+immediately. The pipeline runs on a bounded worker pool, so the event
+loop (and /query latency) is never blocked by ingestion.
+
+- job_id = source_documents.id
+- Progress lives in source_documents.ingestion_status / ingestion_step / ingestion_error
+- Status flow: uploaded → queued → processing → completed | failed
+
+Jobs run in-process. A job whose status has not moved for
+INGESTION_JOB_STALE_AFTER seconds (e.g. the worker restarted) is treated
+as abandoned and can be re-submitted by uploading the same file again.
+A running job holds its document's advisory lock, so a slow but live
+job is never reclaimed, and a duplicate run that gets through anyway
+(e.g. one that waited in the queue) exits without loading anything.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from app.cache.answer_cache import invalidate_company_answers
+from app.db.connection import get_db_connection
+from app.ingestion.ingest_company import ensure_company_exists, extract_domain
+from app.ingestion.ingest_financial_files import ingest_financial_file
+from app.ingestion.ingestion_helpers import (
+    SOURCE_DOCUMENT_LOCK_KEY,
+    compute_file_hash,
+    get_or_create_source_document,
+    update_ingestion_progress,
+)
+
+logger = logging.getLogger("ingestion.jobs")
+
+
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+INGESTION_JOB_STALE_AFTER = int(os.getenv("INGESTION_JOB_STALE_AFTER", "900"))
+UPLOAD_DIR = os.getenv(
+    "UPLOAD_DIR",
+    os.path.join(tempfile.gettempdir(), "jelly_uploads"),
+)
+
+# ------------------------------------------------------------
+# Worker pool (lazy, one per process)
+# ------------------------------------------------------------
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=INGESTION_WORKERS,
+                    thread_name_prefix="ingestion",
+                )
+    return _executor
+
+
+def shutdown_ingestion_workers():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+# ------------------------------------------------------------
+# Upload registration
+# ------------------------------------------------------------
+def persist_upload_path(suffix: str) -> str:
+    """
+    Reserve a file path under UPLOAD_DIR for an incoming upload.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=UPLOAD_DIR)
+    os.close(fd)
+    return path
+
+
+def find_source_document(user_email: str, file_hash: str) -> dict | None:
+    """
+    Existing upload of this exact file for the user's company, if any.
+
+    One indexed read (companies.company_domain → source_documents
+    (company_id, file_hash)); creates nothing, so /upload can answer a
+    re-upload before any company / registry / parsing work.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT sd.id, sd.company_id, sd.ingestion_status
+                FROM companies c
+                JOIN source_documents sd ON sd.company_id = c.id
+                WHERE c.company_domain = %s
+                  AND sd.file_hash = %s
+                LIMIT 1;
+                """,
+                (extract_domain(user_email), file_hash),
+            )
+            row = cur.fetchone()
+    finally:
+        conn.close()
+
+    if not row:
+        return None
+
+    return {"job_id": row[0], "company_id": row[1], "status": row[2]}
+
+
+def enqueue_ingestion_job(
+    file_path: str,
+    user_email: str,
+    company_name: str | None,
+    original_filename: str | None,
+    source_type: str = "csv",
+    source_grain: str = "monthly",
+    file_hash: str | None = None,
+) -> dict:
+    """
+    Register the upload and enqueue its ingestion.
+
+    file_hash: SHA-256 computed while the upload was written (optional).
+
+    Returns:
+    {
+      "job_id": <source_document_id>,
+      "company_id": ...,
+      "status": "queued" | "processing" | "completed",
+      "enqueued": bool
+    }
+
+    The file at file_path is owned by the job from here on
+    (removed when the job ends, or now if nothing is enqueued).
+    """
+
+    company_id = ensure_company_exists(
+        company_email=user_email,
+        company_name=company_name,
+    )
+    if file_hash is None:
+        file_hash = compute_file_hash(file_path)
+
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=INGESTION_JOB_STALE_AFTER)
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            source_doc = get_or_create_source_document(
+                cur=cur,
+                company_id=company_id,
+                file_hash=file_hash,
+                source_type=source_type,
+                source_name=os.path.basename(file_path),
+            )
+            job_id = source_doc["id"]
+
+            # Atomic claim: only ONE request may queue a given document.
+            # A stale-looking job is reclaimed only if no run holds its lock.
+            cur.execute(
+                f"""
+                UPDATE source_documents
+                SET ingestion_status = 'queued',
+                    ingestion_step = NULL,
+                    ingestion_error = NULL,
+                    original_filename = COALESCE(%s, original_filename),
+                    last_processed_at = %s
+                WHERE id = %s
+                  AND (
+                    ingestion_status NOT IN ('queued', 'processing', 'completed')
+                    OR (
+                      ingestion_status IN ('queued', 'processing')
+                      AND last_processed_at < %s
+                      AND pg_try_advisory_xact_lock({SOURCE_DOCUMENT_LOCK_KEY})
+                    )
+                  )
+                RETURNING id;
+                """,
+                (original_filename, now, job_id, stale_before, str(job_id)),
+            )
+            claimed = cur.fetchone() is not None
+
+            if not claimed:
+                cur.execute(
+                    "SELECT ingestion_status FROM source_documents WHERE id = %s;",
+                    (job_id,),
+                )
+                status = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+
+    if not claimed:
+        os.remove(file_path)
+        return {
+            "job_id": job_id,
+            "company_id": company_id,
+            "status": status,
+            "enqueued": False,
+        }
+
+    _get_executor().submit(
+        _run_ingestion_job,
+        job_id=job_id,
+        file_path=file_path,
+        user_email=user_email,
+        company_name=company_name,
+        original_filename=original_filename,
+        source_type=source_type,
+        source_grain=source_grain,
+        file_hash=file_hash,
+    )
+
+    logger.info("Ingestion job queued | job_id=%s | company_id=%s", job_id, company_id)
+
+    return {
+        "job_id": job_id,
+        "company_id": company_id,
+        "status": "queued",
+        "enqueued": True,
+    }
+
+
+def _run_ingestion_job(
+    job_id,
+    file_path: str,
+    user_email: str,
+    company_name: str | None,
+    original_filename: str | None,
+    source_type: str,
+    source_grain: str,
+    file_hash: str,
+):
+    try:
+        result = ingest_financial_file(
+            file_path=file_path,
+            user_email=user_email,
+            company_name=company_name,
+            source_type=source_type,
+            source_grain=source_grain,
+            original_filename=original_filename,
+            file_hash=file_hash,
+        )
+        logger.info("Ingestion job completed | job_id=%s", job_id)
+
+        # New data_version: cached answers for this company are dead weight
+        invalidate_company_answers(result["company_id"])
+
+    except Exception as e:
+        logger.error("Ingestion job failed | job_id=%s", job_id)
+        traceback.print_exc()
+        update_ingestion_progress(
+            job_id,
+            "failed",
+            error=f"{e.__class__.__name__}: {e}" if str(e) else e.__class__.__name__,
+        )
+
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+# ------------------------------------------------------------
+# Status
+# ------------------------------------------------------------
+def get_ingestion_job(job_id: str) -> dict | None:
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    id,
+                    company_id,
+                    COALESCE(original_filename, source_name),
+                    ingestion_status,
+                    ingestion_step,
+                    ingestion_error,
+                    uploaded_at,
+                    last_processed_at
+                FROM source_documents
+                WHERE id = %s;
+                """,
+                (job_id,),
+            )
+            row = cur.fetchone()
+    finally:
+        conn.close()
+
+    if not row:
+        return None
+
+    return {
+        "job_id": row[0],
+        "company_id": row[1],
+        "filename": row[2],
+        "status": row[3],
+        "step": row[4],
+        "error": row[5],
+        "uploaded_at": row[6].isoformat() if row[6] else None,
+        "last_processed_at": row[7].isoformat() if row[7] else None,
+    }
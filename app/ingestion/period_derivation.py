@@ -1,6 +1,9 @@
 from datetime import date, datetime
 import calendar
 
+import numpy as np
+import pandas as pd
+
 MONTH_NAME_TO_INDEX = {
     "jan": 1, "january": 1,
     "feb": 2, "february": 2,
@@ -99,8 +102,9 @@ def derive_period_dates(
         if fiscal_month is None:
             raise ValueError("Monthly period requires fiscal_month")
 
+        # Months before the fiscal start month fall in the NEXT calendar year
         year_offset = 1 if fiscal_month < fiscal_year_start_month else 0
-        year = fiscal_year - year_offset
+        year = fiscal_year + year_offset
 
         start = date(year, fiscal_month, 1)
         end = date(year, fiscal_month, calendar.monthrange(year, fiscal_month)[1])
@@ -123,12 +127,515 @@ def derive_period_dates(
     if period_type == "year":
         start = date(fiscal_year, fiscal_year_start_month, 1)
         end_month = fiscal_year_start_month - 1 or 12
-        end_year = fiscal_year if fiscal_year_start_month > 1 else fiscal_year + 1
+        end_year = fiscal_year + 1 if fiscal_year_start_month > 1 else fiscal_year
         end = date(end_year, end_month, calendar.monthrange(end_year, end_month)[1])
         return start, end
 
     raise ValueError(f"Unsupported period_type: {period_type}")
 
+def derive_fiscal_quarter(calendar_month: int, fiscal_year_start_month: int) -> int:
+    """
+    Fiscal quarter (1-4) of a calendar month.
+    """
+    return (calendar_month - fiscal_year_start_month) % 12 // 3 + 1
+
+
+def fiscal_year_label(fiscal_year: int, fiscal_year_start_month: int) -> str:
+    """
+    Display label of a stored fiscal year (= calendar year it starts in).
+
+    Named by the year it ENDS in, like uploaded labels: fiscal_year 2023
+    with an April start → "FY2024" (Apr 2023 - Mar 2024).
+    """
+    return f"FY{fiscal_year + (fiscal_year_start_month > 1)}"
+
+
+# ------------------------------------------------------------
+# Array counterparts (one call per column, no per-row Python)
+# ------------------------------------------------------------
+def to_datetime_array(period_dates) -> np.ndarray:
+    """
+    Date-like column (dates, datetimes, ISO strings, datetime64)
+    → datetime64[D] array.
+    """
+    dates = pd.Series(period_dates)
+
+    if dates.isna().any():
+        raise ValueError("period_date cannot be None")
+
+    try:
+        dt = pd.to_datetime(dates, format="ISO8601")
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid ISO date in period_date column: {e}")
+
+    return dt.to_numpy(dtype="datetime64[D]")
+
+
+def derive_fiscal_arrays(
+    period_dates,
+    fiscal_year_start_month: int,
+) -> dict[str, np.ndarray]:
+    """
+    Vectorized derive_fiscal_year_from_date + extract_calendar_month
+    + derive_fiscal_quarter.
+
+    Returns int64 arrays: fiscal_year, fiscal_month (calendar month,
+    as derive_period_dates expects), fiscal_quarter.
+    """
+    months = to_datetime_array(period_dates).astype("datetime64[M]").astype(np.int64)
+
+    calendar_year = months // 12 + 1970
+    calendar_month = months % 12 + 1
+
+    return {
+        "fiscal_year": calendar_year - (calendar_month < fiscal_year_start_month),
+        "fiscal_month": calendar_month,
+        "fiscal_quarter": (calendar_month - fiscal_year_start_month) % 12 // 3 + 1,
+    }
+
+
+def derive_period_date_arrays(
+    period_type: str,
+    fiscal_year,
+    fiscal_quarter,
+    fiscal_month,
+    fiscal_year_start_month: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized derive_period_dates.
+
+    Periods are built as month offsets since 1970-01 (datetime64[M]):
+    start = first month of the period, end = start + length - 1 day.
+
+    Returns (period_start, period_end) as datetime64[D] arrays.
+    """
+    fiscal_year = np.asarray(fiscal_year, dtype=np.int64)
+
+    if period_type == "month":
+        if fiscal_month is None:
+            raise ValueError("Monthly period requires fiscal_month")
+        start_month = np.asarray(fiscal_month, dtype=np.int64)
+        length = 1
+
+    elif period_type == "quarter":
+        if fiscal_quarter is None:
+            raise ValueError("Quarterly period requires fiscal_quarter")
+        fiscal_quarter = np.asarray(fiscal_quarter, dtype=np.int64)
+        start_month = ((fiscal_year_start_month - 1) + (fiscal_quarter - 1) * 3) % 12 + 1
+        length = 3
+
+    elif period_type == "year":
+        start_month = np.full_like(fiscal_year, fiscal_year_start_month)
+        length = 12
+
+    else:
+        raise ValueError(f"Unsupported period_type: {period_type}")
+
+    # Months before the fiscal start month fall in the NEXT calendar year
+    year = fiscal_year + (start_month < fiscal_year_start_month)
+
+    start = ((year - 1970) * 12 + start_month - 1).astype("datetime64[M]")
+    end = (start + length).astype("datetime64[D]") - 1
+
+    return start.astype("datetime64[D]"), end
+
+
+def derive_period_columns(
+    period_dates,
+    period_type: str,
+    fiscal_year_start_month: int,
+) -> pd.DataFrame:
+    """
+    Vectorized period derivation for a whole column of period dates.
+
+    Same rules as derive_fiscal_year_from_date + extract_calendar_month
+    + derive_period_dates, applied in one pass.
+
+    Quarterly rows are placed in the fiscal quarter containing the date.
+
+    Returns one row per input value with:
+    - period_start, period_end (datetime.date)
+    - fiscal_year (int)
+    - fiscal_quarter, fiscal_month (int or None)
+    """
+
+    index = pd.Series(period_dates).index
+    fiscal = derive_fiscal_arrays(period_dates, fiscal_year_start_month)
+
+    period_start, period_end = derive_period_date_arrays(
+        period_type,
+        fiscal_year=fiscal["fiscal_year"],
+        fiscal_quarter=fiscal["fiscal_quarter"],
+        fiscal_month=fiscal["fiscal_month"],
+        fiscal_year_start_month=fiscal_year_start_month,
+    )
+
+    none = [None] * len(index)
+
+    return pd.DataFrame(
+        {
+            # datetime64[D] → datetime.date
+            "period_start": period_start.astype(object),
+            "period_end": period_end.astype(object),
+            "fiscal_year": fiscal["fiscal_year"].tolist(),
+            "fiscal_quarter": (
+                fiscal["fiscal_quarter"].tolist() if period_type == "quarter" else none
+            ),
+            "fiscal_month": (
+                fiscal["fiscal_month"].tolist() if period_type == "month" else none
+            ),
+        },
+        index=index,
+    )
+
+
+# ------------------------------------------------------------
+# Period labels ("Q3 FY24", "FY2023", "Apr-Jun 2024", "Jan 2024", dates)
+# ------------------------------------------------------------
+PERIOD_TYPES = ("month", "quarter", "year")
+# Grain of date-valued cells: one of PERIOD_TYPES, or inferred
+DATE_GRAINS = PERIOD_TYPES + ("auto",)
+
+_YEAR = r"'?(\d{4}|\d{2})"
+_NEXT_YEAR = r"(?:\s*[-/]\s*(\d{4}|\d{2}))?"
+_MONTH = r"([A-Z]{3,9})\.?"
+
+# Labels are matched upper-cased with whitespace collapsed
+QUARTER_LABEL = rf"^Q([1-4])\s*[-/,]?\s*(?:FY)?\s*{_YEAR}{_NEXT_YEAR}$"
+QUARTER_LABEL_YEAR_FIRST = rf"^(?:FY)?\s*{_YEAR}{_NEXT_YEAR}\s*[-/,]?\s*Q([1-4])$"
+FY_LABEL = rf"^FY\s*{_YEAR}{_NEXT_YEAR}$"
+YEAR_LABEL = r"^(\d{4})(?:\s*[-/]\s*(\d{4}))?$"
+MONTH_RANGE_LABEL = rf"^{_MONTH}\s*[-/]\s*{_MONTH}[\s,'-]*{_YEAR}$"
+MONTH_SPAN_LABEL = rf"^{_MONTH}[\s,'-]*{_YEAR}\s*[-/]\s*{_MONTH}[\s,'-]*{_YEAR}$"
+MONTH_LABEL = rf"^{_MONTH}[\s,'-]*{_YEAR}$"
+
+
+def _full_year(values: pd.Series) -> np.ndarray:
+    years = pd.to_numeric(values).to_numpy(dtype=np.int64)
+    # Two-digit years pivot like strptime's %y: 69 → 2069, 70 → 1970
+    return np.where(years < 100, years + np.where(years < 70, 2000, 1900), years)
+
+
+def _label_fiscal_year(
+    first: pd.Series,
+    second: pd.Series,
+    fiscal_year_start_month: int,
+) -> np.ndarray:
+    """
+    Fiscal year (= calendar year it starts in) named by a label.
+
+    - "FY24" / "2024": named by the year it ENDS in (fiscal_year_label()
+      renders the same name back)
+    - "FY2023-24": range, named by both years
+    """
+    start_year = _full_year(first)
+    ends_in = start_year - (fiscal_year_start_month > 1)
+
+    has_range = second.notna().to_numpy()
+    if not has_range.any():
+        return ends_in
+
+    next_year = _full_year(second.fillna(0))
+    valid = (next_year % 100) == ((start_year + 1) % 100)
+    if (has_range & ~valid).any():
+        bad = first[has_range & ~valid].index[0]
+        raise ValueError(f"Invalid fiscal year range: {first[bad]}-{second[bad]}")
+
+    return np.where(has_range, start_year, ends_in)
+
+
+def _month_index(month_token: pd.Series, year: pd.Series) -> pd.Series:
+    """
+    ("APR", "24") → months since 1970-01; NaN when the token is not a month.
+    """
+    month = month_token.str.lower().map(MONTH_NAME_TO_INDEX)
+    return (pd.Series(_full_year(year), index=year.index) - 1970) * 12 + month - 1
+
+
+def _date_grain_from_dates(dates: np.ndarray, fiscal_year_start_month: int) -> str:
+    """
+    Grain of date-valued cells (datetime64[D]) from their spacing.
+
+    - year: distinct months 12 apart, all on the first or last month of
+      a fiscal year (2023-03-31, 2024-03-31 with an April start)
+    - quarter: 3 months apart, all on the first or last month of a
+      fiscal quarter (2024-03-31, 2024-06-30, ...)
+    - month otherwise, and whenever the spacing is ambiguous (a single
+      month, several dates in one month)
+    """
+    days = np.unique(dates)
+    months = np.unique(days.astype("datetime64[M]").astype(np.int64))
+    if len(months) < 2 or len(months) < len(days):
+        return "month"
+
+    gaps = np.diff(months)
+    offset = (months % 12 + 1 - fiscal_year_start_month) % 12
+
+    for grain, length in (("year", 12), ("quarter", 3)):
+        if (gaps % length).any():
+            continue
+        position = offset % length
+        # All on period starts, or all on period ends
+        if (position == 0).all() or (position == length - 1).all():
+            return grain
+
+    return "month"
+
+
+def _parse_period_labels(
+    labels: pd.Series,
+    fiscal_year_start_month: int,
+    date_grain: str,
+) -> pd.DataFrame:
+    """
+    One row per label: period_type, fiscal_year, fiscal_quarter,
+    fiscal_month, period_start, period_end (datetime64[D]).
+
+    date_grain="auto": the grain of the date-valued labels is inferred
+    from their spacing; attrs["date_grain"] holds the grain used
+    (None when there are no dates).
+    """
+    n = len(labels)
+    index = labels.index
+
+    period_type = pd.Series([None] * n, index=index, dtype=object)
+    fiscal_year = pd.Series(0, index=index, dtype=np.int64)
+    fiscal_quarter = pd.Series(0, index=index, dtype=np.int64)
+    # Calendar month index (months since 1970-01) of a period's first month
+    first_month = pd.Series(np.nan, index=index)
+
+    text = labels.str.upper().str.replace(r"\s+", " ", regex=True).str.strip()
+
+    def unmatched():
+        return text[period_type.isna()]
+
+    # ---- Q3 FY24 / Q1 2024-25 / FY24 Q3 ----
+    for pattern, order in (
+        (QUARTER_LABEL, (0, 1, 2)),
+        (QUARTER_LABEL_YEAR_FIRST, (2, 0, 1)),
+    ):
+        found = unmatched().str.extract(pattern).dropna(subset=[order[0], order[1]])
+        if found.empty:
+            continue
+        q, y1, y2 = (found[i] for i in order)
+        period_type[found.index] = "quarter"
+        fiscal_year[found.index] = _label_fiscal_year(y1, y2, fiscal_year_start_month)
+        fiscal_quarter[found.index] = pd.to_numeric(q).to_numpy(dtype=np.int64)
+
+    # ---- FY2023 / FY23 / FY2023-24 / 2023 / 2023-2024 ----
+    for pattern in (FY_LABEL, YEAR_LABEL):
+        found = unmatched().str.extract(pattern).dropna(subset=[0])
+        if found.empty:
+            continue
+        period_type[found.index] = "year"
+        fiscal_year[found.index] = _label_fiscal_year(
+            found[0], found[1], fiscal_year_start_month
+        )
+
+    # ---- Apr-Jun 2024 / Apr 2023 - Mar 2024 / Jan 2024 ----
+    # Month counts decide the grain: 1 → month, 3 → quarter, 12 → year
+    spans = []
+
+    found = unmatched().str.extract(MONTH_RANGE_LABEL).dropna()
+    if not found.empty:
+        # The year belongs to the LAST month ("Nov-Jan 2024" ends Jan 2024)
+        last = _month_index(found[1], found[2])
+        months = (last - _month_index(found[0], found[2])) % 12 + 1
+        spans.append((last - months + 1, months))
+
+    found = unmatched().str.extract(MONTH_SPAN_LABEL).dropna()
+    if not found.empty:
+        first = _month_index(found[0], found[1])
+        spans.append((first, _month_index(found[2], found[3]) - first + 1))
+
+    found = unmatched().str.extract(MONTH_LABEL).dropna()
+    if not found.empty:
+        first = _month_index(found[0], found[1])
+        spans.append((first, pd.Series(1, index=first.index)))
+
+    span_grain = {1: "month", 3: "quarter", 12: "year"}
+    for first, months in spans:
+        first = first[first.notna() & months.notna()]
+        first = first[period_type[first.index].isna()]
+        grain = months[first.index].map(span_grain)
+        if grain.isna().any():
+            raise ValueError(
+                f"Period label '{labels[grain.index[grain.isna()][0]]}' does not "
+                "span a month, quarter or year"
+            )
+        period_type[first.index] = grain
+        first_month[first.index] = first
+
+    # ---- Everything else: dates, in the declared (or inferred) grain ----
+    rest = unmatched()
+    resolved_date_grain = None
+    if not rest.empty:
+        dates = pd.to_datetime(rest, format="ISO8601", errors="coerce")
+        if dates.isna().any():
+            bad = labels[rest.index[dates.isna()]].unique()[:5].tolist()
+            raise ValueError(f"Unrecognized period values: {bad}")
+
+        date_months = dates.to_numpy(dtype="datetime64[M]").astype(np.int64)
+        resolved_date_grain = (
+            _date_grain_from_dates(
+                dates.to_numpy(dtype="datetime64[D]"), fiscal_year_start_month
+            )
+            if date_grain == "auto"
+            else date_grain
+        )
+
+        period_type[rest.index] = resolved_date_grain
+        first_month[rest.index] = date_months
+
+    # Calendar months → fiscal year / quarter (vectorized, see above)
+    from_month = first_month.notna()
+    if from_month.any():
+        fiscal = derive_fiscal_arrays(
+            first_month[from_month].to_numpy(dtype=np.int64).astype("datetime64[M]"),
+            fiscal_year_start_month,
+        )
+        fiscal_year[from_month] = fiscal["fiscal_year"]
+        fiscal_quarter[from_month] = fiscal["fiscal_quarter"]
+
+    calendar_month = (first_month.fillna(0).astype(np.int64) % 12 + 1).to_numpy()
+
+    # Month ranges must line up with fiscal periods
+    labelled_range = from_month & period_type.isin(["quarter", "year"])
+    labelled_range &= ~labels.index.isin(rest.index)
+    offset = (calendar_month - fiscal_year_start_month) % 12
+    misaligned = labelled_range & (
+        ((period_type == "quarter") & (offset % 3 != 0))
+        | ((period_type == "year") & (offset != 0))
+    )
+    if misaligned.any():
+        raise ValueError(
+            f"Period label '{labels[misaligned].iloc[0]}' does not match a fiscal "
+            f"{period_type[misaligned].iloc[0]} (fiscal year starts in month "
+            f"{fiscal_year_start_month})"
+        )
+
+    period_start = np.empty(n, dtype="datetime64[D]")
+    period_end = np.empty(n, dtype="datetime64[D]")
+
+    for grain in PERIOD_TYPES:
+        mask = (period_type == grain).to_numpy()
+        if not mask.any():
+            continue
+        period_start[mask], period_end[mask] = derive_period_date_arrays(
+            grain,
+            fiscal_year=fiscal_year.to_numpy()[mask],
+            fiscal_quarter=fiscal_quarter.to_numpy()[mask],
+            fiscal_month=calendar_month[mask],
+            fiscal_year_start_month=fiscal_year_start_month,
+        )
+
+    parsed = pd.DataFrame(
+        {
+            "period_type": period_type.to_numpy(),
+            "period_start": period_start,
+            "period_end": period_end,
+            "fiscal_year": fiscal_year.to_numpy(),
+            "fiscal_quarter": fiscal_quarter.to_numpy(),
+            "fiscal_month": calendar_month,
+        },
+        index=index,
+    )
+    parsed.attrs["date_grain"] = resolved_date_grain
+    return parsed
+
+
+def _distinct_labels(period_values) -> tuple[pd.Series, np.ndarray]:
+    """
+    (distinct values as strings, codes mapping each row to one of them)
+    """
+    values = pd.Series(period_values)
+
+    if values.isna().any():
+        raise ValueError("period_date cannot be None")
+
+    if pd.api.types.is_float_dtype(values):
+        # Year columns read as floats (2023.0)
+        values = values.astype(np.int64)
+
+    codes, uniques = pd.factorize(values)
+    return pd.Series(uniques).astype(str), codes
+
+
+def infer_date_grain(period_values, fiscal_year_start_month: int) -> str:
+    """
+    Grain of the date-valued cells of a period column (labels are
+    ignored: they carry their own grain).
+
+    Quarter / year when the distinct dates are spaced 3 / 12 months
+    apart on fiscal period boundaries (quarter-end exports), month when
+    the spacing is ambiguous or there are no dates.
+    """
+    labels, _ = _distinct_labels(period_values)
+    parsed = _parse_period_labels(labels, fiscal_year_start_month, "auto")
+    return parsed.attrs["date_grain"] or "month"
+
+
+def parse_period_column(
+    period_values,
+    fiscal_year_start_month: int,
+    date_grain: str = "month",
+) -> pd.DataFrame:
+    """
+    Vectorized period parsing for a whole period column (labels or dates).
+
+    Accepts, per row:
+    - quarter labels: "Q3 FY24", "Q3 2024", "FY24 Q3", "Q1 FY2024-25"
+    - year labels: "FY2023", "FY23", "FY2023-24", "2023"
+    - month ranges: "Apr-Jun 2024" (quarter), "Apr 2023 - Mar 2024" (year)
+    - month labels: "Jan 2024", "Jan-24"
+    - dates (ISO): placed in the date_grain period containing them
+      (date_grain="auto": grain inferred with infer_date_grain's rules,
+      from the dates in THIS column)
+
+    Single-year fiscal labels are named by the year the fiscal year ENDS
+    in (FY24 = Apr 2023 - Mar 2024 when the fiscal year starts in April);
+    the returned fiscal_year is the year it STARTS in (2023). Render it
+    back with fiscal_year_label().
+
+    Each distinct value is parsed once (columns repeat labels a lot).
+
+    Returns derive_period_columns' frame plus a period_type column, so
+    mixed-grain files can be split with groupby("period_type").
+    """
+    if date_grain not in DATE_GRAINS:
+        raise ValueError(f"Unsupported period_type: {date_grain}")
+
+    values = pd.Series(period_values)
+    labels, codes = _distinct_labels(values)
+
+    parsed = _parse_period_labels(labels, fiscal_year_start_month, date_grain)
+    rows = parsed.take(codes)
+
+    period_type = rows["period_type"].to_numpy()
+
+    return pd.DataFrame(
+        {
+            "period_type": period_type,
+            # datetime64[D] → datetime.date
+            "period_start": rows["period_start"].to_numpy().astype("datetime64[D]").astype(object),
+            "period_end": rows["period_end"].to_numpy().astype("datetime64[D]").astype(object),
+            "fiscal_year": rows["fiscal_year"].tolist(),
+            # int or None (object: ints must not turn into floats)
+            "fiscal_quarter": pd.Series(
+                np.where(period_type == "quarter", rows["fiscal_quarter"], None),
+                index=values.index,
+                dtype=object,
+            ),
+            "fiscal_month": pd.Series(
+                np.where(period_type == "month", rows["fiscal_month"], None),
+                index=values.index,
+                dtype=object,
+            ),
+        },
+        index=values.index,
+    )
+
+
 def resolve_time_range(question: str, summaries: list):
     """
     Deterministically resolve time phrases like 'last quarter'
@@ -1,29 +1,349 @@
-import requests
-import time
+"""
+Local LLM (Ollama /api/generate) clients.
+
+- acall_llm(): async, for request handlers. Never blocks the event loop;
+  cancelling the awaiting task aborts the HTTP request (e.g. when the
+  /query client disconnects)
+- acall_llm_stream(): async iterator over response tokens as Ollama
+  generates them (retries only before the first token)
+- call_llm(): sync shim with the same behaviour, for ingestion-time and
+  other thread-bound callers
+
+Both clients:
+- Reuse pooled keep-alive connections (one client per process)
+- Allow at most LLM_MAX_CONCURRENCY generations in flight; further calls
+  queue (the local model serves one prompt at a time anyway)
+- Enforce a per-call deadline (LLM_DEADLINE seconds, or deadline=...)
+  covering queueing, every attempt and the backoff sleeps
+- Retry connection errors, 429 and 5xx up to LLM_MAX_RETRIES times,
+  backing off LLM_RETRY_BACKOFF × 2^attempt seconds
+
+Checked against a local stub server: tests/test_llm_client.py
+"""
+
+import asyncio
+import json
 import logging
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "llama3.2:3b"
+import os
+import threading
+import time
+
+import httpx
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+MODEL = os.getenv("LLM_MODEL", "llama3.2:3b")
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "10"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "600"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
 
 
 logger = logging.getLogger("llm")
 
-def call_llm(prompt):
-    t0 = time.time()
-    logger.info("LLM call started")
 
-    response = requests.post(
-        OLLAMA_URL,
-        json={
-            "model": MODEL,
-            "prompt": prompt,
-            "stream": False
-        },
-        timeout=600
+class LLMDeadlineExceeded(TimeoutError):
+    """The call did not finish within its deadline."""
+
+
+def _payload(prompt: str, model: str, stream: bool = False) -> dict:
+    return {"model": model, "prompt": prompt, "stream": stream}
+
+
+def _deadline_exceeded(deadline: float) -> LLMDeadlineExceeded:
+    return LLMDeadlineExceeded(f"LLM call exceeded its {deadline}s deadline")
+
+
+def _should_retry(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_SIZE,
+        max_keepalive_connections=LLM_POOL_SIZE,
     )
 
-    logger.info("LLM call finished", extra={
-        "duration_ms": int((time.time() - t0) * 1000)
-    })
 
-    response.raise_for_status()
-    return response.json()["response"]
+# ------------------------------------------------------------
+# Async client
+# ------------------------------------------------------------
+class AsyncLLMClient:
+    """
+    Pooled async client. Create (or first use) it inside the event loop
+    that will use it.
+    """
+
+    def __init__(
+        self,
+        url: str = OLLAMA_URL,
+        model: str = MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        deadline: float = LLM_DEADLINE,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_backoff: float = LLM_RETRY_BACKOFF,
+    ):
+        self.url = url
+        self.model = model
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            limits=_limits(),
+            # Read timeout is bounded by the call deadline instead
+            timeout=httpx.Timeout(None, connect=LLM_CONNECT_TIMEOUT),
+        )
+
+    async def generate(self, prompt: str, deadline: float | None = None) -> str:
+        deadline = self.deadline if deadline is None else deadline
+        t0 = time.perf_counter()
+
+        try:
+            async with asyncio.timeout(deadline):
+                async with self._semaphore:
+                    queued_ms = int((time.perf_counter() - t0) * 1000)
+                    text = await self._generate_with_retries(prompt)
+        except TimeoutError:
+            raise _deadline_exceeded(deadline) from None
+
+        logger.info("LLM call finished", extra={
+            "duration_ms": int((time.perf_counter() - t0) * 1000),
+            "queued_ms": queued_ms,
+        })
+        return text
+
+    async def _generate_with_retries(self, prompt: str) -> str:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._client.post(
+                    self.url, json=_payload(prompt, self.model)
+                )
+                response.raise_for_status()
+                return response.json()["response"]
+
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                if attempt == self.max_retries or not _should_retry(e):
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning("LLM call failed (%s), retrying in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+
+    async def stream(self, prompt: str, deadline: float | None = None):
+        """
+        Yield response tokens as they arrive (Ollama NDJSON stream).
+
+        The deadline covers the whole stream; failed attempts are retried
+        only while nothing has been yielded yet.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        expires = asyncio.get_running_loop().time() + deadline
+        t0 = time.perf_counter()
+        first_token_ms = None
+
+        try:
+            async with asyncio.timeout_at(expires):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            raise _deadline_exceeded(deadline) from None
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with asyncio.timeout_at(expires):
+                        response = await self._client.send(
+                            self._client.build_request(
+                                "POST",
+                                self.url,
+                                json=_payload(prompt, self.model, stream=True),
+                            ),
+                            stream=True,
+                        )
+                    try:
+                        if response.is_error:
+                            await response.aread()
+                            response.raise_for_status()
+
+                        lines = response.aiter_lines()
+                        while True:
+                            # No yield inside the timeout block
+                            async with asyncio.timeout_at(expires):
+                                line = await anext(lines, None)
+                            if line is None:
+                                break
+                            if not line.strip():
+                                continue
+
+                            chunk = json.loads(line)
+                            if chunk.get("response"):
+                                if first_token_ms is None:
+                                    first_token_ms = int((time.perf_counter() - t0) * 1000)
+                                yield chunk["response"]
+                            if chunk.get("done"):
+                                break
+                    finally:
+                        await response.aclose()
+                    break
+
+                except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                    if (
+                        first_token_ms is not None
+                        or attempt == self.max_retries
+                        or not _should_retry(e)
+                    ):
+                        raise
+                    delay = self.retry_backoff * 2 ** attempt
+                    logger.warning("LLM stream failed (%s), retrying in %.1fs", e, delay)
+                    async with asyncio.timeout_at(expires):
+                        await asyncio.sleep(delay)
+
+        except TimeoutError:
+            raise _deadline_exceeded(deadline) from None
+
+        finally:
+            self._semaphore.release()
+
+        logger.info("LLM stream finished", extra={
+            "duration_ms": int((time.perf_counter() - t0) * 1000),
+            "first_token_ms": first_token_ms,
+        })
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_async_client: AsyncLLMClient | None = None
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncLLMClient()
+    return _async_client
+
+
+async def acall_llm(prompt: str, deadline: float | None = None) -> str:
+    logger.info("LLM call started")
+    return await get_async_llm_client().generate(prompt, deadline=deadline)
+
+
+async def acall_llm_stream(prompt: str, deadline: float | None = None):
+    logger.info("LLM stream started")
+    async for token in get_async_llm_client().stream(prompt, deadline=deadline):
+        yield token
+
+
+async def close_llm_clients():
+    """
+    Shutdown hook: release pooled connections.
+    """
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    with _sync_client_lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+
+# ------------------------------------------------------------
+# Sync shim (ingestion / thread-bound callers)
+# ------------------------------------------------------------
+class SyncLLMClient:
+    """
+    Pooled sync client, thread-safe; same limits / deadline / retries
+    as AsyncLLMClient.
+    """
+
+    def __init__(
+        self,
+        url: str = OLLAMA_URL,
+        model: str = MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        deadline: float = LLM_DEADLINE,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_backoff: float = LLM_RETRY_BACKOFF,
+    ):
+        self.url = url
+        self.model = model
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._client = httpx.Client(limits=_limits())
+
+    def generate(self, prompt: str, deadline: float | None = None) -> str:
+        deadline = self.deadline if deadline is None else deadline
+        t0 = time.perf_counter()
+        expires = t0 + deadline
+
+        def remaining() -> float:
+            left = expires - time.perf_counter()
+            if left <= 0:
+                raise _deadline_exceeded(deadline)
+            return left
+
+        if not self._semaphore.acquire(timeout=remaining()):
+            raise _deadline_exceeded(deadline)
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    left = remaining()
+                    response = self._client.post(
+                        self.url,
+                        json=_payload(prompt, self.model),
+                        timeout=httpx.Timeout(
+                            left, connect=min(LLM_CONNECT_TIMEOUT, left)
+                        ),
+                    )
+                    response.raise_for_status()
+                    text = response.json()["response"]
+                    break
+
+                except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                    remaining()     # read timeouts end here once the deadline is hit
+                    if attempt == self.max_retries or not _should_retry(e):
+                        raise
+                    delay = self.retry_backoff * 2 ** attempt
+                    if delay >= remaining():
+                        raise
+                    logger.warning("LLM call failed (%s), retrying in %.1fs", e, delay)
+                    time.sleep(delay)
+        finally:
+            self._semaphore.release()
+
+        logger.info("LLM call finished", extra={
+            "duration_ms": int((time.perf_counter() - t0) * 1000)
+        })
+        return text
+
+    def close(self):
+        self._client.close()
+
+
+_sync_client: SyncLLMClient | None = None
+_sync_client_lock = threading.Lock()
+
+
+def get_sync_llm_client() -> SyncLLMClient:
+    global _sync_client
+    if _sync_client is None:
+        with _sync_client_lock:
+            if _sync_client is None:
+                _sync_client = SyncLLMClient()
+    return _sync_client
+
+
+def call_llm(prompt, deadline: float | None = None):
+    logger.info("LLM call started")
+    return get_sync_llm_client().generate(prompt, deadline=deadline)
@@ -5,6 +5,10 @@ from app.api.company_baseline import router as company_baseline_router
 from app.api.company_overview import router as company_overview_router
 from app.api.upload import router as upload_router
 from app.api.query import router as query_router
+from app.db.connection import close_db_pool
+from app.ingestion.ingestion_jobs import shutdown_ingestion_workers
+from app.llm.local_llm import close_llm_clients
+from app.retrieval.retrieve_financial_evidence import warm_query_embedding_cache
 
 app = FastAPI(
     title="AI CFO Dashboard – Project Jelly",
@@ -37,3 +41,8 @@ app.include_router(upload_router)
 app.include_router(query_router)
 app.include_router(company_baseline_router)
 app.include_router(company_overview_router)
+
+app.add_event_handler("startup", warm_query_embedding_cache)
+app.add_event_handler("shutdown", shutdown_ingestion_workers)
+app.add_event_handler("shutdown", close_llm_clients)
+app.add_event_handler("shutdown", close_db_pool)
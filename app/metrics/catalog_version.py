@@ -0,0 +1,58 @@
+"""
+Metric catalog version (metric_catalog_version.version).
+
+Bumped by triggers on metric_definitions / metric_dependencies.
+In-process reference-data caches compare against it and reload on change.
+
+The row is read at most once per METRIC_CATALOG_CHECK_INTERVAL seconds
+per process, so caches may serve a changed catalog for up to that long.
+"""
+
+import os
+import threading
+import time
+
+from app.db.connection import get_db_connection
+
+
+METRIC_CATALOG_CHECK_INTERVAL = float(os.getenv("METRIC_CATALOG_CHECK_INTERVAL", "30"))
+
+_lock = threading.Lock()
+_version: int | None = None
+_checked_at = 0.0
+
+
+def _read_version(conn) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT version FROM metric_catalog_version WHERE id = 1;")
+        row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def get_metric_catalog_version(conn=None, force: bool = False) -> int:
+    """
+    Current catalog version (throttled).
+
+    Uses conn when given, otherwise borrows a pooled connection.
+    """
+    global _version, _checked_at
+
+    with _lock:
+        fresh = time.monotonic() - _checked_at < METRIC_CATALOG_CHECK_INTERVAL
+        if _version is not None and fresh and not force:
+            return _version
+
+    if conn is not None:
+        version = _read_version(conn)
+    else:
+        conn = get_db_connection()
+        try:
+            version = _read_version(conn)
+        finally:
+            conn.close()
+
+    with _lock:
+        _version = version
+        _checked_at = time.monotonic()
+
+    return version
@@ -0,0 +1,209 @@
+"""
+Per-company metric rollups (company_metric_rollups).
+
+One row per (company_id, metric_id) holding the components every
+aggregation_type needs:
+
+- value_sum / value_count → sum, avg (ratio metrics are averaged)
+- last_value / last_period_end → last (latest period_end wins; ties go to
+  the most recently inserted fact)
+
+Maintained incrementally inside the ingestion transaction from the facts
+that were actually inserted (bulk_load_facts), so reads never aggregate
+financial_facts.
+
+Usage:
+    python -m app.metrics.company_rollups [--company-id <uuid>] [--fix]
+"""
+
+import argparse
+
+from app.db.connection import get_db_connection
+
+
+# ------------------------------------------------------------
+# Incremental maintenance
+# ------------------------------------------------------------
+def apply_fact_delta(cur, company_id: str, delta_table: str):
+    """
+    Fold newly inserted facts into the company's rollups.
+
+    delta_table has (id, period_id, metric_id, value) of the inserted facts.
+    Runs inside the caller's transaction.
+    """
+    cur.execute(
+        f"""
+        WITH delta AS (
+            SELECT
+                d.metric_id,
+                SUM(d.value) AS value_sum,
+                COUNT(d.value) AS value_count,
+                (array_agg(d.value ORDER BY p.period_end DESC, d.id DESC))[1]
+                    AS last_value,
+                MAX(p.period_end) AS last_period_end
+            FROM {delta_table} d
+            JOIN financial_periods p ON p.id = d.period_id
+            GROUP BY d.metric_id
+        )
+        INSERT INTO company_metric_rollups AS r (
+            company_id,
+            metric_id,
+            value_sum,
+            value_count,
+            last_value,
+            last_period_end,
+            updated_at
+        )
+        SELECT
+            %s,
+            metric_id,
+            value_sum,
+            value_count,
+            last_value,
+            last_period_end,
+            now()
+        FROM delta
+        ON CONFLICT (company_id, metric_id)
+        DO UPDATE SET
+            value_sum = CASE
+                WHEN excluded.value_count = 0 THEN r.value_sum
+                ELSE COALESCE(r.value_sum, 0) + excluded.value_sum
+            END,
+            value_count = r.value_count + excluded.value_count,
+            last_value = CASE
+                WHEN r.last_period_end IS NULL
+                  OR excluded.last_period_end >= r.last_period_end
+                THEN excluded.last_value
+                ELSE r.last_value
+            END,
+            last_period_end = GREATEST(r.last_period_end, excluded.last_period_end),
+            updated_at = now();
+        """,
+        (company_id,),
+    )
+
+
+# ------------------------------------------------------------
+# Full recompute (backfill / consistency checks)
+# ------------------------------------------------------------
+RECOMPUTE_SQL = """
+    SELECT
+        f.company_id,
+        f.metric_id,
+        SUM(f.value) AS value_sum,
+        COUNT(f.value) AS value_count,
+        (array_agg(
+            f.value ORDER BY p.period_end DESC, f.created_at DESC, f.id DESC
+        ))[1] AS last_value,
+        MAX(p.period_end) AS last_period_end
+    FROM financial_facts f
+    JOIN financial_periods p ON p.id = f.period_id
+    WHERE (%(company_id)s::uuid IS NULL OR f.company_id = %(company_id)s::uuid)
+    GROUP BY f.company_id, f.metric_id
+"""
+
+
+def rebuild_company_rollups(cur, company_id: str | None = None):
+    """
+    Replace rollups with a full recompute (one company, or all).
+    """
+    cur.execute(
+        """
+        DELETE FROM company_metric_rollups
+        WHERE (%(company_id)s::uuid IS NULL OR company_id = %(company_id)s::uuid);
+        """,
+        {"company_id": company_id},
+    )
+    cur.execute(
+        f"""
+        INSERT INTO company_metric_rollups (
+            company_id,
+            metric_id,
+            value_sum,
+            value_count,
+            last_value,
+            last_period_end
+        )
+        {RECOMPUTE_SQL};
+        """,
+        {"company_id": company_id},
+    )
+
+
+def check_rollup_consistency(company_id: str | None = None) -> list[dict]:
+    """
+    Compare stored rollups against a full recompute.
+
+    Returns one entry per (company_id, metric_id) that differs
+    (missing, extra or mismatched columns).
+    """
+    columns = ("value_sum", "value_count", "last_value", "last_period_end")
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(RECOMPUTE_SQL, {"company_id": company_id})
+            expected = {(r[0], r[1]): r[2:] for r in cur.fetchall()}
+
+            cur.execute(
+                """
+                SELECT
+                    company_id,
+                    metric_id,
+                    value_sum,
+                    value_count,
+                    last_value,
+                    last_period_end
+                FROM company_metric_rollups
+                WHERE (%(company_id)s::uuid IS NULL OR company_id = %(company_id)s::uuid);
+                """,
+                {"company_id": company_id},
+            )
+            stored = {(r[0], r[1]): r[2:] for r in cur.fetchall()}
+    finally:
+        conn.close()
+
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want, have = expected.get(key), stored.get(key)
+
+        if want is None or have is None:
+            diff = {"problem": "missing" if have is None else "extra"}
+        else:
+            diff = {
+                col: {"expected": w, "stored": h}
+                for col, w, h in zip(columns, want, have)
+                if w != h
+            }
+            if not diff:
+                continue
+
+        mismatches.append({"company_id": key[0], "metric_id": key[1], **diff})
+
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fix", action="store_true")
+    parser.add_argument("--company-id")
+    args = parser.parse_args()
+
+    mismatches = check_rollup_consistency(args.company_id)
+    for m in mismatches:
+        print(m)
+    print(f"{len(mismatches)} rollup mismatches")
+
+    if mismatches and args.fix:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                rebuild_company_rollups(cur, args.company_id)
+            conn.commit()
+        finally:
+            conn.close()
+        print("Rollups rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+In-process cache of the metric dependency graph + KPI hierarchies.
+
+- Graph loaded once per metric catalog version (see catalog_version)
+- Per-root BFS levels (transitive closure by depth) precomputed at load
+- Hierarchies memoized by (sorted roots, max_depth)
+
+Same output as load_metric_dependency_graph() + build_kpi_hierarchy().
+"""
+
+import os
+import threading
+
+from app.cache.lru_cache import LRUCache
+from app.db.connection import get_db_connection
+from app.metrics.catalog_version import get_metric_catalog_version
+from app.metrics.dependency_graph import load_metric_dependency_graph
+
+
+KPI_HIERARCHY_CACHE_SIZE = int(os.getenv("KPI_HIERARCHY_CACHE_SIZE", "512"))
+DEFAULT_MAX_DEPTH = 2
+
+
+class DependencyCatalog:
+    def __init__(self, version: int, graph: dict):
+        self.version = version
+        self.graph = graph
+
+        self._levels = {}           # (root, max_depth) → tuple[frozenset, ...]
+        self._levels_lock = threading.Lock()
+        self._hierarchies = LRUCache(maxsize=KPI_HIERARCHY_CACHE_SIZE)
+
+        # Precompute closures for every known metric at the default depth
+        for metric in set(graph) | {c for cs in graph.values() for c in cs}:
+            self.levels(metric, DEFAULT_MAX_DEPTH)
+
+    def levels(self, root: str, max_depth: int) -> tuple:
+        """
+        Metrics first reached at depth 1..max_depth from root (BFS).
+        """
+        key = (root, max_depth)
+        levels = self._levels.get(key)
+        if levels is not None:
+            return levels
+
+        visited = {root}
+        current = [root]
+        result = []
+
+        for _ in range(max_depth):
+            next_level = []
+            for metric in current:
+                for dep in self.graph.get(metric, []):
+                    if dep not in visited:
+                        visited.add(dep)
+                        next_level.append(dep)
+            result.append(frozenset(next_level))
+            current = next_level
+
+        levels = tuple(result)
+        with self._levels_lock:
+            self._levels[key] = levels
+        return levels
+
+    def kpi_hierarchy(self, root_kpis, max_depth: int = DEFAULT_MAX_DEPTH) -> dict:
+        key = (tuple(sorted(set(root_kpis))), max_depth)
+
+        cached = self._hierarchies.get(key)
+        if cached is None:
+            main = set(key[0])
+            first, second = set(), set()
+
+            for root in main:
+                levels = self.levels(root, max_depth)
+                if len(levels) > 0:
+                    first |= levels[0]
+                if len(levels) > 1:
+                    second |= levels[1]
+
+            # ---- precedence cleanup (same as build_kpi_hierarchy)
+            first -= main
+            second -= main | first
+
+            cached = (tuple(sorted(main)), tuple(sorted(first)), tuple(sorted(second)))
+            self._hierarchies.set(key, cached)
+
+        main, first, second = cached
+        return {
+            "main": list(main),
+            "first_degree": list(first),
+            "second_degree": list(second),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "metrics_with_dependencies": len(self.graph),
+            "hierarchies": self._hierarchies.stats(),
+        }
+
+
+# ------------------------------------------------------------
+# Process-wide instance
+# ------------------------------------------------------------
+_catalog: DependencyCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_dependency_catalog(conn=None) -> DependencyCatalog:
+    """
+    Current dependency catalog, reloaded when the catalog version moved.
+    """
+    global _catalog
+
+    version = get_metric_catalog_version(conn)
+    catalog = _catalog
+    if catalog is not None and catalog.version == version:
+        return catalog
+
+    with _catalog_lock:
+        if _catalog is None or _catalog.version != version:
+            if conn is not None:
+                graph = load_metric_dependency_graph(conn)
+            else:
+                conn = get_db_connection()
+                try:
+                    graph = load_metric_dependency_graph(conn)
+                finally:
+                    conn.close()
+            _catalog = DependencyCatalog(version, graph)
+        return _catalog
+
+
+def invalidate_dependency_catalog():
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+
+
+def get_dependency_catalog_stats() -> dict | None:
+    catalog = _catalog
+    return catalog.stats() if catalog is not None else None
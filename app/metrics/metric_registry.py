@@ -1,13 +1,201 @@
-import psycopg2
+"""
+In-memory metric registry (metric_definitions + statement_types).
+
+- Every definition loaded in ONE query, indexed by key, id,
+  statement type and allowed grain
+- Process-wide instance; lookups cost zero round trips
+- Reloaded when the metric catalog version moves (see catalog_version),
+  when older than METRIC_REGISTRY_TTL seconds, or on demand
+  (refresh_metric_registry)
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
 from app.db.connection import get_db_connection
+from app.metrics.catalog_version import get_metric_catalog_version
+
+
+METRIC_REGISTRY_TTL = float(os.getenv("METRIC_REGISTRY_TTL", "3600"))
+
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    id: str
+    metric_key: str
+    display_name: str
+    statement_type_id: str
+    statement_type: str | None      # statement_types.name, lower-cased
+    unit: str | None
+    polarity: str | None
+    is_derived: bool
+    description: str | None
+    aggregation_type: str | None
+    metric_category: str | None
+    allowed_grains: tuple
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "metric_key": self.metric_key,
+            "display_name": self.display_name,
+            "statement_type_id": self.statement_type_id,
+            "statement_type": self.statement_type,
+            "unit": self.unit,
+            "polarity": self.polarity,
+            "is_derived": self.is_derived,
+            "description": self.description,
+            "aggregation_type": self.aggregation_type,
+            "metric_category": self.metric_category,
+            "allowed_grains": list(self.allowed_grains),
+        }
+
+
+class MetricRegistry:
+    def __init__(self, definitions: list[MetricDefinition], version: int | None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        self._by_key = {d.metric_key: d for d in definitions}
+        self._by_id = {str(d.id): d for d in definitions}
+
+        by_statement = defaultdict(list)
+        by_grain = defaultdict(list)
+        for d in sorted(definitions, key=lambda d: d.metric_key):
+            if d.statement_type:
+                by_statement[d.statement_type].append(d)
+            for grain in d.allowed_grains:
+                by_grain[grain].append(d)
+
+        self._by_statement = {k: tuple(v) for k, v in by_statement.items()}
+        self._by_grain = {k: tuple(v) for k, v in by_grain.items()}
+
+    # --------------------------------------------------------
+    # Lookups
+    # --------------------------------------------------------
+    def get(self, metric_key: str) -> MetricDefinition | None:
+        return self._by_key.get(metric_key)
+
+    def get_by_id(self, metric_id) -> MetricDefinition | None:
+        return self._by_id.get(str(metric_id))
+
+    def id_of(self, metric_key: str):
+        d = self._by_key.get(metric_key)
+        return d.id if d else None
+
+    def statement_of(self, metric_key: str) -> str | None:
+        d = self._by_key.get(metric_key)
+        return d.statement_type if d else None
+
+    def for_statement(self, statement_type: str) -> tuple:
+        return self._by_statement.get(statement_type.lower(), ())
+
+    def for_grain(self, grain: str) -> tuple:
+        return self._by_grain.get(grain, ())
+
+    def keys(self) -> list[str]:
+        return list(self._by_key)
+
+    def ids_by_key(self) -> dict:
+        return {k: d.id for k, d in self._by_key.items()}
+
+    def as_canonical_metrics(self) -> list[dict]:
+        """
+        Definitions in the dict shape normalization / LLM mapping expect.
+        """
+        return [d.as_dict() for d in self._by_key.values()]
+
+    def __contains__(self, metric_key: str) -> bool:
+        return metric_key in self._by_key
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+
+# ------------------------------------------------------------
+# Loading
+# ------------------------------------------------------------
+def load_metric_registry(conn, version: int | None = None) -> MetricRegistry:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT
+                md.id,
+                md.metric_key,
+                md.display_name,
+                md.statement_type_id,
+                lower(st.name),
+                md.unit,
+                md.polarity,
+                COALESCE(md.is_derived, false),
+                md.description,
+                md.aggregation_type,
+                md.metric_category,
+                md.allowed_grains
+            FROM metric_definitions md
+            LEFT JOIN statement_types st
+              ON st.id = md.statement_type_id
+            ORDER BY md.metric_key;
+            """
+        )
+        rows = cur.fetchall()
+
+    definitions = [
+        MetricDefinition(*row[:11], allowed_grains=tuple(row[11] or ()))
+        for row in rows
+    ]
+    return MetricRegistry(definitions, version)
+
+
+_registry: MetricRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_metric_registry(conn=None, force_refresh: bool = False) -> MetricRegistry:
+    """
+    Process-wide registry, reloaded on version change / TTL / force_refresh.
+
+    conn (optional) is used for the version check and reload instead of
+    borrowing a pooled connection.
+    """
+    global _registry
+
+    version = get_metric_catalog_version(conn)
+    registry = _registry
+    if (
+        registry is not None
+        and not force_refresh
+        and registry.version == version
+        and time.monotonic() - registry.loaded_at < METRIC_REGISTRY_TTL
+    ):
+        return registry
+
+    with _registry_lock:
+        registry = _registry
+        if (
+            force_refresh
+            or registry is None
+            or registry.version != version
+            or time.monotonic() - registry.loaded_at >= METRIC_REGISTRY_TTL
+        ):
+            if conn is not None:
+                registry = load_metric_registry(conn, version)
+            else:
+                conn = get_db_connection()
+                try:
+                    registry = load_metric_registry(conn, version)
+                finally:
+                    conn.close()
+            _registry = registry
+        return registry
+
+
+def refresh_metric_registry() -> MetricRegistry:
+    return get_metric_registry(force_refresh=True)
+
 
 def get_all_metric_keys() -> list[str]:
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT metric_key FROM metric_definitions;"
-            )
-            return [r[0] for r in cur.fetchall()]
-    finally:
-        conn.close()
+    return get_metric_registry().keys()
@@ -4,6 +4,7 @@ from app.contracts.severity import Severity
 from app.normalization.llm_eligibility import build_llm_mapping_candidates
 from app.normalization.llm_validation import validate_llm_output
 from app.normalization.metadata_flags import detect_provenance_flags
+from app.normalization.schema_definitions import CANONICAL_FIELDS
 
 logger = logging.getLogger("column_mapping")
 
@@ -42,7 +43,68 @@ def score_match(source_col: str, alias: str) -> int:
     return 0
 
 
-def map_columns(source_columns, canonical_fields):
+# ------------------------------------------------------------
+# Alias index: normalized alias → canonical field(s), O(1) lookup
+# ------------------------------------------------------------
+class AliasIndex:
+    """
+    Hash index over canonical field aliases (normalized once, at build).
+
+    - lookup(column) normalizes the column ONCE and does one dict probe
+    - An alias listed under several fields yields several candidates
+      (→ ambiguous, exactly as the pairwise scan reported it)
+    - with_aliases() layers extra aliases (e.g. one tenant's headers)
+      on top: a layered alias replaces the base entry for that alias,
+      everything else falls through to the base index
+    """
+
+    def __init__(self, entries: dict, base: "AliasIndex | None" = None):
+        self._entries = entries
+        self._base = base
+
+    @classmethod
+    def from_fields(cls, canonical_fields) -> "AliasIndex":
+        entries = {}
+        for field in canonical_fields:
+            for alias in field.aliases:
+                entries.setdefault(normalize_text(alias), []).append(field.name)
+        return cls({k: tuple(v) for k, v in entries.items()})
+
+    def with_aliases(self, aliases_by_field: dict) -> "AliasIndex":
+        """
+        aliases_by_field: {canonical_field_name: [alias, ...]}
+        """
+        entries = {}
+        for field_name, aliases in aliases_by_field.items():
+            for alias in aliases:
+                entries.setdefault(normalize_text(alias), []).append(field_name)
+        return AliasIndex({k: tuple(v) for k, v in entries.items()}, base=self)
+
+    def lookup_normalized(self, key: str) -> tuple:
+        if key in self._entries:
+            return self._entries[key]
+        if self._base is not None:
+            return self._base.lookup_normalized(key)
+        return ()
+
+    def lookup(self, source_col: str) -> tuple:
+        return self.lookup_normalized(normalize_text(source_col))
+
+
+DEFAULT_ALIAS_INDEX = AliasIndex.from_fields(CANONICAL_FIELDS)
+
+
+def get_alias_index(canonical_fields) -> AliasIndex:
+    """
+    Prebuilt index for CANONICAL_FIELDS; any other field list is indexed
+    on the spot (once per call, not per column).
+    """
+    if canonical_fields is CANONICAL_FIELDS:
+        return DEFAULT_ALIAS_INDEX
+    return AliasIndex.from_fields(canonical_fields)
+
+
+def map_columns(source_columns, canonical_fields, alias_index=None):
     """
     Deterministic column mapping.
 
@@ -50,19 +112,20 @@ def map_columns(source_columns, canonical_fields):
     1. Exact normalized match only → mapped
     2. Multiple exact matches → ambiguous
     3. No exact matches → unmapped
+
+    alias_index: optional AliasIndex (e.g. with tenant aliases layered
+    on); defaults to the index of canonical_fields.
     """
 
+    if alias_index is None:
+        alias_index = get_alias_index(canonical_fields)
+
     mapped = []
     ambiguous = []
     unmapped = []
 
     for src in source_columns:
-        matches = []
-
-        for field in canonical_fields:
-            for alias in field.aliases:
-                if score_match(src, alias) == 100:
-                    matches.append(field.name)
+        matches = list(alias_index.lookup(src))
 
         if not matches:
             unmapped.append(src)
@@ -79,9 +142,57 @@ def map_columns(source_columns, canonical_fields):
                 "candidates": matches,
             })
 
+    mapped, duplicates = resolve_duplicate_mappings(mapped, canonical_fields)
+    ambiguous.extend(duplicates)
+
     return mapped, ambiguous, unmapped
 
 
+def resolve_duplicate_mappings(mapped, canonical_fields):
+    """
+    Several raw columns mapped to ONE canonical field (e.g. "Date" and
+    "Fiscal Year" → period_date): keep the column whose alias comes
+    first in the field's alias list (aliases not listed, e.g. tenant
+    aliases, rank last; ties keep column order). The others are
+    reported as ambiguous and left unrenamed.
+
+    Returns (mapped, demoted ambiguous entries).
+    """
+    alias_rank = {
+        field.name: {
+            normalize_text(alias): rank
+            for rank, alias in enumerate(field.aliases)
+        }
+        for field in canonical_fields
+    }
+
+    by_field = {}
+    for m in mapped:
+        by_field.setdefault(m["canonical_field"], []).append(m)
+
+    kept = []
+    duplicates = []
+
+    for field_name, group in by_field.items():
+        ranks = alias_rank.get(field_name, {})
+        winner = min(
+            group,
+            key=lambda m: ranks.get(normalize_text(m["raw_column"]), len(ranks)),
+        )
+        kept.append(winner)
+
+        for m in group:
+            if m is not winner:
+                duplicates.append({
+                    "raw_column": m["raw_column"],
+                    "candidates": (field_name,),
+                    "kept": winner["raw_column"],
+                })
+
+    kept_ids = {id(m) for m in kept}
+    return [m for m in mapped if id(m) in kept_ids], duplicates
+
+
 
 def normalize_columns(
     raw_df,
@@ -89,6 +200,7 @@ def normalize_columns(
     source_metadata,
     canonical_metrics,   # REQUIRED (schema-backed)
     llm_mapper=None,     # OPTIONAL (advisory only)
+    alias_index=None,    # OPTIONAL (AliasIndex, e.g. tenant aliases layered on)
 ):
     source_columns = list(raw_df.columns)
 
@@ -105,7 +217,8 @@ def normalize_columns(
     # ------------------------------------------------------------
     mapped, ambiguous, unmapped = map_columns(
         source_columns,
-        canonical_fields
+        canonical_fields,
+        alias_index=alias_index,
     )
 
     logger.info(
@@ -200,6 +313,15 @@ def normalize_columns(
     # 4. Apply validated LLM mappings
     # ------------------------------------------------------------
     for s in validated_suggestions:
+        # Never a second column for an already mapped field
+        if any(m["canonical_field"] == s["canonical_metric"] for m in mapped):
+            logger.info(
+                "LLM column mapping skipped | raw_column=%s | canonical_metric=%s | reason=already_mapped",
+                s["raw_column"],
+                s["canonical_metric"],
+            )
+            continue
+
         mapped.append({
             "raw_column": s["raw_column"],
             "canonical_field": s["canonical_metric"],
@@ -244,11 +366,19 @@ def normalize_columns(
         })
 
     for amb in ambiguous:
+        if "kept" in amb:
+            description = (
+                f"Also maps to {amb['candidates'][0]}; "
+                f"column '{amb['kept']}' is used instead"
+            )
+        else:
+            description = f"Ambiguous mapping candidates: {amb['candidates']}"
+
         issues.append({
             "issue_type": "ambiguous_column",
             "column": amb["raw_column"],
             "severity": Severity.MEDIUM.value,
-            "description": f"Ambiguous mapping candidates: {amb['candidates']}",
+            "description": description,
         })
 
     provenance_flags = detect_provenance_flags(source_metadata)
@@ -34,12 +34,19 @@ CANONICAL_FIELDS: List[CanonicalField] = [
     name="period_date",
     required=True,
     data_type="date",
+    # Listed by priority: when several columns match (e.g. "Date" and
+    # "Fiscal Year"), the one with the earliest alias is used
     aliases=[
         "date",
-        "month",
-        "period",
-        "period end",
         "period_date",
+        "period end",
+        "period",
+        "fiscal period",
+        "month",
+        "quarter",
+        "fiscal quarter",
+        "year",
+        "fiscal year",
     ],
 ),
 
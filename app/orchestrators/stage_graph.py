@@ -0,0 +1,100 @@
+# app/orchestrators/stage_graph.py
+
+"""
+Minimal async DAG runner for request pipelines.
+
+- A stage = name + callable + names of the stages it depends on
+- The callable receives its dependencies' results as keyword arguments
+- Sync callables run in the default thread pool (asyncio.to_thread),
+  async callables run natively, so blocking work never holds the event loop
+- A stage starts as soon as all its dependencies finish; independent
+  stages run concurrently
+- Each stage runs at most once per graph; start() kicks it off eagerly,
+  result() awaits it (starting it and its dependencies if needed)
+- Per-stage timings (ms, relative to graph creation) for debug output
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Tuple
+
+
+class StageGraph:
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._timings: Dict[str, dict] = {}
+        self._t0 = time.perf_counter()
+
+    def add(self, name: str, fn: Callable, deps: Tuple[str, ...] = ()):
+        if name in self._stages:
+            raise ValueError(f"Stage already defined: {name}")
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self._stages[name] = (fn, tuple(deps))
+        return self
+
+    # --------------------------------------------------------
+    # Execution
+    # --------------------------------------------------------
+    def start(self, *names: str):
+        """
+        Schedule stages (and their dependencies) without waiting.
+        """
+        for name in names:
+            self._task(name)
+        return self
+
+    async def result(self, name: str) -> Any:
+        return await self._task(name)
+
+    def _task(self, name: str) -> asyncio.Task:
+        task = self._tasks.get(name)
+        if task is None:
+            fn, deps = self._stages[name]
+            dep_tasks = {dep: self._task(dep) for dep in deps}
+            task = asyncio.ensure_future(self._run(name, fn, dep_tasks))
+            self._tasks[name] = task
+        return task
+
+    async def _run(self, name: str, fn: Callable, dep_tasks: dict) -> Any:
+        kwargs = {}
+        for dep, task in dep_tasks.items():
+            kwargs[dep] = await task
+
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(fn):
+                return await fn(**kwargs)
+            return await asyncio.to_thread(fn, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            self._timings[name] = {
+                "start_ms": round((started - self._t0) * 1000, 1),
+                "duration_ms": round((finished - started) * 1000, 1),
+            }
+
+    async def close(self):
+        """
+        Cancel stages nobody awaited and collect their exceptions.
+
+        Threads already running finish in the background; their results
+        are discarded.
+        """
+        pending = [t for t in self._tasks.values() if not t.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    # --------------------------------------------------------
+    # Debug
+    # --------------------------------------------------------
+    def timings(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self._t0) * 1000, 1),
+            "stages": dict(
+                sorted(self._timings.items(), key=lambda kv: kv[1]["start_ms"])
+            ),
+        }
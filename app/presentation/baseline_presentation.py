@@ -3,9 +3,41 @@ from app.presentation.presentation_builder import build_presentation
 from app.presentation.presentation_schema import PresentationIntent
 from app.presentation.chart_intents import ChartIntent
 from app.db.connection import get_db_connection
+from app.cache.presentation_cache import get_presentation_cache
+from app.ingestion.ingest_company import get_company_data_version
 
 
-def get_company_baseline(company_id: str) -> dict:
+# Bump when the baseline payload shape / root KPIs change
+BASELINE_CACHE_SCHEMA = "v1"
+
+
+def baseline_cache_key(company_id: str, data_version) -> str:
+    return f"baseline:{BASELINE_CACHE_SCHEMA}:{company_id}:{data_version}"
+
+
+def get_company_baseline(company_id: str, data_version=None) -> dict:
+    """
+    Baseline presentation, cached per (company_id, data_version).
+
+    - data_version is read from companies when not given
+    - A new ingestion bumps data_version → next call rebuilds
+    """
+
+    if data_version is None:
+        data_version = get_company_data_version(company_id)
+
+    cache = get_presentation_cache()
+    key = baseline_cache_key(company_id, data_version)
+
+    presentation = cache.get(key)
+    if presentation is None:
+        presentation = build_company_baseline(company_id)
+        cache.set(key, presentation)
+
+    return presentation
+
+
+def build_company_baseline(company_id: str) -> dict:
     """
     Deterministic baseline dashboard presentation.
 
@@ -1,11 +1,18 @@
 from app.presentation.chart_intents import ChartIntent
 
 
-def resolve_chart_spec(metric: str, intent: ChartIntent | None, rows: list) -> dict:
+def resolve_chart_spec(
+    metric: str,
+    intent: ChartIntent | None,
+    rows: list | None = None,
+    period_labels=None,
+) -> dict:
     """
     Maps presentation intent → visualization grammar.
     Chart type choice is deterministic and data-driven.
 
+    Periods come from row dicts (rows) or a columnar series (period_labels).
+
     SAFETY RULE:
     - intent may be None → default to TREND
     """
@@ -36,7 +43,9 @@ def resolve_chart_spec(metric: str, intent: ChartIntent | None, rows: list) -> d
         }
 
     if intent == ChartIntent.CONTRIBUTION:
-        has_multiple_periods = len({r.get("period_label") for r in rows}) > 1
+        if period_labels is None:
+            period_labels = [r.get("period_label") for r in rows or []]
+        has_multiple_periods = len(set(period_labels)) > 1
 
         if has_multiple_periods:
             return {
@@ -0,0 +1,224 @@
+"""
+Rule-based presentation-intent planner (fast path before the planner LLM).
+
+Most questions name their KPIs outright ("How is revenue?"): the
+deterministic KPI hints + resolved statements already fix the root KPIs,
+and the wording fixes the chart intent. The planner builds the
+PresentationIntent from those signals and scores how sure it is:
+
+- KPIs named in the question and allowed for the primary statement
+  (STATEMENT_KPIS ∩ metrics present in the evidence) → high
+- explicit intent wording ("trend", "compare", "mix", "vs budget") → higher
+- no named KPI, overview questions, conflicting intent wording → low
+
+Below PLANNER_CONFIDENCE_THRESHOLD the caller falls back to the LLM.
+Intent choices follow the planner prompt's preferences (one trend,
+snapshot for balances, contribution for mixes, comparison for profit /
+margin / cost).
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+from app.presentation.available_metrics import extract_available_metrics
+from app.presentation.kpi_registry import STATEMENT_KPIS
+from app.presentation.presentation_schema import IntentEnum, PresentationIntent
+
+
+PLANNER_CONFIDENCE_THRESHOLD = float(os.getenv("PLANNER_CONFIDENCE_THRESHOLD", "0.7"))
+
+# Checked in order; whole-word matches on the lower-cased question
+INTENT_PHRASES = {
+    IntentEnum.variance: (
+        "variance", "vs budget", "versus budget", "against budget",
+        "vs plan", "against plan", "over budget", "under budget", "deviation",
+    ),
+    IntentEnum.contribution: (
+        "mix", "breakdown", "break down", "split", "share of",
+        "contribution", "composition",
+    ),
+    IntentEnum.comparison: (
+        "compare", "comparison", "vs", "versus", "year over year",
+        "quarter over quarter", "month over month", "yoy", "qoq", "mom",
+    ),
+    IntentEnum.snapshot: (
+        "current", "latest", "right now", "today", "how much", "what is our",
+    ),
+    IntentEnum.trend: (
+        "trend", "over time", "growth", "growing", "trajectory",
+        "how is", "how are", "how has", "how have", "history",
+    ),
+}
+
+# Questions that ask the planner to CHOOSE KPIs → leave it to the LLM
+OVERVIEW_PHRASES = (
+    "overview", "summary", "summarize", "overall", "situation",
+    "health", "everything", "big picture",
+)
+
+INTENT_PATTERNS = {
+    intent: re.compile(r"\b(?:" + "|".join(map(re.escape, phrases)) + r")\b")
+    for intent, phrases in INTENT_PHRASES.items()
+}
+OVERVIEW_PATTERN = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, OVERVIEW_PHRASES)) + r")\b"
+)
+
+SNAPSHOT_KPIS = {"cash_balance", "runway", "runway_months"}
+COMPARISON_KPIS = {
+    "net_profit", "ebitda", "gross_margin", "cogs", "operating_expense",
+}
+
+
+@dataclass
+class PlannedIntent:
+    intent: PresentationIntent
+    confidence: float
+    reasons: list = field(default_factory=list)
+
+
+def resolve_allowed_kpis(statements: list[str], summaries: list) -> list[str]:
+    """
+    KPIs of the primary statement that the evidence actually contains.
+    """
+    if not statements:
+        return []
+
+    available_metrics = extract_available_metrics(summaries)
+    return sorted(
+        m for m in STATEMENT_KPIS.get(statements[0], [])
+        if m in available_metrics
+    )
+
+
+def default_kpi_intent(metric_key: str) -> IntentEnum:
+    if metric_key in SNAPSHOT_KPIS:
+        return IntentEnum.snapshot
+    if metric_key.endswith("_mix"):
+        return IntentEnum.contribution
+    if metric_key in COMPARISON_KPIS or "margin" in metric_key:
+        return IntentEnum.comparison
+    return IntentEnum.trend
+
+
+def question_intents(question: str) -> list[IntentEnum]:
+    q = question.lower()
+    return [
+        intent for intent, pattern in INTENT_PATTERNS.items()
+        if pattern.search(q)
+    ]
+
+
+def plan_presentation_intent(
+    question: str,
+    summaries: list,
+    statements: list[str],
+    seed_root_kpis: list[str],
+) -> PlannedIntent:
+    reasons = []
+    q = question.lower()
+
+    root_kpis = list(dict.fromkeys(seed_root_kpis))
+    allowed = set(resolve_allowed_kpis(statements, summaries))
+
+    if not root_kpis:
+        return PlannedIntent(
+            PresentationIntent(root_kpis=[], intent=None, kpi_intents={}, time_scope=None),
+            0.0,
+            ["no KPI named in the question"],
+        )
+
+    # --------------------------------------------------
+    # Confidence
+    # --------------------------------------------------
+    confidence = 0.4
+
+    covered = [k for k in root_kpis if k in allowed]
+    if len(covered) == len(root_kpis):
+        confidence += 0.4
+        reasons.append("all named KPIs allowed + in evidence")
+    elif covered:
+        confidence += 0.1
+        reasons.append("some named KPIs not allowed / not in evidence")
+    else:
+        reasons.append("named KPIs not allowed / not in evidence")
+
+    explicit = question_intents(q)
+    # "how is X trending" is not a conflict: generic wording yields
+    if len(explicit) > 1 and IntentEnum.trend in explicit:
+        explicit.remove(IntentEnum.trend)
+    # "vs budget" also contains the comparison word "vs": variance wins
+    if IntentEnum.variance in explicit and IntentEnum.comparison in explicit:
+        explicit.remove(IntentEnum.comparison)
+
+    if len(explicit) == 1:
+        confidence += 0.2
+        reasons.append(f"explicit intent: {explicit[0].value}")
+    elif explicit:
+        confidence -= 0.2
+        reasons.append("conflicting intent wording")
+    else:
+        confidence += 0.1
+        reasons.append("default intents")
+
+    if len(root_kpis) > 3:
+        confidence -= 0.1
+        reasons.append("many KPIs")
+
+    if OVERVIEW_PATTERN.search(q):
+        confidence = min(confidence, 0.3)
+        reasons.append("overview question")
+
+    # --------------------------------------------------
+    # Intents: question wording drives the primary KPI,
+    # the rest follow their defaults (at most ONE trend)
+    # --------------------------------------------------
+    primary_intent = (
+        explicit[0] if len(explicit) == 1
+        else default_kpi_intent(root_kpis[0])
+    )
+
+    kpi_intents = {root_kpis[0]: primary_intent}
+    has_trend = primary_intent == IntentEnum.trend
+
+    for kpi in root_kpis[1:]:
+        kpi_intent = default_kpi_intent(kpi)
+        if kpi_intent == IntentEnum.trend:
+            kpi_intent = IntentEnum.comparison if has_trend else IntentEnum.trend
+            has_trend = True
+        kpi_intents[kpi] = kpi_intent
+
+    intent = PresentationIntent(
+        root_kpis=root_kpis,
+        intent=primary_intent,
+        kpi_intents=kpi_intents,
+        time_scope=None,
+    )
+
+    return PlannedIntent(intent, round(max(0.0, min(1.0, confidence)), 2), reasons)
+
+
+# ------------------------------------------------------------
+# Fast-path metrics
+# ------------------------------------------------------------
+_stats_lock = threading.Lock()
+_stats = {"fast_path": 0, "llm": 0}
+
+
+def record_planner_decision(fast_path: bool):
+    with _stats_lock:
+        _stats["fast_path" if fast_path else "llm"] += 1
+
+
+def get_intent_planner_stats() -> dict:
+    with _stats_lock:
+        fast, llm = _stats["fast_path"], _stats["llm"]
+    total = fast + llm
+    return {
+        "threshold": PLANNER_CONFIDENCE_THRESHOLD,
+        "fast_path": fast,
+        "llm": llm,
+        "llm_calls_avoided_ratio": round(fast / total, 4) if total else 0.0,
+    }
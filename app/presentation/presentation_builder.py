@@ -1,9 +1,8 @@
 from app.presentation.chart_resolver import resolve_chart_spec
-from app.presentation.summary_data_adapter import build_chart_data
-from app.presentation.fetch_metric_rows import fetch_metric_rows_from_facts
+from app.presentation.summary_data_adapter import build_series_chart_data
+from app.presentation.fetch_metric_rows import fetch_metric_series_batch
 
-from app.metrics.dependency_graph import load_metric_dependency_graph
-from app.metrics.kpi_hierarchy import build_kpi_hierarchy
+from app.metrics.dependency_cache import get_dependency_catalog
 
 
 def _normalize_metric(name: str) -> str:
@@ -35,57 +34,68 @@ def build_presentation(
     print("[DEBUG] Root KPIs:", presentation_intent.root_kpis)
 
     # --------------------------------------------------
-    # 1️⃣ Load dependency graph
+    # 1️⃣ Dependency graph (cached per metric catalog version)
     # --------------------------------------------------
-    dependency_graph = load_metric_dependency_graph(db_conn)
-    print("[DEBUG] Dependency graph sample:", list(dependency_graph.items())[:5])
+    dependency_catalog = get_dependency_catalog(db_conn)
+    print(
+        "[DEBUG] Dependency graph sample:",
+        list(dependency_catalog.graph.items())[:5],
+    )
 
     # --------------------------------------------------
-    # 2️⃣ Build KPI hierarchy (BFS)
+    # 2️⃣ KPI hierarchy (memoized BFS)
     # --------------------------------------------------
     normalized_roots = [
         _normalize_metric(k) for k in presentation_intent.root_kpis
     ]
 
-    kpi_hierarchy = build_kpi_hierarchy(
+    kpi_hierarchy = dependency_catalog.kpi_hierarchy(
         root_kpis=normalized_roots,
-        dependency_graph=dependency_graph,
         max_depth=2,
     )
 
     print("[DEBUG] KPI hierarchy result:", kpi_hierarchy)
 
     # --------------------------------------------------
-    # 3️⃣ Build charts from FACTS ONLY
+    # 3️⃣ Fetch EVERY metric of the hierarchy in ONE query
+    # --------------------------------------------------
+    sections = ["main", "first_degree", "second_degree"]
+
+    series_by_metric = fetch_metric_series_batch(
+        conn=db_conn,
+        company_id=company_id,
+        metric_keys=[
+            _normalize_metric(m)
+            for section in sections
+            for m in kpi_hierarchy.get(section, [])
+        ],
+    )
+
+    # --------------------------------------------------
+    # 4️⃣ Build charts from FACTS ONLY
     # --------------------------------------------------
-    for section in ["main", "first_degree", "second_degree"]:
+    for section in sections:
         metrics = kpi_hierarchy.get(section, [])
         print(f"[DEBUG] Building section '{section}' with metrics:", metrics)
 
         for metric in metrics:
             metric = _normalize_metric(metric)
 
-            # --------------------------------------------------
-            # Fetch rows from financial_facts
-            # --------------------------------------------------
-            rows = fetch_metric_rows_from_facts(
-                conn=db_conn,
-                company_id=company_id,
-                metric_key=metric,
-            )
+            series = series_by_metric.get(metric)
 
             print(
-                f"[DEBUG][fetch_metric_rows] metric={metric} rows_count={len(rows)}"
+                f"[DEBUG][fetch_metric_rows] metric={metric} "
+                f"rows_count={len(series) if series else 0}"
             )
 
-            if not rows:
+            if not series:
                 print(f"[DEBUG] SKIP '{metric}' — no fact rows found")
                 continue
 
             # --------------------------------------------------
             # Build chart-compatible data
             # --------------------------------------------------
-            data, reason = build_chart_data(metric, rows)
+            data, reason = build_series_chart_data(metric, series)
             print(
                 f"[DEBUG][chart_data] metric={metric} reason={reason}"
             )
@@ -106,7 +116,7 @@ def build_presentation(
             chart_spec = resolve_chart_spec(
                 metric=metric,
                 intent=metric_intent,
-                rows=rows,
+                period_labels=series.period_labels,
             )
 
             presentation[section]["kpis"].append(metric)
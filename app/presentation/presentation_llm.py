@@ -1,8 +1,14 @@
+import asyncio
 import json
 from app.presentation.presentation_schema import PresentationIntent, IntentEnum
-from app.presentation.available_metrics import extract_available_metrics
-from app.presentation.kpi_registry import STATEMENT_KPIS
-from app.llm.local_llm import call_llm
+from app.presentation.intent_planner import (
+    PLANNER_CONFIDENCE_THRESHOLD,
+    plan_presentation_intent,
+    record_planner_decision,
+    resolve_allowed_kpis,
+)
+from app.cache.intent_cache import get_intent_cache, intent_fingerprint
+from app.llm.local_llm import MODEL, acall_llm
 
 
 def sanitize_intent(value: str | None) -> IntentEnum | None:
@@ -171,6 +177,41 @@ Return ONLY valid JSON.
 """
 
 
+def check_planned_kpis(intent: PresentationIntent, allowed_kpis: list[str]):
+    """
+    Raise ValueError unless the plan only uses allowed KPIs (= cacheable):
+    - root_kpis non-empty and all in allowed_kpis
+    - every kpi_intents key is a root KPI
+    """
+    if not intent.root_kpis:
+        raise ValueError("Plan selects no KPIs")
+
+    unknown = set(intent.root_kpis) - set(allowed_kpis)
+    if unknown:
+        raise ValueError(f"KPIs not in Allowed KPIs: {sorted(unknown)}")
+
+    stray = set(intent.kpi_intents) - set(intent.root_kpis)
+    if stray:
+        raise ValueError(f"Intents for KPIs that are not root KPIs: {sorted(stray)}")
+
+
+def restrict_planned_kpis(
+    intent: PresentationIntent,
+    allowed_kpis: list[str],
+) -> PresentationIntent:
+    """
+    Drop root KPIs outside allowed_kpis (when any are known) and intents
+    of KPIs that are not root KPIs. The rest of the plan is kept.
+    """
+    if allowed_kpis:
+        intent.root_kpis = [k for k in intent.root_kpis if k in allowed_kpis]
+
+    intent.kpi_intents = {
+        k: v for k, v in intent.kpi_intents.items() if k in intent.root_kpis
+    }
+    return intent
+
+
 async def call_presentation_llm(
     llm_client,
     question: str,
@@ -179,16 +220,53 @@ async def call_presentation_llm(
     seed_root_kpis: list[str]
 ) -> PresentationIntent:
 
-    available_metrics = sorted(extract_available_metrics(summaries))
+    # Fast path: KPIs named in the question + clear wording → no LLM
+    planned = plan_presentation_intent(
+        question=question,
+        summaries=summaries,
+        statements=statements,
+        seed_root_kpis=seed_root_kpis,
+    )
+    fast_path = planned.confidence >= PLANNER_CONFIDENCE_THRESHOLD
+    record_planner_decision(fast_path)
 
-    if statements:
-        primary = statements[0]
-        allowed_kpis = sorted({
-            m for m in STATEMENT_KPIS.get(primary, [])
-            if m in available_metrics
-        })
+    print(
+        f"[DEBUG] Intent planner confidence={planned.confidence} "
+        f"({'fast path' if fast_path else 'LLM'}):", planned.reasons
+    )
+
+    if fast_path:
+        intent = planned.intent
     else:
-        allowed_kpis = []
+        intent = await _llm_presentation_intent(question, summaries, statements)
+
+    # 🔐 HARD GUARANTEES
+    intent.root_kpis = list(set(seed_root_kpis + intent.root_kpis))
+
+    if intent.intent is None:
+        intent.intent = IntentEnum.trend
+
+    cleaned_kpi_intents = {}
+    for kpi in intent.root_kpis:
+        cleaned_kpi_intents[kpi] = (
+            intent.kpi_intents.get(kpi, intent.intent)
+        )
+
+    intent.kpi_intents = cleaned_kpi_intents
+
+    print("[DEBUG] Final root KPIs:", intent.root_kpis)
+    print("[DEBUG] Final KPI intents:", intent.kpi_intents)
+
+    return intent
+
+
+async def _llm_presentation_intent(
+    question: str,
+    summaries: list,
+    statements: list[str],
+) -> PresentationIntent:
+
+    allowed_kpis = resolve_allowed_kpis(statements, summaries)
 
     print("[DEBUG] Allowed KPIs for presentation LLM:", allowed_kpis)
 
@@ -198,7 +276,18 @@ async def call_presentation_llm(
         allowed_kpis=allowed_kpis
     )
 
-    raw = call_llm(prompt)
+    # Same prompt + model → same plan: reuse validated outputs
+    cache = get_intent_cache()
+    key = intent_fingerprint(prompt, MODEL)
+
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            print("[DEBUG] Presentation intent cache hit:", key[:12])
+            return cached
+
+    # Async HTTP call: the event loop stays free, cancellation aborts it
+    raw = await acall_llm(prompt)
     print("[DEBUG] Presentation LLM raw output:\n", raw)
 
     try:
@@ -216,28 +305,25 @@ async def call_presentation_llm(
 
     except Exception as e:
         print("[ERROR] Presentation LLM parse failed:", e)
-        intent = PresentationIntent(
+        return PresentationIntent(
             root_kpis=[],
             intent=None,
             kpi_intents={},
             time_scope=None
         )
 
-    # 🔐 HARD GUARANTEES
-    intent.root_kpis = list(set(seed_root_kpis + intent.root_kpis))
-
-    if intent.intent is None:
-        intent.intent = IntentEnum.trend
-
-    cleaned_kpi_intents = {}
-    for kpi in intent.root_kpis:
-        cleaned_kpi_intents[kpi] = (
-            intent.kpi_intents.get(kpi, intent.intent)
-        )
+    # Only plans that stay within the allowed KPIs are cached;
+    # off-contract plans are still used, minus the off-contract parts
+    try:
+        check_planned_kpis(intent, allowed_kpis)
+        cacheable = True
+    except ValueError as e:
+        print("[DEBUG] Presentation intent not cached:", e)
+        cacheable = False
 
-    intent.kpi_intents = cleaned_kpi_intents
+    intent = restrict_planned_kpis(intent, allowed_kpis)
 
-    print("[DEBUG] Final root KPIs:", intent.root_kpis)
-    print("[DEBUG] Final KPI intents:", intent.kpi_intents)
+    if cacheable and cache is not None:
+        await asyncio.to_thread(cache.set, key, intent)
 
     return intent
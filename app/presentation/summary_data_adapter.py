@@ -97,3 +97,24 @@ def build_chart_data(metric: str, rows: list):
             "value": rows[0]["value"]
         }
     ], "fallback_single_period"
+
+
+def build_series_chart_data(metric: str, series):
+    """
+    build_chart_data() for a columnar MetricSeries (fact time series).
+
+    Facts have no components and arrive sorted by period.
+    """
+    if series is None or not len(series):
+        return None, "metric_not_available"
+
+    data = [
+        {"period": label, "value": value}
+        for label, value in zip(series.period_labels, series.values)
+    ]
+
+    if len(data) >= 2:
+        return data, None
+
+    # Snapshot fallback (single point)
+    return data, "fallback_single_period"
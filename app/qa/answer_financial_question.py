@@ -1,10 +1,13 @@
+import asyncio
+import time
+
 from app.retrieval.retrieve_financial_evidence import retrieve_financial_evidence
 from app.retrieval.retrieve_evidence_sources_from_summaries import (
     retrieve_evidence_sources_from_summaries,
 )
 
 from app.qa.claude_prompt import build_prompt
-from app.llm.local_llm import call_llm
+from app.llm.local_llm import acall_llm, acall_llm_stream
 
 from app.contracts.ingestion_quality_contract import reduce_severity
 from app.contracts.agent_behaviour_contract import AGENT_BEHAVIOR
@@ -28,24 +31,25 @@ from app.qa.helpers import (
     section_empty,
 )
 
+from app.cache.answer_cache import get_answer_cache
 from app.db.connection import get_db_connection
+from app.ingestion.ingest_company import get_company_data_version
 from app.ingestion.period_derivation import resolve_time_range
+from app.orchestrators.stage_graph import StageGraph
 
 
-async def answer_question(question: str, company_id: str) -> dict:
-    print("\n================ ANSWER QUESTION =================")
-    print("QUESTION:", question)
-
-    # ------------------------------------------------------------
-    # 1️⃣ Retrieve evidence summaries (ROUTING + CONTEXT ONLY)
-    # ------------------------------------------------------------
+# ------------------------------------------------------------
+# Stages (each runs off the event loop unless async)
+# ------------------------------------------------------------
+def _retrieve_evidence(question: str, company_id: str) -> list:
     evidence = retrieve_financial_evidence(question, company_id)
     evidence = sorted(evidence, key=lambda x: x.get("period_start") or "")
     print(f"[DEBUG] Retrieved {len(evidence)} evidence summaries")
+    return evidence
 
-    # ------------------------------------------------------------
-    # 2️⃣ Resolve time range from summaries
-    # ------------------------------------------------------------
+
+def _route(question: str, evidence: list, metric_keys: list[str]) -> dict:
+    # Resolve time range from summaries
     start, end = resolve_time_range(question, evidence)
     print(f"[DEBUG] Resolved time range: {start} → {end}")
 
@@ -57,68 +61,47 @@ async def answer_question(question: str, company_id: str) -> dict:
         ]
         print(f"[DEBUG] Evidence after time filter: {len(evidence)}")
 
-    # ------------------------------------------------------------
-    # 3️⃣ Resolve statements + deterministic KPI hints
-    # ------------------------------------------------------------
+    # Resolve statements + deterministic KPI hints
     statements = resolve_statements(question, evidence)
     print("[DEBUG] Resolved statements:", statements)
 
-    all_metric_keys = get_all_metric_keys()
     deterministic_root_kpis = extract_metric_hints(
         question,
-        all_metric_keys
+        metric_keys
     )
     print("[DEBUG] Deterministic root KPI hints:", deterministic_root_kpis)
 
-    # ------------------------------------------------------------
-    # 4️⃣ No evidence → HARD baseline fallback
-    # ------------------------------------------------------------
-    if not evidence:
-        baseline = fetch_company_baseline(company_id)
-        return {
-            "answer": "Data is insufficient to answer this question confidently.",
-            "evidence_sources": [],
-            "confidence": "low",
-            "severity": Severity.HIGH.value,
-            "limitations": ["No relevant financial data found."],
-            "presentation": baseline,
-        }
+    return {
+        "evidence": evidence,
+        "statements": statements,
+        "root_kpis": deterministic_root_kpis,
+    }
 
-    # ------------------------------------------------------------
-    # 5️⃣ Severity gate (data quality)
-    # ------------------------------------------------------------
-    max_severity = reduce_severity([])
 
-    if AGENT_BEHAVIOR[max_severity] == "refuse":
-        baseline = fetch_company_baseline(company_id)
-        return {
-            "answer": "Data is insufficient or unreliable.",
-            "evidence_sources": [],
-            "confidence": "low",
-            "severity": max_severity.value,
-            "limitations": generate_limitations([]),
-            "presentation": baseline,
-        }
-
-    # ------------------------------------------------------------
-    # 6️⃣ Presentation intent (LLM-safe, no facts)
-    # ------------------------------------------------------------
-    presentation_intent = await call_presentation_llm(
-        llm_client=None,
-        question=question,
-        summaries=evidence,          # routing only
-        statements=statements,
-        seed_root_kpis=deterministic_root_kpis
-    )
+def _fetch_evidence_sources(evidence: list) -> list:
+    # Evidence lineage (audit / UI)
+    summary_ids = list({
+        e["summary_id"]
+        for e in evidence
+        if e.get("summary_id")
+    })
 
-    if presentation_intent.intent is None:
-        presentation_intent.intent = ChartIntent.TREND
+    conn = get_db_connection()
+    try:
+        return retrieve_evidence_sources_from_summaries(
+            conn=conn,
+            summary_ids=summary_ids
+        )
+    finally:
+        conn.close()
 
-    print("[DEBUG] Presentation intent:", presentation_intent)
 
-    # ------------------------------------------------------------
-    # 7️⃣ Build presentation (SOURCE OF TRUTH = SQL FACTS)
-    # ------------------------------------------------------------
+def _build_presentation(
+    company_id: str,
+    presentation_intent,
+    evidence: list,
+    baseline: dict,
+) -> dict:
     conn = get_db_connection()
     try:
         presentation = build_presentation(
@@ -127,43 +110,29 @@ async def answer_question(question: str, company_id: str) -> dict:
             db_conn=conn,
             company_id=company_id,
         )
+    finally:
+        conn.close()
 
+    presentation = dedupe_with_priority(presentation)
 
-        presentation = dedupe_with_priority(presentation)
-
-        baseline = fetch_company_baseline(company_id)
-        presentation = rebalance_sections(
-            presentation=presentation,
-            baseline=baseline
-        )
-
-        presentation = dedupe_with_priority(presentation)
-
-        if section_empty(presentation["main"]):
-            presentation = baseline
-
-        # Evidence lineage (audit / UI)
-        summary_ids = list({
-            e["summary_id"]
-            for e in evidence
-            if e.get("summary_id")
-        })
+    presentation = rebalance_sections(
+        presentation=presentation,
+        baseline=baseline
+    )
 
-        evidence_sources = retrieve_evidence_sources_from_summaries(
-            conn=conn,
-            summary_ids=summary_ids
-        )
+    presentation = dedupe_with_priority(presentation)
 
-    finally:
-        conn.close()
+    if section_empty(presentation["main"]):
+        presentation = baseline
 
     print("[DEBUG] FINAL PRESENTATION:", presentation)
+    return presentation
 
-    # ------------------------------------------------------------
-    # 7.5️⃣ Extract KPI CONTEXT summaries (QUALITATIVE ONLY)
+
+def _answer_prompt(question: str, presentation: dict, evidence: list) -> str:
+    # Extract KPI CONTEXT summaries (QUALITATIVE ONLY)
     # Convention: summary_type = <grain>_<purpose>
     # Context summaries end with "_context"
-    # ------------------------------------------------------------
     kpi_context = [
         e["content"]
         for e in evidence
@@ -172,35 +141,315 @@ async def answer_question(question: str, company_id: str) -> dict:
 
     print("[DEBUG] KPI CONTEXT COUNT:", len(kpi_context))
 
-    # ------------------------------------------------------------
-    # 8️⃣ LLM ANSWER (FACTS + CONTEXT, CLEARLY SEPARATED)
-    # ------------------------------------------------------------
-    answer = call_llm(
-        build_prompt(
+    # LLM ANSWER (FACTS + CONTEXT, CLEARLY SEPARATED)
+    return build_prompt(
+        question=question,
+        presentation=presentation,   # authoritative facts
+        context=kpi_context          # qualitative framing only
+    )
+
+
+async def _generate_answer(question: str, presentation: dict, evidence: list) -> str:
+    return await acall_llm(_answer_prompt(question, presentation, evidence))
+
+
+def _build_graph(question: str, company_id: str) -> StageGraph:
+    """
+    evidence ────┐
+    metric_keys ─┴─ routing ─┬─ presentation_intent ─┐
+                             └─ evidence_sources     ├─ presentation ─ answer
+    baseline ────────────────────────────────────────┘
+    """
+
+    async def presentation_intent(routing):
+        intent = await call_presentation_llm(
+            llm_client=None,
             question=question,
-            presentation=presentation,   # authoritative facts
-            context=kpi_context          # qualitative framing only
+            summaries=routing["evidence"],   # routing only
+            statements=routing["statements"],
+            seed_root_kpis=routing["root_kpis"]
         )
-    )
 
-    # ------------------------------------------------------------
-    # 9️⃣ Confidence + limitations (NOT summaries)
-    # ------------------------------------------------------------
-    confidence = compute_confidence(
-        max_severity=max_severity,
-        estimated_ratio=0.0,
-        source_confidence=0.8,
+        if intent.intent is None:
+            intent.intent = ChartIntent.TREND
+
+        print("[DEBUG] Presentation intent:", intent)
+        return intent
+
+    async def answer(presentation, routing):
+        return await _generate_answer(question, presentation, routing["evidence"])
+
+    graph = StageGraph()
+    graph.add("evidence", lambda: _retrieve_evidence(question, company_id))
+    graph.add("metric_keys", get_all_metric_keys)
+    graph.add("baseline", lambda: fetch_company_baseline(company_id))
+    graph.add(
+        "routing",
+        lambda evidence, metric_keys: _route(question, evidence, metric_keys),
+        deps=("evidence", "metric_keys"),
+    )
+    graph.add(
+        "evidence_sources",
+        lambda routing: _fetch_evidence_sources(routing["evidence"]),
+        deps=("routing",),
+    )
+    graph.add("presentation_intent", presentation_intent, deps=("routing",))
+    graph.add(
+        "presentation",
+        lambda presentation_intent, routing, baseline: _build_presentation(
+            company_id, presentation_intent, routing["evidence"], baseline
+        ),
+        deps=("presentation_intent", "routing", "baseline"),
+    )
+    graph.add("answer", answer, deps=("presentation", "routing"))
+    return graph
+
+
+# ------------------------------------------------------------
+# Answer cache (per company data_version, see app.cache.answer_cache)
+# ------------------------------------------------------------
+async def _cached_answer(question: str, company_id: str):
+    """
+    (data_version, cached response | None, hit kind | None).
+    data_version is None when caching is off or the company is unknown.
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return None, None, None
+
+    data_version = await asyncio.to_thread(get_company_data_version, company_id)
+    if data_version is None:
+        return None, None, None
+
+    response, kind = await asyncio.to_thread(cache.get, company_id, data_version, question)
+    if response is not None:
+        print(f"[DEBUG] Answer cache hit ({kind}) for data_version {data_version}")
+    return data_version, response, kind
+
+
+async def _store_answer(question: str, company_id: str, data_version, response: dict, t0: float):
+    if data_version is None:
+        return
+
+    response = {k: v for k, v in response.items() if k != "timings"}
+    compute_ms = (time.perf_counter() - t0) * 1000
+    await asyncio.to_thread(
+        get_answer_cache().set, company_id, data_version, question, response, compute_ms
     )
 
-    limitations = generate_limitations([])
+
+async def answer_question(
+    question: str,
+    company_id: str,
+    debug: bool = False,
+) -> dict:
+    """
+    Answer a financial question.
+
+    Repeated questions (same company data_version) are served from the
+    answer cache. Otherwise independent stages (evidence retrieval,
+    metric keys, baseline dashboard, evidence lineage) run concurrently;
+    blocking work runs in threads. debug=True adds per-stage timings to
+    the response.
+    """
+    t0 = time.perf_counter()
+
+    data_version, cached, kind = await _cached_answer(question, company_id)
+    if cached is not None:
+        if debug:
+            cached["timings"] = {"answer_cache": kind}
+        return cached
+
+    response = await _answer_question(question, company_id, debug)
+    await _store_answer(question, company_id, data_version, response, t0)
+    return response
+
+
+async def _answer_question(question: str, company_id: str, debug: bool) -> dict:
+    print("\n================ ANSWER QUESTION =================")
+    print("QUESTION:", question)
+
+    graph = _build_graph(question, company_id)
+
+    try:
+        # ------------------------------------------------------------
+        # 1️⃣ Retrieval, metric keys and baseline start together
+        # ------------------------------------------------------------
+        graph.start("evidence", "metric_keys", "baseline")
+
+        # ------------------------------------------------------------
+        # 2️⃣ + 3️⃣ Time range, statements, deterministic KPI hints
+        # ------------------------------------------------------------
+        routing = await graph.result("routing")
+
+        # ------------------------------------------------------------
+        # 4️⃣ + 5️⃣ No (reliable) evidence → HARD baseline fallback
+        # ------------------------------------------------------------
+        max_severity = reduce_severity([])
+
+        fallback = await _fallback_response(routing, graph, max_severity)
+        if fallback is not None:
+            return _finalize(fallback, graph, debug)
+
+        # ------------------------------------------------------------
+        # 6️⃣ Presentation intent (LLM) ∥ evidence lineage
+        # 7️⃣ Build presentation (SOURCE OF TRUTH = SQL FACTS)
+        # 8️⃣ LLM ANSWER (FACTS + CONTEXT, CLEARLY SEPARATED)
+        # ------------------------------------------------------------
+        graph.start("evidence_sources", "answer")
+
+        presentation = await graph.result("presentation")
+        answer = await graph.result("answer")
+        evidence_sources = await graph.result("evidence_sources")
+
+    finally:
+        await graph.close()
 
     print("================================================\n")
 
-    return {
+    response = {
         "answer": answer,
         "evidence_sources": evidence_sources,
-        "confidence": confidence,
-        "severity": max_severity.value,
-        "limitations": limitations,
+        **_quality(max_severity),
         "presentation": presentation,
     }
+    return _finalize(response, graph, debug)
+
+
+async def stream_answer(
+    question: str,
+    company_id: str,
+    debug: bool = False,
+):
+    """
+    Streaming answer_question: yields frames as soon as each part exists.
+
+    1. {"type": "presentation", "presentation": ...}   (SQL facts, no answer LLM)
+    2. {"type": "evidence_sources", "evidence_sources": [...]}
+    3. {"type": "token", "text": ...}                  (answer LLM, one per token)
+    4. {"type": "final", "confidence", "severity", "limitations"[, "timings"]}
+
+    Baseline fallbacks and answer cache hits send the whole answer as a
+    single token frame.
+    """
+    t0 = time.perf_counter()
+
+    data_version, cached, kind = await _cached_answer(question, company_id)
+    if cached is not None:
+        yield {"type": "presentation", "presentation": cached["presentation"]}
+        yield {"type": "evidence_sources", "evidence_sources": cached["evidence_sources"]}
+        yield {"type": "token", "text": cached["answer"]}
+        final = {
+            "type": "final",
+            "confidence": cached["confidence"],
+            "severity": cached["severity"],
+            "limitations": cached["limitations"],
+        }
+        if debug:
+            final["timings"] = {"answer_cache": kind}
+        yield final
+        return
+
+    print("\n============ ANSWER QUESTION (STREAM) ============")
+    print("QUESTION:", question)
+
+    graph = _build_graph(question, company_id)
+
+    try:
+        graph.start("evidence", "metric_keys", "baseline")
+        routing = await graph.result("routing")
+
+        max_severity = reduce_severity([])
+
+        fallback = await _fallback_response(routing, graph, max_severity)
+        if fallback is not None:
+            response = fallback
+            yield {"type": "presentation", "presentation": fallback["presentation"]}
+            yield {"type": "evidence_sources", "evidence_sources": []}
+            yield {"type": "token", "text": fallback["answer"]}
+
+        else:
+            graph.start("evidence_sources", "presentation")
+
+            presentation = await graph.result("presentation")
+            yield {"type": "presentation", "presentation": presentation}
+
+            evidence_sources = await graph.result("evidence_sources")
+            yield {"type": "evidence_sources", "evidence_sources": evidence_sources}
+
+            tokens = []
+            prompt = _answer_prompt(question, presentation, routing["evidence"])
+            async for token in acall_llm_stream(prompt):
+                tokens.append(token)
+                yield {"type": "token", "text": token}
+
+            response = {
+                "answer": "".join(tokens),
+                "evidence_sources": evidence_sources,
+                **_quality(max_severity),
+                "presentation": presentation,
+            }
+
+    finally:
+        await graph.close()
+
+    print("================================================\n")
+
+    # Only complete streams are cached (a disconnect cancels before this)
+    await _store_answer(question, company_id, data_version, response, t0)
+
+    final = {
+        k: response[k] for k in ("confidence", "severity", "limitations")
+    }
+    yield _finalize({"type": "final", **final}, graph, debug)
+
+
+async def _fallback_response(routing: dict, graph: StageGraph, max_severity) -> dict | None:
+    """
+    Baseline-only response when there is no (reliable) evidence;
+    None when the question can be answered.
+    """
+    # No evidence → HARD baseline fallback
+    if not routing["evidence"]:
+        return {
+            "answer": "Data is insufficient to answer this question confidently.",
+            "evidence_sources": [],
+            "confidence": "low",
+            "severity": Severity.HIGH.value,
+            "limitations": ["No relevant financial data found."],
+            "presentation": await graph.result("baseline"),
+        }
+
+    # Severity gate (data quality)
+    if AGENT_BEHAVIOR[max_severity] == "refuse":
+        return {
+            "answer": "Data is insufficient or unreliable.",
+            "evidence_sources": [],
+            "confidence": "low",
+            "severity": max_severity.value,
+            "limitations": generate_limitations([]),
+            "presentation": await graph.result("baseline"),
+        }
+
+    return None
+
+
+def _quality(max_severity) -> dict:
+    """
+    9️⃣ Confidence + limitations (NOT summaries)
+    """
+    return {
+        "confidence": compute_confidence(
+            max_severity=max_severity,
+            estimated_ratio=0.0,
+            source_confidence=0.8,
+        ),
+        "severity": max_severity.value,
+        "limitations": generate_limitations([]),
+    }
+
+
+def _finalize(response: dict, graph: StageGraph, debug: bool) -> dict:
+    if debug:
+        response["timings"] = graph.timings()
+    return response
@@ -1,9 +1,4 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.db.connection import get_db_connection
 
 
 def fetch_recent_facts(company_id: str, limit: int = 50):
@@ -12,7 +7,7 @@ def fetch_recent_facts(company_id: str, limit: int = 50):
     Returns the canonical facts actually inserted into SQL.
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
 
     cur.execute(
@@ -1,9 +1,4 @@
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.db.connection import get_db_connection
 
 
 def fetch_recent_summaries(company_id: str, limit: int = 10):
@@ -12,7 +7,7 @@ def fetch_recent_summaries(company_id: str, limit: int = 10):
     SQL is the source of truth.
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
 
     cur.execute(
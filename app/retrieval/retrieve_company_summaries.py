@@ -1,10 +1,5 @@
-import psycopg2
-import os
 from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.db.connection import get_db_connection
 
 
 def retrieve_company_summaries(company_id: str, limit: int = 12):
@@ -13,7 +8,7 @@ def retrieve_company_summaries(company_id: str, limit: int = 12):
     No LLM. No embeddings. No question.
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     cur.execute(
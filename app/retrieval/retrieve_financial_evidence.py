@@ -1,10 +1,73 @@
-import psycopg2
+import logging
 import os
-from dotenv import load_dotenv
-from app.embeddings.generate_embedding import generate_embedding
+import re
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.cache.lru_cache import LRUCache
+from app.db.connection import get_db_connection
+from app.embeddings.generate_embedding import MODEL_NAME, generate_embedding
+from app.retrieval.vector_index import (
+    NEAREST_SUMMARIES_SQL,
+    apply_search_settings,
+    force_exact_search,
+)
+
+logger = logging.getLogger("retrieval.query_embeddings")
+
+
+# ------------------------------------------------------------
+# Query embedding cache
+# ------------------------------------------------------------
+# Dashboards re-ask the same canned questions all day; a hit skips
+# MiniLM inference (and the shared embedding cache lookup) entirely.
+#
+# QUERY_EMBEDDING_WARMUP: "|"-separated questions embedded at startup
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+QUERY_EMBEDDING_WARMUP = os.getenv("QUERY_EMBEDDING_WARMUP", "")
+
+_query_embeddings = LRUCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+
+
+def normalize_question(question: str) -> str:
+    """
+    Case / whitespace-insensitive cache key.
+
+    all-MiniLM-L6-v2 lowercases its input, so the normalized text
+    embeds exactly like the original.
+    """
+    return re.sub(r"\s+", " ", question).strip().lower()
+
+
+def embed_question(question: str) -> list[float]:
+    normalized = normalize_question(question)
+    key = (normalized, MODEL_NAME)
+
+    embedding = _query_embeddings.get(key)
+    if embedding is None:
+        embedding = generate_embedding(normalized)
+        _query_embeddings.set(key, embedding)
+
+    return embedding
+
+
+def warm_query_embedding_cache(questions: list[str] | None = None):
+    """
+    Pre-embed canned dashboard questions (defaults to QUERY_EMBEDDING_WARMUP).
+    """
+    if questions is None:
+        questions = [q for q in QUERY_EMBEDDING_WARMUP.split("|") if q.strip()]
+
+    for question in questions:
+        try:
+            embed_question(question)
+        except Exception as e:
+            logger.warning("Query embedding warm-up failed | %r | %s", question, e)
+
+    if questions:
+        logger.info("Query embedding cache warmed | questions=%s", len(questions))
+
+
+def get_query_embedding_cache_stats() -> dict:
+    return _query_embeddings.stats()
 
 
 def retrieve_financial_evidence(
@@ -25,39 +88,38 @@ def retrieve_financial_evidence(
         raise ValueError("Question text cannot be empty")
 
     # ------------------------------------------------------------
-    # 1. Generate query embedding (REAL, NOT STUB)
+    # 1. Generate query embedding (REAL, NOT STUB, cached)
     # ------------------------------------------------------------
-    query_embedding = generate_embedding(question)
+    query_embedding = embed_question(question)
 
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        select
-    s.id as summary_id,
-    s.content,
-    p.period_start,
-    p.period_end,
-    p.period_type,
-    p.fiscal_year,
-    p.fiscal_quarter,
-    s.summary_type
-from financial_summaries s
-join summary_embeddings e
-  on s.id = e.summary_id
-left join financial_periods p
-  on s.period_id = p.id
-where s.company_id = %s
-ORDER BY e.embedding <-> %s::vector
-limit %s;
-
-        """,
-        (company_id, query_embedding, top_k)
-    )
+    params = {
+        "company_id": company_id,
+        "embedding": query_embedding,
+        "top_k": top_k,
+    }
 
+    # ANN knobs (ef_search / probes / iterative scans) for this transaction
+    apply_search_settings(cur)
+    cur.execute(NEAREST_SUMMARIES_SQL, params)
     rows = cur.fetchall()
 
+    if len(rows) < top_k:
+        # The company filter runs after the ANN scan: a short result may
+        # just mean its rows were not among the candidates. Exact scan
+        # over the company's own rows (btree pre-filter) settles it.
+        force_exact_search(cur)
+        cur.execute(NEAREST_SUMMARIES_SQL, params)
+        exact_rows = cur.fetchall()
+        if len(exact_rows) > len(rows):
+            logger.info(
+                "ANN search short, exact scan used | company_id=%s | ann=%s | exact=%s",
+                company_id, len(rows), len(exact_rows),
+            )
+        rows = exact_rows
+
     cur.close()
     conn.close()
 
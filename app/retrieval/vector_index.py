@@ -0,0 +1,266 @@
+"""
+ANN index management + search settings for summary_embeddings.
+
+- One pgvector index on summary_embeddings.embedding (L2, matches `<->`)
+- VECTOR_INDEX_METHOD: "hnsw" (default) | "ivfflat"
+- Search-time knobs are applied per transaction (SET LOCAL):
+    hnsw.ef_search          ← VECTOR_HNSW_EF_SEARCH
+    ivfflat.probes          ← VECTOR_IVFFLAT_PROBES
+    hnsw / ivfflat.iterative_scan ← VECTOR_ITERATIVE_SCAN (pgvector >= 0.8)
+- The company_id filter is applied AFTER the ANN scan: without iterative
+  scans a small tenant can get fewer than k rows (or none) out of the
+  ef_search / probes candidates. Iterative scans keep scanning until k
+  rows pass the filter; retrieval also re-runs short results as an exact
+  scan (pgvector < 0.8, or scans hitting max_scan_tuples)
+
+Usage:
+    python -m app.retrieval.vector_index            # status
+    python -m app.retrieval.vector_index --ensure   # create if missing
+    python -m app.retrieval.vector_index --rebuild [--method ivfflat]
+
+Indexes are built CONCURRENTLY, so ingestion and /query keep running.
+"""
+
+import argparse
+import logging
+import math
+import os
+
+from app.db.connection import get_db_connection
+
+logger = logging.getLogger("retrieval.vector_index")
+
+
+VECTOR_INDEX_METHOD = os.getenv("VECTOR_INDEX_METHOD", "hnsw")
+VECTOR_HNSW_M = int(os.getenv("VECTOR_HNSW_M", "16"))
+VECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "64"))
+VECTOR_HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+VECTOR_IVFFLAT_PROBES = int(os.getenv("VECTOR_IVFFLAT_PROBES", "10"))
+# "off" | "relaxed_order" (results are re-ordered by distance anyway)
+VECTOR_ITERATIVE_SCAN = os.getenv("VECTOR_ITERATIVE_SCAN", "relaxed_order")
+
+INDEX_NAMES = {
+    "hnsw": "summary_embeddings_embedding_hnsw",
+    "ivfflat": "summary_embeddings_embedding_ivfflat",
+}
+
+
+ITERATIVE_SCAN_MODES = ("off", "relaxed_order")
+
+
+# ------------------------------------------------------------
+# Nearest summaries of ONE company (production query)
+# ------------------------------------------------------------
+# Nearest neighbours are ranked on summary_embeddings alone
+# (company_id filter + vector index), then joined for context.
+# The outer ORDER BY restores exact order after relaxed_order scans.
+NEAREST_SUMMARIES_SQL = """
+with nearest as materialized (
+    select
+        e.summary_id,
+        e.embedding <-> %(embedding)s::vector as distance
+    from summary_embeddings e
+    where e.company_id = %(company_id)s
+    order by e.embedding <-> %(embedding)s::vector
+    limit %(top_k)s
+)
+select
+    s.id as summary_id,
+    s.content,
+    p.period_start,
+    p.period_end,
+    p.period_type,
+    p.fiscal_year,
+    p.fiscal_quarter,
+    s.summary_type
+from nearest n
+join financial_summaries s
+  on s.id = n.summary_id
+left join financial_periods p
+  on s.period_id = p.id
+order by n.distance;
+"""
+
+
+# ------------------------------------------------------------
+# Search settings
+# ------------------------------------------------------------
+_iterative_scan_supported: bool | None = None
+
+
+def iterative_scan_supported(cur) -> bool:
+    """
+    pgvector >= 0.8 (checked once per process).
+    """
+    global _iterative_scan_supported
+    if _iterative_scan_supported is None:
+        cur.execute("select extversion from pg_extension where extname = 'vector';")
+        row = cur.fetchone()
+        version = tuple(int(p) for p in row[0].split(".")[:2]) if row else (0, 0)
+        _iterative_scan_supported = version >= (0, 8)
+        if not _iterative_scan_supported:
+            logger.warning(
+                "pgvector %s has no iterative index scans: filtered ANN "
+                "searches fall back to exact scans when short",
+                row[0] if row else "missing",
+            )
+    return _iterative_scan_supported
+
+
+def apply_search_settings(
+    cur,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    iterative_scan: str | None = None,
+):
+    """
+    Set ANN search parameters for the CURRENT transaction only.
+
+    All are set: whichever index the planner picks uses its own knobs.
+    """
+    ef_search = VECTOR_HNSW_EF_SEARCH if ef_search is None else ef_search
+    probes = VECTOR_IVFFLAT_PROBES if probes is None else probes
+    iterative_scan = VECTOR_ITERATIVE_SCAN if iterative_scan is None else iterative_scan
+
+    if iterative_scan not in ITERATIVE_SCAN_MODES:
+        raise ValueError(f"Unsupported iterative scan mode: {iterative_scan}")
+
+    cur.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)};")
+    cur.execute(f"SET LOCAL ivfflat.probes = {int(probes)};")
+
+    if iterative_scan != "off" and iterative_scan_supported(cur):
+        cur.execute(f"SET LOCAL hnsw.iterative_scan = {iterative_scan};")
+        cur.execute(f"SET LOCAL ivfflat.iterative_scan = {iterative_scan};")
+
+
+def force_exact_search(cur):
+    """
+    Disable index scans for the current transaction (ground truth).
+    """
+    cur.execute("SET LOCAL enable_indexscan = off;")
+
+
+# ------------------------------------------------------------
+# Index management
+# ------------------------------------------------------------
+def _ivfflat_lists(row_count: int) -> int:
+    # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above
+    if row_count <= 1_000_000:
+        return max(10, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def get_vector_index_status() -> dict:
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                select
+                    c.relname,
+                    am.amname,
+                    i.indisvalid,
+                    pg_relation_size(c.oid)
+                from pg_index i
+                join pg_class c on c.oid = i.indexrelid
+                join pg_am am on am.oid = c.relam
+                where i.indrelid = 'public.summary_embeddings'::regclass
+                  and am.amname in ('hnsw', 'ivfflat');
+                """
+            )
+            indexes = [
+                {
+                    "name": name,
+                    "method": method,
+                    "valid": valid,
+                    "size_bytes": size,
+                }
+                for name, method, valid, size in cur.fetchall()
+            ]
+
+            cur.execute("select count(*) from summary_embeddings;")
+            row_count = cur.fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        "configured_method": VECTOR_INDEX_METHOD,
+        "rows": row_count,
+        "indexes": indexes,
+    }
+
+
+def ensure_vector_index(
+    method: str = VECTOR_INDEX_METHOD,
+    rebuild: bool = False,
+) -> str:
+    """
+    Make `method` the only ANN index on summary_embeddings.embedding.
+
+    - Creates it CONCURRENTLY if missing (or invalid, or rebuild=True)
+    - Drops ANN indexes of the other method afterwards
+    - Returns the index name
+    """
+    if method not in INDEX_NAMES:
+        raise ValueError(f"Unsupported vector index method: {method}")
+
+    index_name = INDEX_NAMES[method]
+    status = get_vector_index_status()
+    existing = {i["name"]: i for i in status["indexes"]}
+
+    current = existing.get(index_name)
+    needs_build = rebuild or current is None or not current["valid"]
+
+    conn = get_db_connection()
+    conn.autocommit = True   # CREATE / DROP INDEX CONCURRENTLY
+    try:
+        with conn.cursor() as cur:
+            if needs_build:
+                if current is not None:
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+
+                if method == "hnsw":
+                    options = (
+                        f"m = {VECTOR_HNSW_M}, "
+                        f"ef_construction = {VECTOR_HNSW_EF_CONSTRUCTION}"
+                    )
+                else:
+                    options = f"lists = {_ivfflat_lists(status['rows'])}"
+
+                logger.info("Building vector index | %s | %s", index_name, options)
+                cur.execute(
+                    f"""
+                    CREATE INDEX CONCURRENTLY {index_name}
+                    ON public.summary_embeddings
+                    USING {method} (embedding vector_l2_ops)
+                    WITH ({options});
+                    """
+                )
+
+            for name in existing:
+                if name != index_name:
+                    logger.info("Dropping vector index | %s", name)
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+    finally:
+        conn.close()
+
+    return index_name
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ensure", action="store_true")
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--method", default=VECTOR_INDEX_METHOD, choices=sorted(INDEX_NAMES))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.ensure or args.rebuild:
+        ensure_vector_index(method=args.method, rebuild=args.rebuild)
+
+    print(get_vector_index_status())
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,11 @@ from app.summarization.kpi_context import (
     monthly_cash_balance_context,
 )
 
+# Generators only read the trailing MONTHLY_CONTEXT_WINDOW values of a KPI
+# series (current, previous, 3-point trend). Incremental regeneration relies
+# on this: a changed month only affects the next WINDOW - 1 months.
+MONTHLY_CONTEXT_WINDOW = 3
+
 MONTHLY_CONTEXT_REGISTRY = {
     "revenue": {
         "summary_type": "monthly_revenue_context",
@@ -1,15 +1,10 @@
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.db.connection import get_db_connection
 
 COMPANY_ID = "09b31214-8785-464f-928a-8d2c939db3b8"
 
 
 def generate_ceo_overview():
-    conn = psycopg2.connect(DATABASE_URL)
+    conn = get_db_connection()
     cur = conn.cursor()
 
     # Fetch latest financial snapshot
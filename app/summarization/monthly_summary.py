@@ -1,14 +1,13 @@
-import os
-import psycopg2
 from datetime import datetime, timezone
-from dotenv import load_dotenv
 import calendar
 from collections import defaultdict
 
-from app.summarization.context_registry import MONTHLY_CONTEXT_REGISTRY
+from app.db.connection import get_db_connection
+from app.summarization.context_registry import (
+    MONTHLY_CONTEXT_REGISTRY,
+    MONTHLY_CONTEXT_WINDOW,
+)
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
 
 def _insert_summary_sources(cur, company_id, period_id, summary_id):
     """
@@ -40,7 +39,91 @@ def _insert_summary_sources(cur, company_id, period_id, summary_id):
             (summary_id, source_document_id),
         )
 
-def generate_monthly_context_summaries(company_id: str):
+# Ordered monthly series per KPI; pos = 1-based position within the series
+_MONTHLY_SERIES_CTE = """
+    WITH series AS (
+        SELECT
+            p.id AS period_id,
+            p.period_start,
+            m.metric_key,
+            f.value,
+            ROW_NUMBER() OVER (
+                PARTITION BY m.metric_key
+                ORDER BY p.period_start, f.created_at, f.id
+            ) AS pos
+        FROM financial_facts f
+        JOIN financial_periods p ON f.period_id = p.id
+        JOIN metric_definitions m ON f.metric_id = m.id
+        WHERE p.company_id = %(company_id)s
+          AND p.period_type = 'month'
+          AND m.metric_key = ANY(%(metric_keys)s)
+    )
+"""
+
+
+def _fetch_full_series(cur, company_id, metric_keys):
+    cur.execute(
+        _MONTHLY_SERIES_CTE
+        + """
+        SELECT period_id, period_start, metric_key, value, pos, TRUE
+        FROM series
+        ORDER BY metric_key, pos;
+        """,
+        {"company_id": company_id, "metric_keys": metric_keys},
+    )
+    return cur.fetchall()
+
+
+def _fetch_touched_windows(cur, company_id, metric_keys, period_ids):
+    """
+    Rows needed to regenerate every summary whose rolling window
+    includes a touched period.
+
+    For a touched position t:
+    - regenerate positions t .. t + WINDOW - 1
+    - read positions t - WINDOW + 1 .. t + WINDOW - 1
+    """
+    cur.execute(
+        _MONTHLY_SERIES_CTE
+        + """
+        , touched AS (
+            SELECT metric_key, pos
+            FROM series
+            WHERE period_id = ANY(%(period_ids)s::uuid[])
+        )
+        SELECT
+            s.period_id,
+            s.period_start,
+            s.metric_key,
+            s.value,
+            s.pos,
+            EXISTS (
+                SELECT 1 FROM touched t
+                WHERE t.metric_key = s.metric_key
+                  AND s.pos BETWEEN t.pos AND t.pos + %(reach)s
+            )
+        FROM series s
+        WHERE EXISTS (
+            SELECT 1 FROM touched t
+            WHERE t.metric_key = s.metric_key
+              AND s.pos BETWEEN t.pos - %(reach)s AND t.pos + %(reach)s
+        )
+        ORDER BY s.metric_key, s.pos;
+        """,
+        {
+            "company_id": company_id,
+            "metric_keys": metric_keys,
+            "period_ids": list(period_ids),
+            "reach": MONTHLY_CONTEXT_WINDOW - 1,
+        },
+    )
+    return cur.fetchall()
+
+
+def generate_monthly_context_summaries(
+    company_id: str,
+    period_ids: list | None = None,
+):
     """
     Orchestrates monthly KPI context summaries.
 
@@ -49,53 +132,50 @@ def generate_monthly_context_summaries(company_id: str):
     - Group by metric + period
     - Call KPI context generators
     - Persist summaries + lineage
+
+    period_ids:
+    - None → full rebuild
+    - touched periods → regenerate only summaries whose rolling context
+      window includes one of them (same result as a full rebuild)
     """
 
-    conn = psycopg2.connect(DATABASE_URL)
+    if period_ids is not None and not period_ids:
+        return
+
+    conn = get_db_connection()
     cur = conn.cursor()
 
     # ------------------------------------------------------------
-    # 1. Fetch all monthly facts for context-eligible KPIs
+    # 1. Fetch monthly facts for context-eligible KPIs
     # ------------------------------------------------------------
     metric_keys = list(MONTHLY_CONTEXT_REGISTRY.keys())
 
-    cur.execute(
-        """
-        SELECT
-            p.id AS period_id,
-            p.period_start,
-            m.metric_key,
-            f.value
-        FROM financial_facts f
-        JOIN financial_periods p ON f.period_id = p.id
-        JOIN metric_definitions m ON f.metric_id = m.id
-        WHERE p.company_id = %s
-          AND p.period_type = 'month'
-          AND m.metric_key = ANY(%s)
-        ORDER BY m.metric_key, p.period_start ASC;
-        """,
-        (company_id, metric_keys),
-    )
+    if period_ids is None:
+        rows = _fetch_full_series(cur, company_id, metric_keys)
+    else:
+        rows = _fetch_touched_windows(cur, company_id, metric_keys, period_ids)
 
-    rows = cur.fetchall()
     if not rows:
         cur.close()
         conn.close()
         return
 
     # ------------------------------------------------------------
-    # 2. Organize by metric → ordered values per period
+    # 2. Organize by metric → values by series position
     # ------------------------------------------------------------
     by_metric = defaultdict(list)
-
-    for period_id, period_start, metric_key, value in rows:
-        by_metric[metric_key].append(
-            {
-                "period_id": period_id,
-                "period_start": period_start,
-                "value": value,
-            }
-        )
+    values_by_pos = defaultdict(dict)
+
+    for period_id, period_start, metric_key, value, pos, regenerate in rows:
+        values_by_pos[metric_key][pos] = value
+        if regenerate:
+            by_metric[metric_key].append(
+                {
+                    "period_id": period_id,
+                    "period_start": period_start,
+                    "pos": pos,
+                }
+            )
 
     # ------------------------------------------------------------
     # 3. Generate and store summaries
@@ -105,12 +185,18 @@ def generate_monthly_context_summaries(company_id: str):
         generator = config["generator"]
         summary_type = config["summary_type"]
 
-        values_so_far = []
+        values = values_by_pos[metric_key]
 
         for entry in entries:
-            values_so_far.append(entry["value"])
+            window = [
+                values[p]
+                for p in range(
+                    max(1, entry["pos"] - MONTHLY_CONTEXT_WINDOW + 1),
+                    entry["pos"] + 1,
+                )
+            ]
 
-            summary_text = generator(values_so_far)
+            summary_text = generator(window)
 
             month_name = calendar.month_name[entry["period_start"].month]
             year = entry["period_start"].year
@@ -1,9 +1,7 @@
-import psycopg2
-import os
-from dotenv import load_dotenv
+from psycopg2.extras import execute_values
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.db.connection import get_db_connection
+from app.metrics.metric_registry import get_metric_registry
 
 # 🔑 Map semantic severities to DB-allowed severities
 SEVERITY_MAP = {
@@ -18,63 +16,54 @@ def store_validation_issues(company_id, issues):
     """
     Store validation issues in validation_issues table.
 
-    - Resolves metric_id and period_id if possible
+    - Resolves metric_id (metric registry) and period_id (one query)
+      if possible
     - Maps semantic severities (info, warning, etc.)
       to canonical DB severities (low, medium, high)
+    - All issues inserted in ONE statement
     """
 
     if not issues:
         return
 
-    conn = psycopg2.connect(DATABASE_URL)
+    metric_registry = get_metric_registry()
+
+    conn = get_db_connection()
     cur = conn.cursor()
 
-    for issue in issues:
+    # Resolve period_ids for periods that already exist
+    period_starts = list({
+        issue["period_start"]
+        for issue in issues
+        if issue.get("period_start")
+    })
 
-        metric_id = None
-        period_id = None
+    period_ids = {}
+    if period_starts:
+        cur.execute(
+            """
+            select distinct on (period_start) period_start, id
+            from financial_periods
+            where company_id = %s
+              and period_start = any(%s)
+            order by period_start, created_at;
+            """,
+            (company_id, period_starts)
+        )
+        # Keyed by ISO date: issues may carry dates, timestamps or strings
+        period_ids = {str(d): pid for d, pid in cur.fetchall()}
 
+    rows = []
+    for issue in issues:
         metric_key = issue.get("metric_key")
         period_start = issue.get("period_start")
 
-        # Resolve metric_id if metric already exists
-        if metric_key:
-            cur.execute(
-                "select id from metric_definitions where metric_key = %s;",
-                (metric_key,)
-            )
-            row = cur.fetchone()
-            if row:
-                metric_id = row[0]
-
-        # Resolve period_id if period already exists
-        if period_start:
-            cur.execute(
-                """
-                select id from financial_periods
-                where company_id = %s
-                  and period_start = %s;
-                """,
-                (company_id, period_start)
-            )
-            row = cur.fetchone()
-            if row:
-                period_id = row[0]
+        metric_id = metric_registry.id_of(metric_key) if metric_key else None
+        period_id = period_ids.get(str(period_start)[:10]) if period_start else None
 
         severity = SEVERITY_MAP.get(issue.get("severity", "low"), "low")
 
-        cur.execute(
-            """
-            insert into validation_issues (
-                company_id,
-                period_id,
-                metric_id,
-                issue_type,
-                severity,
-                description
-            )
-            values (%s, %s, %s, %s, %s, %s);
-            """,
+        rows.append(
             (
                 company_id,
                 period_id,
@@ -85,6 +74,22 @@ def store_validation_issues(company_id, issues):
             )
         )
 
+    execute_values(
+        cur,
+        """
+        insert into validation_issues (
+            company_id,
+            period_id,
+            metric_id,
+            issue_type,
+            severity,
+            description
+        )
+        values %s;
+        """,
+        rows,
+    )
+
     conn.commit()
     cur.close()
     conn.close()
@@ -0,0 +1,58 @@
+-- Period uniqueness = (company_id, period_start, period_type)
+--
+-- Required by resolve_periods(), which upserts every distinct period of an
+-- upload in ONE statement (INSERT ... ON CONFLICT). The constraint also stops
+-- concurrent uploads from racing to create duplicate periods.
+--
+-- Existing duplicates are collapsed onto the oldest row first:
+-- - facts and validation issues are repointed
+-- - summaries of dropped periods are deleted (regenerated on next ingestion)
+
+BEGIN;
+
+CREATE TEMP TABLE period_duplicates ON COMMIT DROP AS
+SELECT id, keep_id
+FROM (
+    SELECT
+        id,
+        first_value(id) OVER (
+            PARTITION BY company_id, period_start, period_type
+            ORDER BY created_at, id
+        ) AS keep_id
+    FROM public.financial_periods
+) ranked
+WHERE id <> keep_id;
+
+UPDATE public.financial_facts f
+SET period_id = d.keep_id
+FROM period_duplicates d
+WHERE f.period_id = d.id;
+
+UPDATE public.validation_issues v
+SET period_id = d.keep_id
+FROM period_duplicates d
+WHERE v.period_id = d.id;
+
+DELETE FROM public.summary_embeddings
+WHERE summary_id IN (
+    SELECT s.id FROM public.financial_summaries s
+    JOIN period_duplicates d ON d.id = s.period_id
+);
+
+DELETE FROM public.summary_sources
+WHERE summary_id IN (
+    SELECT s.id FROM public.financial_summaries s
+    JOIN period_duplicates d ON d.id = s.period_id
+);
+
+DELETE FROM public.financial_summaries
+WHERE period_id IN (SELECT id FROM period_duplicates);
+
+DELETE FROM public.financial_periods
+WHERE id IN (SELECT id FROM period_duplicates);
+
+ALTER TABLE public.financial_periods
+    ADD CONSTRAINT financial_periods_company_period_key
+    UNIQUE (company_id, period_start, period_type);
+
+COMMIT;
@@ -0,0 +1,37 @@
+-- Content-hash embedding cache
+--
+-- embedding_cache: one vector per (content_hash, model_name), shared by all
+-- companies and workers, so identical summary text is encoded once.
+--
+-- summary_embeddings gains content_hash / model_name so embed_missing_summaries()
+-- can detect summaries whose text changed since they were embedded, and a
+-- unique summary_id so stale embeddings are replaced in place.
+--
+-- content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+-- Existing embeddings have no hash and are regenerated on the next ingestion.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.embedding_cache (
+    content_hash text NOT NULL,
+    model_name text NOT NULL,
+    embedding vector(384) NOT NULL,
+    created_at timestamp without time zone DEFAULT now(),
+    CONSTRAINT embedding_cache_pkey PRIMARY KEY (content_hash, model_name)
+);
+
+ALTER TABLE public.summary_embeddings
+    ADD COLUMN IF NOT EXISTS content_hash text,
+    ADD COLUMN IF NOT EXISTS model_name text;
+
+-- Keep the newest embedding per summary
+DELETE FROM public.summary_embeddings e
+USING public.summary_embeddings newer
+WHERE newer.summary_id = e.summary_id
+  AND (COALESCE(newer.created_at, '-infinity'), newer.id)
+    > (COALESCE(e.created_at, '-infinity'), e.id);
+
+ALTER TABLE public.summary_embeddings
+    ADD CONSTRAINT summary_embeddings_summary_id_key UNIQUE (summary_id);
+
+COMMIT;
@@ -0,0 +1,41 @@
+-- ANN-ready summary_embeddings
+--
+-- - embedding gets a fixed dimension (required by HNSW / IVFFlat indexes)
+-- - company_id is denormalized from financial_summaries so retrieval can
+--   pre-filter on an indexed column of the embedding table itself
+-- - default HNSW index (L2, matches `<->`); switch / rebuild with
+--   python -m app.retrieval.vector_index --rebuild [--method ivfflat]
+--
+-- The HNSW index is built CONCURRENTLY after the transaction, so writes to
+-- summary_embeddings continue during the build: run this file WITHOUT
+-- psql --single-transaction. If the build fails it leaves an INVALID
+-- index; `python -m app.retrieval.vector_index --ensure` rebuilds it.
+
+BEGIN;
+
+ALTER TABLE public.summary_embeddings
+    ALTER COLUMN embedding TYPE vector(384);
+
+ALTER TABLE public.summary_embeddings
+    ADD COLUMN IF NOT EXISTS company_id uuid;
+
+UPDATE public.summary_embeddings e
+SET company_id = s.company_id
+FROM public.financial_summaries s
+WHERE s.id = e.summary_id
+  AND e.company_id IS NULL;
+
+ALTER TABLE public.summary_embeddings
+    ALTER COLUMN company_id SET NOT NULL,
+    ADD CONSTRAINT summary_embeddings_company_id_fkey
+        FOREIGN KEY (company_id) REFERENCES public.companies(id);
+
+CREATE INDEX IF NOT EXISTS summary_embeddings_company_id_idx
+    ON public.summary_embeddings (company_id);
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS summary_embeddings_embedding_hnsw
+    ON public.summary_embeddings
+    USING hnsw (embedding vector_l2_ops)
+    WITH (m = 16, ef_construction = 64);
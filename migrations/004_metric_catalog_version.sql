@@ -0,0 +1,42 @@
+-- Metric catalog version counter
+--
+-- In-process caches of metric reference data (dependency graph, KPI
+-- hierarchies, metric registry) compare their version against this row
+-- and reload when it moved. Any write to metric_definitions or
+-- metric_dependencies bumps it (statement-level triggers).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.metric_catalog_version (
+    id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version bigint NOT NULL DEFAULT 1,
+    updated_at timestamp without time zone DEFAULT now()
+);
+
+INSERT INTO public.metric_catalog_version (id) VALUES (1)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION public.bump_metric_catalog_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE public.metric_catalog_version
+    SET version = version + 1,
+        updated_at = now()
+    WHERE id = 1;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS metric_definitions_catalog_version ON public.metric_definitions;
+CREATE TRIGGER metric_definitions_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.metric_definitions
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_metric_catalog_version();
+
+DROP TRIGGER IF EXISTS metric_dependencies_catalog_version ON public.metric_dependencies;
+CREATE TRIGGER metric_dependencies_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.metric_dependencies
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_metric_catalog_version();
+
+COMMIT;
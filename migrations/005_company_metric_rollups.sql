@@ -0,0 +1,49 @@
+-- Per-company metric rollups
+--
+-- One row per (company_id, metric_id) with the components each
+-- aggregation_type needs (sum/count for sum+avg+ratio, last value by
+-- period_end for last). Maintained incrementally by bulk_load_facts();
+-- /company/{id}/overview reads it instead of aggregating financial_facts.
+--
+-- Backfilled with a full recompute. Verify / repair any time with:
+--   python -m app.metrics.company_rollups [--company-id <uuid>] [--fix]
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.company_metric_rollups (
+    company_id uuid NOT NULL,
+    metric_id uuid NOT NULL,
+    value_sum numeric,
+    value_count bigint NOT NULL DEFAULT 0,
+    last_value numeric,
+    last_period_end date,
+    updated_at timestamp without time zone DEFAULT now(),
+    CONSTRAINT company_metric_rollups_pkey PRIMARY KEY (company_id, metric_id),
+    CONSTRAINT company_metric_rollups_company_id_fkey FOREIGN KEY (company_id) REFERENCES public.companies(id),
+    CONSTRAINT company_metric_rollups_metric_id_fkey FOREIGN KEY (metric_id) REFERENCES public.metric_definitions(id)
+);
+
+DELETE FROM public.company_metric_rollups;
+
+INSERT INTO public.company_metric_rollups (
+    company_id,
+    metric_id,
+    value_sum,
+    value_count,
+    last_value,
+    last_period_end
+)
+SELECT
+    f.company_id,
+    f.metric_id,
+    SUM(f.value),
+    COUNT(f.value),
+    (array_agg(
+        f.value ORDER BY p.period_end DESC, f.created_at DESC, f.id DESC
+    ))[1],
+    MAX(p.period_end)
+FROM public.financial_facts f
+JOIN public.financial_periods p ON p.id = f.period_id
+GROUP BY f.company_id, f.metric_id;
+
+COMMIT;
@@ -0,0 +1,9 @@
+-- Company data version
+--
+-- Bumped by ingest_financial_file() in the same transaction that commits
+-- new facts and again on completion (summaries + embeddings). Cached
+-- presentations are keyed by (company_id, data_version) and the baseline
+-- endpoint uses it as its ETag.
+
+ALTER TABLE public.companies
+    ADD COLUMN IF NOT EXISTS data_version bigint NOT NULL DEFAULT 0;
@@ -0,0 +1,7 @@
+-- Duplicate-upload lookup
+--
+-- /upload checks (company_id, file_hash) right after the body is hashed,
+-- before any ingestion work; this keeps that check an index probe.
+
+CREATE INDEX IF NOT EXISTS source_documents_company_file_hash_idx
+    ON public.source_documents (company_id, file_hash);
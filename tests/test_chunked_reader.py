@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from app.dev.bench_ingestion_memory import measure_peak_rss_mb, write_ledger_csv
+from app.ingestion.chunked_reader import iter_file_chunks
+
+
+def _ledger(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=rows, freq="D").strftime("%Y-%m-%d"),
+        "revenue": range(rows),
+        "cogs": [None if i % 7 == 0 else i * 0.5 for i in range(rows)],
+    })
+
+
+@pytest.fixture
+def ledger_csv(tmp_path):
+    path = tmp_path / "ledger.csv"
+    _ledger(1003).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def ledger_xlsx(tmp_path):
+    pytest.importorskip("openpyxl")
+    path = tmp_path / "ledger.xlsx"
+    _ledger(1003).to_excel(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 100, 1003, 5000])
+@pytest.mark.parametrize("fixture", ["ledger_csv", "ledger_xlsx"])
+def test_chunks_never_exceed_chunk_rows(request, fixture, chunk_rows):
+    path = request.getfixturevalue(fixture)
+
+    chunks = list(iter_file_chunks(path, chunk_rows))
+
+    assert all(len(chunk) <= chunk_rows for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 1003
+    assert all(list(chunk.columns) == ["date", "revenue", "cogs"] for chunk in chunks)
+
+
+def test_blank_rows_are_dropped(tmp_path):
+    path = tmp_path / "ledger.csv"
+    path.write_text("date,revenue\n2024-01-31,10\n,\n2024-02-29,20\n")
+
+    chunks = list(iter_file_chunks(str(path), chunk_rows=2))
+
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+
+
+def test_chunked_peak_memory_stays_bounded(tmp_path):
+    # ~10 MB CSV: parsed whole it needs tens of MB, chunked it stays flat
+    path = str(tmp_path / "ledger.csv")
+    write_ledger_csv(path, rows=100_000, metrics=10)
+
+    chunked = measure_peak_rss_mb("chunked", path, chunk_rows=5_000)
+    whole = measure_peak_rss_mb("whole", path, chunk_rows=5_000)
+
+    assert chunked < 20
+    assert chunked < whole
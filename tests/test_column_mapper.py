@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from app.ingestion.period_derivation import parse_period_column
+from app.normalization.column_mapper import (
+    DEFAULT_ALIAS_INDEX,
+    map_columns,
+    normalize_columns,
+)
+from app.normalization.schema_definitions import CANONICAL_FIELDS
+
+
+def _normalize(df):
+    return normalize_columns(
+        df,
+        CANONICAL_FIELDS,
+        source_metadata={"source": "upload", "source_grain": "auto"},
+        canonical_metrics=[],
+    )
+
+
+@pytest.mark.parametrize(
+    "columns, kept",
+    [
+        (["Date", "Fiscal Year", "Revenue"], "Date"),
+        (["Fiscal Year", "Date", "Revenue"], "Date"),
+        (["Month", "Year", "Revenue"], "Month"),
+        (["Year", "Quarter", "Revenue"], "Quarter"),
+        (["Period", "Month", "Fiscal Quarter"], "Period"),
+    ],
+)
+def test_one_period_date_column_by_priority(columns, kept):
+    mapped, ambiguous, _ = map_columns(columns, CANONICAL_FIELDS)
+
+    period = [m["raw_column"] for m in mapped if m["canonical_field"] == "period_date"]
+    assert period == [kept]
+
+    demoted = {a["raw_column"] for a in ambiguous}
+    assert demoted == {
+        c for c in columns if c != kept and c != "Revenue"
+    }
+    assert all(a["kept"] == kept for a in ambiguous)
+
+
+def test_date_with_fiscal_year_column_ingests():
+    df = pd.DataFrame({
+        "Date": ["2024-01-31", "2024-02-29"],
+        "Fiscal Year": [2024, 2024],
+        "Revenue": [100, 200],
+    })
+
+    canonical_df, report = _normalize(df)
+
+    assert list(canonical_df.columns).count("period_date") == 1
+    assert [i["column"] for i in report["issues"] if i["issue_type"] == "ambiguous_column"] == [
+        "Fiscal Year"
+    ]
+
+    periods = parse_period_column(canonical_df["period_date"], fiscal_year_start_month=4)
+    assert periods["period_type"].tolist() == ["month", "month"]
+    assert periods["fiscal_month"].tolist() == [1, 2]
+
+
+def test_tenant_alias_ranks_after_listed_aliases():
+    index = DEFAULT_ALIAS_INDEX.with_aliases({"period_date": ["booking date"]})
+
+    mapped, ambiguous, _ = map_columns(
+        ["Booking Date", "Date"], CANONICAL_FIELDS, alias_index=index
+    )
+
+    assert mapped == [{"raw_column": "Date", "canonical_field": "period_date"}]
+    assert [a["raw_column"] for a in ambiguous] == ["Booking Date"]
@@ -0,0 +1,279 @@
+"""
+LLM clients against a local stub Ollama server (no model needed).
+
+The stub serves POST /api/generate. Prompts drive its behaviour:
+- "sleep:<s>"  answer after s seconds
+- "fail:<n>"   answer 503 to the first n requests for this prompt
+- "tokens:<n>:<s>"  (stream=true) n tokens, s seconds apart
+- anything else: answer immediately
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.llm.local_llm import AsyncLLMClient, LLMDeadlineExceeded, SyncLLMClient
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.failures = {}
+        self.client_ports = set()
+
+    def reset(self):
+        # Let handlers of abandoned (timed out / cancelled) calls finish
+        while self.in_flight:
+            time.sleep(0.05)
+        with self.lock:
+            self.max_in_flight = self.requests = 0
+            self.failures.clear()
+            self.client_ports.clear()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        state = self.server.state
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["prompt"]
+
+        with state.lock:
+            state.requests += 1
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            state.client_ports.add(self.client_address[1])
+
+        try:
+            status = 200
+            if body.get("stream") and prompt.startswith("tokens:"):
+                _, count, delay = prompt.split(":")
+                self._stream_tokens(int(count), float(delay))
+                return
+
+            if prompt.startswith("sleep:"):
+                time.sleep(float(prompt.split(":")[1]))
+            elif prompt.startswith("fail:"):
+                with state.lock:
+                    seen = state.failures.get(prompt, 0)
+                    state.failures[prompt] = seen + 1
+                if seen < int(prompt.split(":")[1]):
+                    status = 503
+
+            payload = json.dumps({"response": f"echo {prompt}"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    def _stream_tokens(self, count: int, delay: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write_chunk(data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        for i in range(count):
+            time.sleep(delay)
+            write_chunk(json.dumps({"response": f"t{i} ", "done": False}).encode() + b"\n")
+        write_chunk(json.dumps({"response": "", "done": True}).encode() + b"\n")
+        write_chunk(b"")
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub(stub_server):
+    stub_server.state.reset()
+    yield stub_server.state
+    stub_server.state.reset()
+
+
+@pytest.fixture
+def url(stub_server):
+    return f"http://127.0.0.1:{stub_server.server_address[1]}/api/generate"
+
+
+def run_async(url, scenario):
+    """
+    Run scenario(client) on a fresh AsyncLLMClient, in its own event loop.
+    """
+    async def main():
+        client = AsyncLLMClient(url=url, max_concurrency=2, retry_backoff=0.05)
+        try:
+            return await scenario(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def sync_client(url):
+    client = SyncLLMClient(url=url, max_concurrency=2, retry_backoff=0.05)
+    yield client
+    client.close()
+
+
+# ------------------------------------------------------------
+# AsyncLLMClient
+# ------------------------------------------------------------
+def test_async_call_does_not_block_event_loop(url, stub):
+    async def scenario(client):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick_task = asyncio.create_task(ticker())
+        text = await client.generate("sleep:0.3")
+        tick_task.cancel()
+        return text, ticks
+
+    text, ticks = run_async(url, scenario)
+    assert text == "echo sleep:0.3"
+    assert ticks >= 15
+
+
+def test_async_reuses_connection(url, stub):
+    async def scenario(client):
+        for _ in range(10):
+            await client.generate("hello")
+
+    run_async(url, scenario)
+    assert len(stub.client_ports) == 1
+
+
+def test_async_retries_503(url, stub):
+    text = run_async(url, lambda client: client.generate("fail:2"))
+    assert text == "echo fail:2"
+    assert stub.requests == 3
+
+
+def test_async_concurrency_limit(url, stub):
+    async def scenario(client):
+        await asyncio.gather(*(client.generate("sleep:0.2") for _ in range(6)))
+
+    run_async(url, scenario)
+    assert stub.max_in_flight == 2
+
+
+def test_async_deadline(url, stub):
+    t0 = time.perf_counter()
+    with pytest.raises(LLMDeadlineExceeded):
+        run_async(url, lambda client: client.generate("sleep:2", deadline=0.3))
+    assert time.perf_counter() - t0 < 0.6
+
+
+def test_async_cancellation_returns_immediately(url, stub):
+    async def scenario(client):
+        task = asyncio.create_task(client.generate("sleep:2"))
+        await asyncio.sleep(0.2)
+        t0 = time.perf_counter()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return task.cancelled(), time.perf_counter() - t0
+
+    cancelled, elapsed = run_async(url, scenario)
+    assert cancelled
+    assert elapsed < 0.1
+
+
+# ------------------------------------------------------------
+# Streaming
+# ------------------------------------------------------------
+def test_stream_yields_tokens_incrementally(url, stub):
+    async def scenario(client):
+        t0 = time.perf_counter()
+        return [
+            (token, time.perf_counter() - t0)
+            async for token in client.stream("tokens:5:0.1")
+        ]
+
+    arrivals = run_async(url, scenario)
+    assert [t for t, _ in arrivals] == [f"t{i} " for i in range(5)]
+    assert arrivals[0][1] < 0.25 < arrivals[-1][1]
+
+
+def test_stream_retries_before_first_token(url, stub):
+    async def scenario(client):
+        return [t async for t in client.stream("fail:1")]
+
+    assert run_async(url, scenario) == ["echo fail:1"]
+    assert stub.requests == 2
+
+
+def test_stream_deadline_mid_stream(url, stub):
+    tokens = []
+
+    async def scenario(client):
+        async for token in client.stream("tokens:10:0.1", deadline=0.35):
+            tokens.append(token)
+
+    with pytest.raises(LLMDeadlineExceeded):
+        run_async(url, scenario)
+    assert 2 <= len(tokens) <= 4
+
+
+# ------------------------------------------------------------
+# SyncLLMClient
+# ------------------------------------------------------------
+def test_sync_answer_and_connection_reuse(sync_client, stub):
+    assert sync_client.generate("hello") == "echo hello"
+
+    for _ in range(10):
+        sync_client.generate("hello")
+    assert len(stub.client_ports) == 1
+
+
+def test_sync_retries_503(sync_client, stub):
+    assert sync_client.generate("fail:2") == "echo fail:2"
+    assert stub.requests == 3
+
+
+def test_sync_concurrency_limit(sync_client, stub):
+    with ThreadPoolExecutor(6) as pool:
+        list(pool.map(sync_client.generate, ["sleep:0.2"] * 6))
+    assert stub.max_in_flight == 2
+
+
+def test_sync_deadline(sync_client, stub):
+    t0 = time.perf_counter()
+    with pytest.raises(LLMDeadlineExceeded):
+        sync_client.generate("sleep:2", deadline=0.3)
+    assert time.perf_counter() - t0 < 0.6
@@ -0,0 +1,196 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.ingestion.period_derivation import (
+    derive_fiscal_quarter,
+    derive_fiscal_year_from_date,
+    derive_period_columns,
+    derive_period_dates,
+    extract_calendar_month,
+    fiscal_year_label,
+    infer_date_grain,
+    parse_period_column,
+)
+
+MONTH_ABBR = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+START_MONTHS = range(1, 13)
+GRAINS = ("month", "quarter", "year")
+
+
+def _sample_dates(samples: int = 2000, seed: int = 7) -> list:
+    rng = np.random.default_rng(seed)
+    epoch = date(1990, 1, 1)
+    offsets = rng.integers(0, 365 * 80, size=samples)
+    dates = [epoch + timedelta(days=int(d)) for d in offsets]
+
+    # Boundaries: first / last day of every month, leap days
+    for year in (1999, 2000, 2023, 2024, 2100):
+        for month in range(1, 13):
+            first = date(year, month, 1)
+            dates += [first, first - timedelta(days=1)]
+    dates += [date(2000, 2, 29), date(2024, 2, 29)]
+
+    # Mixed input types, as uploads produce them
+    return [d.isoformat() if i % 2 else d for i, d in enumerate(dates)]
+
+
+INPUTS = _sample_dates()
+
+
+def _scalar_row(value, period_type: str, start_month: int) -> tuple:
+    fiscal_year = derive_fiscal_year_from_date(value, start_month)
+    month = extract_calendar_month(value)
+    quarter = derive_fiscal_quarter(month, start_month)
+
+    period_start, period_end = derive_period_dates(
+        period_type=period_type,
+        fiscal_year=fiscal_year,
+        fiscal_quarter=quarter,
+        fiscal_month=month,
+        fiscal_year_start_month=start_month,
+    )
+
+    return (
+        period_start,
+        period_end,
+        fiscal_year,
+        quarter if period_type == "quarter" else None,
+        month if period_type == "month" else None,
+    )
+
+
+def _label_cases(start_month: int) -> list:
+    """
+    (label, expected row) for every fiscal quarter / year / month
+    of fiscal years 1995-2035.
+    """
+    cases = []
+    for fiscal_year in range(1995, 2036):
+        # FY labels are named by the year the fiscal year ends in
+        named = fiscal_year + (start_month > 1)
+
+        for quarter in range(1, 5):
+            start, end = derive_period_dates(
+                "quarter", fiscal_year, quarter, None, start_month
+            )
+            row = ("quarter", start, end, fiscal_year, quarter, None)
+            first, last = MONTH_ABBR[start.month - 1], MONTH_ABBR[end.month - 1]
+            cases += [
+                (f"Q{quarter} FY{named % 100:02d}", row),
+                (f"FY{named} Q{quarter}", row),
+                (f"{first}-{last} {end.year}", row),
+            ]
+
+        start, end = derive_period_dates("year", fiscal_year, None, None, start_month)
+        row = ("year", start, end, fiscal_year, None, None)
+        cases += [(f"FY{named}", row), (f"FY{named % 100:02d}", row)]
+        if start_month > 1:
+            cases.append((f"FY{fiscal_year}-{named % 100:02d}", row))
+
+        for month in range(1, 13):
+            value = date(fiscal_year, month, 1)
+            cases.append(
+                (f"{MONTH_ABBR[month - 1]} {fiscal_year}",
+                 ("month", *_scalar_row(value, "month", start_month)))
+            )
+
+    return cases
+
+
+@pytest.mark.parametrize("period_type", GRAINS)
+@pytest.mark.parametrize("start_month", START_MONTHS)
+def test_array_derivation_matches_scalar(start_month, period_type):
+    expected = [_scalar_row(v, period_type, start_month) for v in INPUTS]
+    frame = derive_period_columns(INPUTS, period_type, start_month)
+
+    actual = list(frame.itertuples(index=False, name=None))
+    mismatches = [
+        (value, exp, act)
+        for value, exp, act in zip(INPUTS, expected, actual)
+        if exp != act
+    ]
+    assert not mismatches, mismatches[:5]
+
+
+@pytest.mark.parametrize("start_month", START_MONTHS)
+def test_period_labels_match_scalar(start_month):
+    cases = _label_cases(start_month)
+    frame = parse_period_column([label for label, _ in cases], start_month)
+
+    actual = list(frame.itertuples(index=False, name=None))
+    mismatches = [
+        (label, exp, act)
+        for (label, exp), act in zip(cases, actual)
+        if exp != act
+    ]
+    assert not mismatches, mismatches[:5]
+
+
+@pytest.mark.parametrize(
+    "label, start_month, rendered",
+    [
+        ("Q3 FY24", 4, "Q3 FY2024"),
+        ("FY24 Q1", 4, "Q1 FY2024"),
+        ("Q1 FY2024-25", 4, "Q1 FY2025"),
+        ("Q2 2024", 1, "Q2 FY2024"),
+        ("FY2023", 4, "FY2023"),
+        ("FY2023-24", 7, "FY2024"),
+        ("2023", 1, "FY2023"),
+    ],
+)
+def test_fiscal_year_label_renders_uploaded_label(label, start_month, rendered):
+    row = parse_period_column([label], start_month).iloc[0]
+    fy = fiscal_year_label(row["fiscal_year"], start_month)
+
+    if row["period_type"] == "quarter":
+        assert f"Q{row['fiscal_quarter']} {fy}" == rendered
+    else:
+        # Named by the year the fiscal year ends in
+        assert fy == rendered == f"FY{row['period_end'].year}"
+
+
+@pytest.mark.parametrize(
+    "dates, start_month, grain",
+    [
+        # Quarter ends / starts, calendar and April fiscal years
+        (["2024-03-31", "2024-06-30", "2024-09-30", "2024-12-31"], 1, "quarter"),
+        (["2024-01-01", "2024-04-01", "2024-07-01"], 1, "quarter"),
+        (["2023-06-30", "2023-09-30", "2023-12-31", "2024-03-31"], 4, "quarter"),
+        # Gaps are fine as long as they stay on quarter boundaries
+        (["2023-03-31", "2023-09-30", "2024-03-31"], 1, "quarter"),
+        # Fiscal year ends / starts
+        (["2022-03-31", "2023-03-31", "2024-03-31"], 4, "year"),
+        (["2022-12-31", "2023-12-31"], 1, "year"),
+        (["2023-04-01", "2024-04-01"], 4, "year"),
+        # Monthly
+        (["2024-01-31", "2024-02-29", "2024-03-31"], 1, "month"),
+        # 3 months apart but not on quarter boundaries of an April year
+        (["2024-02-29", "2024-05-31", "2024-08-31"], 4, "month"),
+        # Ambiguous: one date, several dates in one month, mixed positions
+        (["2024-03-31"], 1, "month"),
+        (["2024-03-01", "2024-03-31", "2024-06-30"], 1, "month"),
+        (["2024-01-01", "2024-06-30"], 1, "month"),
+        # No dates at all
+        (["Q1 FY24", "Q2 FY24"], 4, "month"),
+    ],
+)
+def test_infer_date_grain(dates, start_month, grain):
+    assert infer_date_grain(dates * 2, start_month) == grain
+
+
+def test_auto_grain_places_quarter_end_dates_in_quarters():
+    periods = parse_period_column(
+        ["2024-03-31", "2024-06-30", "2024-09-30", "Q3 FY24"],
+        fiscal_year_start_month=1,
+        date_grain="auto",
+    )
+
+    assert periods["period_type"].tolist() == ["quarter"] * 4
+    assert periods["fiscal_quarter"].tolist() == [1, 2, 3, 3]
+    assert [str(d) for d in periods["period_start"]] == [
+        "2024-01-01", "2024-04-01", "2024-07-01", "2024-07-01",
+    ]